@@ -0,0 +1,389 @@
+# core/adaptive.py
+
+"""
+Adaptive tests: the next question is the most informative one for the
+student's current ability estimate.
+
+Items are the (topic, variant id, params) combinations of the topic
+catalog. Each gets two-parameter logistic (2PL) IRT parameters, converted
+from its classical statistics in the results store (core.item_stats; Lord's
+approximation from the pass rate and the point-biserial discrimination).
+Items without enough recorded answers use the statistics of their variant
+(all params merged), and average parameters when the variant has none.
+
+Everything a click needs is precomputed once in AdaptiveIndex, on a fixed
+grid of ability values:
+
+    log P(pass) and log P(fail) of every item at every grid point
+        (updating the ability after an answer is one pass over the grid)
+    the items ordered by Fisher information at every grid point
+        (selecting the next question is a walk down one precomputed list)
+
+The ability is the posterior mean (EAP) with a standard normal prior, and
+its standard error the posterior standard deviation. Scores count as
+fractional responses (70% = 0.7 of a pass). A session stops once the
+standard error reaches the target, so students whose level is clear early
+get shorter tests with the same precision.
+
+With the default parameters, sessions mostly run to max_questions until the
+results store has answers for the items: an item with average parameters
+gives at most about 0.24 information, so DEFAULT_TARGET_SE (0.5, i.e. a
+posterior information of 4 from a prior of 1) needs at least 13 answers and
+simulated sessions end at 14-15 of DEFAULT_MAX_QUESTIONS. Discriminating
+items (from recorded statistics) reach the target sooner.
+
+Usage:
+    session = AdaptiveSession(get_default_index(), topics=["n-queens", "minimax"])
+    question, answer = session.next_question()
+    session.record(score, user_answer)   # then next_question() again, until it returns None
+    session.ability, session.standard_error
+"""
+
+import math
+import random
+import threading
+import time
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Sequence, Set, Tuple
+
+from .item_stats import ItemStats, item_key
+from .question_factory import generate_item
+from .topic_catalog import catalog
+
+# Ability grid: -4 .. 4 in steps of 0.1
+GRID_MIN = -4.0
+GRID_MAX = 4.0
+GRID_POINTS = 81
+
+LOGISTIC_SCALE = 1.702      # normal ogive -> logistic
+DEFAULT_BISERIAL = 0.5      # assumed for items without a usable discrimination
+MIN_ITEM_COUNT = 30         # answers needed before an item's statistics are used
+
+DEFAULT_TARGET_SE = 0.5
+DEFAULT_MIN_QUESTIONS = 3
+DEFAULT_MAX_QUESTIONS = 15
+# The next item is drawn among the few most informative ones, so students
+# starting at the same ability do not all get the same questions
+RANDOMESQUE = 3
+
+# Seconds between checks of the results store for new answers (get_default_index)
+INDEX_REFRESH_INTERVAL = 60.0
+
+
+class ItemParameters(NamedTuple):
+    """2PL parameters of one item."""
+    topic: str
+    variant: str
+    params: Mapping[str, Any]
+    discrimination: float   # a
+    difficulty: float       # b
+    count: int              # recorded answers the parameters come from
+
+
+def _normal_quantile(p: float) -> float:
+    """Inverse of the standard normal CDF (bisection; p in (0, 1))."""
+    low, high = -8.0, 8.0
+    for _ in range(60):
+        middle = (low + high) / 2
+        if 0.5 * (1 + math.erf(middle / math.sqrt(2))) < p:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+def irt_parameters(stats: Optional[ItemStats], min_count: int = MIN_ITEM_COUNT) -> Tuple[float, float]:
+    """
+    2PL (discrimination, difficulty) from classical item statistics.
+
+    Args:
+        stats: Accumulated statistics of the item (None = no data)
+        min_count: Fewer recorded answers give the default parameters
+
+    Returns:
+        (a, b); (about 1, 0) for an average item
+    """
+    p = 0.5
+    biserial = DEFAULT_BISERIAL
+    if stats is not None and stats.count >= min_count:
+        p = min(0.98, max(0.02, stats.pass_rate))
+        z = _normal_quantile(p)
+        point_biserial = stats.discrimination
+        if point_biserial is not None:
+            density = math.exp(-z * z / 2) / math.sqrt(2 * math.pi)
+            biserial = point_biserial * math.sqrt(p * (1 - p)) / density
+        # Items that do not discriminate get a tiny (not negative) slope
+        biserial = min(0.95, max(0.05, biserial))
+
+    z = _normal_quantile(p)
+    a = LOGISTIC_SCALE * biserial / math.sqrt(1 - biserial * biserial)
+    b = -z / biserial
+    return min(3.0, max(0.2, a)), min(GRID_MAX, max(GRID_MIN, b))
+
+
+def _item_information(a: float, b: float, theta: float) -> float:
+    p = 1 / (1 + math.exp(-a * (theta - b)))
+    return a * a * p * (1 - p)
+
+
+class AdaptiveIndex:
+    """Precomputed response probabilities and information order of a set of items."""
+
+    def __init__(self, items: Sequence[ItemParameters]):
+        """
+        Args:
+            items: Parameters of every selectable item
+        """
+        self.items = list(items)
+        step = (GRID_MAX - GRID_MIN) / (GRID_POINTS - 1)
+        self.grid = [GRID_MIN + i * step for i in range(GRID_POINTS)]
+        self.log_prior = [-theta * theta / 2 for theta in self.grid]
+
+        self.log_pass: List[List[float]] = []
+        self.log_fail: List[List[float]] = []
+        for item in self.items:
+            # log(1 / (1 + e^-x)) computed without overflow
+            exponents = [item.discrimination * (theta - item.difficulty) for theta in self.grid]
+            self.log_pass.append([-math.log1p(math.exp(-x)) if x > -30 else x for x in exponents])
+            self.log_fail.append([-math.log1p(math.exp(x)) if x < 30 else -x for x in exponents])
+
+        # Information of every item and items by decreasing information, for every grid point
+        self.information = [
+            [_item_information(item.discrimination, item.difficulty, theta) for item in self.items]
+            for theta in self.grid
+        ]
+        self.order = [
+            sorted(range(len(self.items)), key=lambda i: -information[i])
+            for information in self.information
+        ]
+
+    @classmethod
+    def from_statistics(
+        cls,
+        accumulators: Mapping[Tuple[str, str, str], ItemStats] = None,
+        topics: Sequence[str] = None,
+        min_count: int = MIN_ITEM_COUNT
+    ) -> "AdaptiveIndex":
+        """
+        Index of every (variant, params) combination of the given topics.
+
+        Args:
+            accumulators: Item statistics by (topic, variant, params), as
+                ResultsStore.item_accumulators returns them (optional)
+            topics: Topic IDs (default: all)
+            min_count: Answers needed before an item's statistics are used
+        """
+        accumulators = accumulators or {}
+        by_variant: Dict[Tuple[str, str], ItemStats] = {}
+        for (topic, variant, _), stats in accumulators.items():
+            by_variant.setdefault((topic, variant), ItemStats()).merge(stats)
+
+        items = []
+        for topic in topics or catalog.ids():
+            variants = catalog.variants(topic)
+            for variant_index, params in catalog.strata(topic):
+                variant = variants[variant_index]
+                stats = accumulators.get(item_key({"topic": topic, "variant": variant, "params": params}))
+                if stats is None or stats.count < min_count:
+                    stats = by_variant.get((topic, variant))
+                a, b = irt_parameters(stats, min_count)
+                items.append(ItemParameters(topic, variant, params, a, b, stats.count if stats else 0))
+        return cls(items)
+
+    def nearest_point(self, theta: float) -> int:
+        """Index of the grid point closest to theta."""
+        step = (GRID_MAX - GRID_MIN) / (GRID_POINTS - 1)
+        return min(GRID_POINTS - 1, max(0, int(round((theta - GRID_MIN) / step))))
+
+    def select(
+        self,
+        theta: float,
+        exclude: Set[int] = frozenset(),
+        topics: Set[str] = None,
+        rng: random.Random = None,
+        randomesque: int = RANDOMESQUE
+    ) -> Optional[int]:
+        """
+        Pick one of the most informative items at ability theta.
+
+        Args:
+            theta: Current ability estimate
+            exclude: Indexes of items already asked
+            topics: Only items of these topics (default: all)
+            rng: Random generator for the randomesque choice
+            randomesque: Number of best items to choose from (items as
+                informative as the last of them are included too)
+
+        Returns:
+            Item index, or None when no item is left
+        """
+        point = self.nearest_point(theta)
+        information = self.information[point]
+        best = []
+        for index in self.order[point]:
+            if index in exclude or (topics and self.items[index].topic not in topics):
+                continue
+            if len(best) >= randomesque and information[index] < information[best[-1]] - 1e-9:
+                break
+            best.append(index)
+        if len(best) <= 1:
+            return best[0] if best else None
+        return (rng or random).choice(best)
+
+
+class AdaptiveSession:
+    """One student's adaptive test."""
+
+    def __init__(
+        self,
+        index: AdaptiveIndex,
+        topics: Sequence[str] = None,
+        target_se: float = DEFAULT_TARGET_SE,
+        min_questions: int = DEFAULT_MIN_QUESTIONS,
+        max_questions: int = DEFAULT_MAX_QUESTIONS,
+        seed: int = None
+    ):
+        """
+        Args:
+            index: Precomputed item index
+            topics: Topic IDs to draw questions from (default: all in the index)
+            target_se: Stop once the ability's standard error is this small
+            min_questions: Never stop before this many answers
+            max_questions: Never ask more questions
+            seed: Seed of the question choice and generation (random if None)
+        """
+        self.index = index
+        self.topics = set(catalog.resolve(t) or t for t in topics) if topics else None
+        self.target_se = target_se
+        self.min_questions = min_questions
+        self.max_questions = max_questions
+        self.rng = random.Random(seed)
+
+        self.questions: List[Dict[str, Any]] = []
+        self.answers: List[str] = []
+        self.scores: List[float] = []
+        self.user_answers: List[Any] = []
+        self._asked: List[int] = []
+        self._pending: Optional[int] = None
+        self._log_posterior = list(index.log_prior)
+        self._update_estimate()
+
+    def _update_estimate(self):
+        peak = max(self._log_posterior)
+        weights = [math.exp(value - peak) for value in self._log_posterior]
+        total = sum(weights)
+        mean = sum(w * theta for w, theta in zip(weights, self.index.grid)) / total
+        variance = sum(w * (theta - mean) ** 2 for w, theta in zip(weights, self.index.grid)) / total
+        self.ability = mean
+        self.standard_error = math.sqrt(variance)
+
+    @property
+    def finished(self) -> bool:
+        """Whether the test is over (precision reached, limit reached or no items left)."""
+        if self._pending is not None:
+            return False
+        if len(self.scores) >= self.max_questions:
+            return True
+        if len(self.scores) >= self.min_questions and self.standard_error <= self.target_se:
+            return True
+        return self.index.select(self.ability, set(self._asked), self.topics, randomesque=1) is None
+
+    def next_question(self) -> Optional[Tuple[Dict[str, Any], str]]:
+        """
+        Generate the next question.
+
+        Returns:
+            (question_obj, answer_text) like TestBuilder.iter_test, the pending
+            question again if its answer was not recorded yet, or None when
+            the test is over
+        """
+        if self._pending is not None:
+            return self.questions[-1], self.answers[-1]
+        if self.finished:
+            return None
+
+        index = self.index.select(self.ability, set(self._asked), self.topics, self.rng)
+        item = self.index.items[index]
+        generated = generate_item(item.topic, item.params, seed=self.rng.getrandbits(63), variant_id=item.variant)
+        question_obj = {
+            "id": len(self.questions) + 1,
+            "topic": generated.topic,
+            "topic_name": catalog.names().get(generated.topic, generated.topic),
+            "question": generated.question,
+            "params": dict(generated.params),
+            "variant": generated.variant_id,
+            "seed": generated.seed,
+        }
+        self.questions.append(question_obj)
+        self.answers.append(generated.answer)
+        self._asked.append(index)
+        self._pending = index
+        return question_obj, generated.answer
+
+    def record(self, score: float, user_answer: Any = None) -> float:
+        """
+        Record the score (0-100) of the pending question and update the ability.
+
+        Args:
+            score: Score of the student's answer
+            user_answer: The answer itself, kept in user_answers for the results store
+
+        Returns:
+            The new ability estimate
+        """
+        if self._pending is None:
+            raise ValueError("no question is waiting for an answer")
+        response = min(1.0, max(0.0, score / 100))
+        log_pass = self.index.log_pass[self._pending]
+        log_fail = self.index.log_fail[self._pending]
+        self._log_posterior = [
+            value + response * p + (1 - response) * q
+            for value, p, q in zip(self._log_posterior, log_pass, log_fail)
+        ]
+        self.scores.append(score)
+        self.user_answers.append(user_answer)
+        self._pending = None
+        self._update_estimate()
+        return self.ability
+
+    def summary(self) -> Dict[str, Any]:
+        """Ability, standard error and scores so far."""
+        return {
+            "ability": round(self.ability, 3),
+            "standard_error": round(self.standard_error, 3),
+            "questions": len(self.scores),
+            "average": sum(self.scores) / len(self.scores) if self.scores else None,
+        }
+
+
+_default_index = None
+_default_index_answers = None   # answers in the store when the index was built
+_default_index_checked = 0.0
+_default_index_lock = threading.Lock()
+
+
+def get_default_index() -> AdaptiveIndex:
+    """
+    Return the process-wide index of every topic.
+
+    Item parameters come from the results store named by SMARTEST_RESULTS_DB
+    when it is set, else every item gets average parameters. The store is
+    checked at most every INDEX_REFRESH_INTERVAL seconds and the index is
+    rebuilt when answers were recorded since it was built; running sessions
+    keep the index they started with.
+    """
+    global _default_index, _default_index_answers, _default_index_checked
+    if _default_index is not None and time.monotonic() - _default_index_checked < INDEX_REFRESH_INTERVAL:
+        return _default_index
+
+    from .results_store import get_default_store
+
+    with _default_index_lock:
+        if _default_index is not None and time.monotonic() - _default_index_checked < INDEX_REFRESH_INTERVAL:
+            return _default_index
+        store = get_default_store()
+        answers = store.item_answer_count() if store is not None else 0
+        if _default_index is None or answers != _default_index_answers:
+            _default_index = AdaptiveIndex.from_statistics(store.item_accumulators() if store is not None else None)
+            _default_index_answers = answers
+        _default_index_checked = time.monotonic()
+        return _default_index
@@ -1,16 +1,59 @@
 # core/base_question_handler.py
 
+import contextvars
+import logging
 import random
-from typing import Dict, Any, List, Tuple
+from contextlib import contextmanager
+from typing import Dict, Any, List, Mapping, Tuple
 from abc import ABC, abstractmethod
 
+from . import instrumentation
+from .solver_budget import BudgetExceeded, SolverBudget, budget_scope
+
+logger = logging.getLogger(__name__)
+
+
+# RNG used by the generation running in the current thread / asyncio task.
+# Context variables are per thread, so concurrent callers never share state.
+_generation_rng = contextvars.ContextVar("smartest_generation_rng", default=None)
+
+
+def current_rng():
+    """
+    Random generator of the current generation call.
+    
+    Returns:
+        The random.Random installed with use_rng(), or the random module
+        itself (global generator) outside such a call
+    """
+    rng = _generation_rng.get()
+    return rng if rng is not None else random
+
+
+@contextmanager
+def use_rng(rng: random.Random):
+    """Install `rng` as the generator for the duration of the block."""
+    token = _generation_rng.set(rng)
+    try:
+        yield rng
+    finally:
+        _generation_rng.reset(token)
+
 
 class BaseQuestionHandler(ABC):
     """
     Base class for handling question generation.
     Provides common functionality to avoid code repetition.
+    
+    Handler instances are shared between threads: generation must not store
+    state on self, must not mutate the caller's params and must draw random
+    numbers from self.rng. Long-running solvers call solver_budget.tick()
+    so they can be stopped when they exceed their budget.
     """
     
+    # Parameter re-samples tried before falling back to a cheaper variant
+    RESAMPLE_ATTEMPTS = 1
+    
     def __init__(self, template: Dict[str, Any]):
         """
         Initialize with a template loaded from JSON.
@@ -22,6 +65,11 @@ class BaseQuestionHandler(ABC):
         self.questions = template.get("questions", [])
         self.params_definition = template.get("params", {})
     
+    @property
+    def rng(self):
+        """Random generator of the current generation call (see use_rng)."""
+        return current_rng()
+    
     def select_question_variant(self, variant_index: int = None) -> Dict[str, Any]:
         """
         Select a question variant from the template.
@@ -38,17 +86,29 @@ class BaseQuestionHandler(ABC):
         if variant_index is not None and 0 <= variant_index < len(self.questions):
             return self.questions[variant_index]
         
-        return random.choice(self.questions)
+        return self.rng.choice(self.questions)
+    
+    def variant_index_of(self, variant_id: str) -> int:
+        """
+        Index of the variant with the given ID.
+        
+        Returns:
+            Variant index, or None if no variant has that ID
+        """
+        for index, variant in enumerate(self.questions):
+            if variant.get("id") == variant_id:
+                return index
+        return None
     
-    def prepare_params(self, params: Dict[str, Any] = None) -> Dict[str, Any]:
+    def prepare_params(self, params: Mapping[str, Any] = None) -> Dict[str, Any]:
         """
         Prepare parameters by merging provided params with defaults from template.
         
         Args:
-            params: User-provided parameters
+            params: User-provided parameters (read only, never modified)
             
         Returns:
-            Merged parameters with defaults applied
+            New dictionary with defaults applied
         """
         result = {}
         
@@ -57,7 +117,7 @@ class BaseQuestionHandler(ABC):
             if isinstance(meta, dict):
                 # If meta has choices, randomly select one as default
                 if "choices" in meta and meta["choices"]:
-                    default = meta.get("default", random.choice(meta["choices"]))
+                    default = meta.get("default", self.rng.choice(meta["choices"]))
                 else:
                     default = meta.get("default")
             else:
@@ -71,6 +131,22 @@ class BaseQuestionHandler(ABC):
         
         return result
     
+    @classmethod
+    def is_valid_params(cls, params: Dict[str, Any]) -> bool:
+        """
+        Check whether a combination of template parameters makes sense.
+        
+        Used by the topic catalog to prune the parameter space before
+        stratified sampling. Override when some combinations are invalid.
+        
+        Args:
+            params: One combination of template parameter values
+            
+        Returns:
+            True if the combination can be used for a question
+        """
+        return True
+    
     def format_text(self, text: str, params: Dict[str, Any]) -> str:
         """
         Format text with parameters, handling missing keys gracefully.
@@ -82,11 +158,12 @@ class BaseQuestionHandler(ABC):
         Returns:
             Formatted text
         """
-        try:
-            return text.format(**params)
-        except KeyError:
-            # If some keys are missing, return the text as-is
-            return text
+        with instrumentation.stage("handler.format"):
+            try:
+                return text.format(**params)
+            except KeyError:
+                # If some keys are missing, return the text as-is
+                return text
     
     def generate_from_template(self, variant: Dict[str, Any], params: Dict[str, Any]) -> Tuple[str, str]:
         """
@@ -107,7 +184,7 @@ class BaseQuestionHandler(ABC):
         
         return question, answer
     
-    def generate(self, params: Dict[str, Any] = None, variant_index: int = None) -> Tuple[str, str]:
+    def generate(self, params: Mapping[str, Any] = None, variant_index: int = None) -> Tuple[str, str]:
         """
         Main generation method. Can be overridden for custom logic.
         
@@ -118,21 +195,141 @@ class BaseQuestionHandler(ABC):
         Returns:
             Tuple of (question, answer)
         """
+        question, answer, _, _, _ = self.generate_detailed(params, variant_index)
+        return question, answer
+    
+    def generate_detailed(
+        self,
+        params: Mapping[str, Any] = None,
+        variant_index: int = None,
+        budget: SolverBudget = None
+    ) -> Tuple[str, str, Dict[str, Any], Dict[str, Any], str]:
+        """
+        Generate a question and report what it was generated from.
+        
+        The caller's params are never modified: the handler works on its own
+        copy, and the returned parameters are a snapshot taken before the
+        solver added its derived values.
+        
+        Computed variants run within a solver budget. When the solver runs
+        out of time or nodes, the parameters are re-sampled from the template
+        choices (RESAMPLE_ATTEMPTS times) and, if that fails too, a variant
+        that needs no computation is used instead. That last attempt gets a
+        fresh budget with the same limits, never an unlimited one.
+        
+        Args:
+            params: Parameters for generation (read only)
+            variant_index: Specific variant to use
+            budget: Solver budget (default: SolverBudget.default())
+            
+        Returns:
+            Tuple of (question, answer, variant, prepared_params, fallback),
+            where fallback is "", "resampled" or "variant"
+            
+        Raises:
+            BudgetExceeded: If the fallback variant exceeds its budget too
+                (e.g. the topic has no variant without computation)
+        """
         # Prepare parameters
-        prepared_params = self.prepare_params(params)
+        with instrumentation.stage("handler.prepare_params"):
+            prepared_params = self.prepare_params(params)
         
         # Select question variant
         variant = self.select_question_variant(variant_index)
         
         if not variant:
-            return "", ""
+            return "", "", {}, prepared_params, ""
+        
+        budget = budget or SolverBudget.default()
+        try:
+            question, answer = self._generate_variant(variant, prepared_params, budget)
+            return question, answer, variant, prepared_params, ""
+        except BudgetExceeded as e:
+            instrumentation.count("budget.exceeded")
+            logger.info("%s: solver for variant %r stopped (%s)", type(self).__name__, variant.get("id"), e)
+        
+        # Fallback 1: same variant, other parameters
+        for _ in range(self.RESAMPLE_ATTEMPTS):
+            resampled = self.resample_params(prepared_params)
+            if resampled is None:
+                break
+            try:
+                question, answer = self._generate_variant(variant, resampled, budget)
+            except BudgetExceeded:
+                instrumentation.count("budget.exceeded")
+                continue
+            instrumentation.count("budget.fallback.resampled")
+            return question, answer, variant, resampled, "resampled"
+        
+        # Fallback 2: a variant that needs no computation (it may still run a
+        # solver, e.g. when the topic has no other variant)
+        variant = self.fallback_variant(variant)
+        instrumentation.count("budget.fallback.variant")
+        try:
+            question, answer = self._generate_variant(
+                variant, prepared_params, SolverBudget(budget.max_seconds, budget.max_nodes)
+            )
+        except BudgetExceeded as e:
+            instrumentation.count("budget.failed")
+            raise BudgetExceeded(
+                f"{type(self).__name__}: fallback variant {variant.get('id')!r} exceeded its budget too ({e})"
+            ) from e
+        return question, answer, variant, prepared_params, "variant"
+    
+    def _generate_variant(
+        self,
+        variant: Dict[str, Any],
+        prepared_params: Dict[str, Any],
+        budget: SolverBudget
+    ) -> Tuple[str, str]:
+        """Generate one variant; handlers may add derived values to a private copy of the params."""
+        working_params = dict(prepared_params)
         
         # Check if custom generation is needed
-        if self.needs_custom_generation(variant, prepared_params):
-            return self.generate_custom(variant, prepared_params)
+        if self.needs_custom_generation(variant, working_params):
+            with instrumentation.stage("handler.solve"), budget_scope(budget):
+                return self.generate_custom(variant, working_params)
         
         # Default: generate from template
-        return self.generate_from_template(variant, prepared_params)
+        with instrumentation.stage("handler.template"):
+            return self.generate_from_template(variant, working_params)
+    
+    def resample_params(self, params: Mapping[str, Any]) -> Dict[str, Any]:
+        """
+        Draw a different valid combination of the template parameter choices.
+        
+        Args:
+            params: Parameters that exhausted the solver budget
+            
+        Returns:
+            New parameters, or None if the template offers no alternative
+        """
+        candidates = []
+        for key, meta in self.params_definition.items():
+            if isinstance(meta, dict) and meta.get("choices"):
+                candidates.append((key, meta["choices"]))
+        if not candidates:
+            return None
+        
+        for _ in range(10):
+            resampled = dict(params)
+            for key, choices in candidates:
+                resampled[key] = self.rng.choice(choices)
+            if resampled != dict(params) and self.is_valid_params(resampled):
+                return resampled
+        return None
+    
+    def fallback_variant(self, variant: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Variant used when a computed variant cannot be solved within budget.
+        
+        Returns:
+            The first variant that needs no computation (or the original one)
+        """
+        for candidate in self.questions:
+            if not candidate.get("requires_computation", False):
+                return candidate
+        return variant
     
     def needs_custom_generation(self, variant: Dict[str, Any], params: Dict[str, Any]) -> bool:
         """
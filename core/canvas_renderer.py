@@ -0,0 +1,217 @@
+# core/canvas_renderer.py
+
+"""
+Low-overhead PDF rendering that draws directly on a ReportLab canvas.
+
+Plain-text exam sheets do not need the Platypus flowable machinery: every
+block is a single-font paragraph. This renderer wraps lines itself using
+cached font metrics and reproduces the layout of ``SimpleDocTemplate``
+(A4, 1 inch margins, 6pt frame padding, collapsed space before/after).
+"""
+
+from functools import lru_cache
+from typing import Any, List, NamedTuple
+
+try:
+    from reportlab import rl_config
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch
+    from reportlab.lib.colors import toColor
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    from reportlab.pdfgen import canvas as rl_canvas
+    REPORTLAB_AVAILABLE = True
+except ImportError:
+    REPORTLAB_AVAILABLE = False
+
+
+# SimpleDocTemplate defaults: 1 inch margins and a frame with 6pt padding
+FRAME_PADDING = 6
+_FUZZ = 1e-6
+
+
+class TextStyle(NamedTuple):
+    """Flattened paragraph style used by the canvas renderer."""
+    font_name: str
+    font_size: float
+    leading: float
+    space_before: float
+    space_after: float
+    color: Any
+    centered: bool = False
+
+    @classmethod
+    def from_paragraph_style(cls, style) -> "TextStyle":
+        """Build a TextStyle from a ReportLab ParagraphStyle."""
+        return cls(
+            font_name=style.fontName,
+            font_size=style.fontSize,
+            leading=style.leading,
+            space_before=style.spaceBefore,
+            space_after=style.spaceAfter,
+            color=toColor(style.textColor),
+            centered=style.alignment == 1,  # TA_CENTER
+        )
+
+
+@lru_cache(maxsize=16384)
+def _word_width(word: str, font_name: str, font_size: float) -> float:
+    """Width of a single word, cached across documents."""
+    return stringWidth(word, font_name, font_size)
+
+
+@lru_cache(maxsize=4096)
+def wrap_text(text: str, font_name: str, font_size: float, max_width: float) -> tuple:
+    """
+    Wrap text into lines the way a single-font Paragraph does.
+
+    Explicit newlines force a break, runs of whitespace collapse to a single
+    space and words are placed greedily, with the same space shrinkage
+    allowance ReportLab uses.
+
+    Args:
+        text: Raw (unescaped) text
+        font_name: Font used for measuring
+        font_size: Font size in points
+        max_width: Available line width
+
+    Returns:
+        Tuple of (line_text, line_width) pairs
+    """
+    if not text:
+        return ()
+
+    space_width = _word_width(" ", font_name, font_size)
+    # Paragraph lets inter-word spaces shrink slightly before breaking a line
+    shrink = rl_config.spaceShrinkage * space_width
+    lines = []
+    for raw_line in text.split("\n"):
+        words = raw_line.split()
+        if not words:
+            lines.append(("", 0.0))
+            continue
+
+        current = [words[0]]
+        current_width = _word_width(words[0], font_name, font_size)
+        for word in words[1:]:
+            width = _word_width(word, font_name, font_size)
+            if current_width + space_width + width > max_width + shrink * len(current):
+                lines.append((" ".join(current), current_width))
+                current = [word]
+                current_width = width
+            else:
+                current.append(word)
+                current_width += space_width + width
+        lines.append((" ".join(current), current_width))
+
+    return tuple(lines)
+
+
+class CanvasRenderer:
+    """Draw a linear sequence of paragraphs, spacers and page breaks."""
+
+    def __init__(self, filename: str, pagesize=None):
+        """
+        Open a canvas for writing.
+
+        Args:
+            filename: Output PDF filename
+            pagesize: Page size tuple, defaults to A4
+        """
+        if not REPORTLAB_AVAILABLE:
+            raise ImportError(
+                "ReportLab is required for PDF generation. "
+                "Install it with: pip install reportlab"
+            )
+
+        self.pagesize = pagesize or A4
+        self.canvas = rl_canvas.Canvas(filename, pagesize=self.pagesize)
+
+        page_width, page_height = self.pagesize
+        self.left = inch + FRAME_PADDING
+        self.width = page_width - 2 * inch - 2 * FRAME_PADDING
+        self.top = page_height - inch - FRAME_PADDING
+        self.bottom = inch + FRAME_PADDING
+
+        self._y = self.top
+        self._at_top = True
+        self._prev_space_after = 0
+
+    def _new_page(self):
+        """Finish the current page and reset the cursor."""
+        self.canvas.showPage()
+        self._y = self.top
+        self._at_top = True
+        self._prev_space_after = 0
+
+    def _space_before(self, space_before: float) -> float:
+        if self._at_top:
+            return 0
+        return max(space_before - self._prev_space_after, 0)
+
+    def paragraph(self, text: str, style: TextStyle):
+        """Draw a paragraph, splitting it across pages when needed."""
+        lines = wrap_text(text, style.font_name, style.font_size, self.width)
+        leading = style.leading
+        space = self._space_before(style.space_before)
+
+        while lines:
+            available = self._y - self.bottom - space
+            fit = int((available + _FUZZ) // leading) if available > 0 else 0
+            # Platypus never leaves a single orphan line at the bottom of a
+            # frame (allowOrphans=0); the whole paragraph moves on instead
+            if fit < len(lines) and fit < 2:
+                if self._at_top:
+                    fit = max(fit, 1)
+                else:
+                    self._new_page()
+                    space = 0
+                    continue
+
+            chunk, lines = lines[:fit], lines[fit:]
+            self._draw_lines(chunk, style, self._y - space)
+            self._y -= space + len(chunk) * leading
+            self._at_top = False
+            if lines:
+                self._new_page()
+                space = 0
+
+        self._y -= style.space_after
+        self._prev_space_after = style.space_after
+
+    def _draw_lines(self, lines: tuple, style: TextStyle, top: float):
+        c = self.canvas
+        c.setFillColor(style.color)
+        if style.centered:
+            c.setFont(style.font_name, style.font_size)
+            y = top - style.font_size
+            for line, width in lines:
+                c.drawString(self.left + (self.width - width) / 2.0, y, line)
+                y -= style.leading
+            return
+
+        text_obj = c.beginText(self.left, top - style.font_size)
+        text_obj.setFont(style.font_name, style.font_size, style.leading)
+        for line, _ in lines:
+            text_obj.textLine(line)
+        c.drawText(text_obj)
+
+    def spacer(self, height: float):
+        """Leave vertical space."""
+        if self._y - height < self.bottom - _FUZZ:
+            self._new_page()
+        self._y -= height
+        self._at_top = False
+        self._prev_space_after = 0
+
+    def page_break(self):
+        """Start a new page."""
+        self._new_page()
+
+    def save(self):
+        """Write the PDF file."""
+        self.canvas.save()
+
+
+def text_styles(styles, names: List[str]) -> dict:
+    """Convert named ParagraphStyles from a stylesheet to TextStyles."""
+    return {name: TextStyle.from_paragraph_style(styles[name]) for name in names}
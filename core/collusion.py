@@ -0,0 +1,286 @@
+# core/collusion.py
+
+"""
+Collusion detection: suspiciously similar free-text answers between students.
+
+Comparing every pair of students with fuzz is O(N^2) per question. Instead,
+each answer is normalized like the evaluator does (evaluator.normalize_answer),
+cut into character shingles and summarized by a MinHash signature. LSH
+banding puts answers whose signatures agree on a whole band into the same
+bucket, so only answers sharing a bucket become candidate pairs (near-linear
+time). Candidates are then confirmed: their signatures must estimate a
+shingle Jaccard similarity of at least MIN_JACCARD (this drops chance bucket
+collisions, which WRatio alone can score high when one answer shares a few
+words with a much longer one) and the evaluator's fuzzy scorer
+(evaluator.text_similarity) must reach the threshold.
+
+Answers that are too short, that contain only a key element (a number, a
+list, yes/no) or that are close to the correct answer are expected to be
+alike and are not compared.
+
+Usage:
+    pairs = find_similar_answers([("ana", text_1), ("dan", text_2), ...], correct_answer=key)
+    report = collusion_report(submissions)    # submissions as read by `grade`
+
+NumPy speeds up signature computation when installed; it is not required.
+"""
+
+import random
+import re
+import zlib
+from collections import defaultdict
+from typing import Any, Dict, Hashable, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from . import instrumentation
+from .evaluator import is_bare_answer, normalize_answer, text_similarity
+
+try:
+    import numpy
+    NUMPY_AVAILABLE = True
+except ImportError:
+    numpy = None
+    NUMPY_AVAILABLE = False
+
+
+SHINGLE_SIZE = 5
+NUM_BANDS = 16
+ROWS_PER_BAND = 4          # 64 hash functions; pairs above ~50% Jaccard become candidates
+DEFAULT_THRESHOLD = 85     # fuzzy score confirming a candidate pair
+MIN_JACCARD = 0.5          # estimated shingle overlap confirming a candidate pair
+MIN_ANSWER_CHARS = 20
+KEY_SIMILARITY_CUTOFF = 90  # answers this close to the correct answer are not suspicious
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+class SimilarPair(NamedTuple):
+    """Two students with suspiciously similar answers to one question."""
+    student_a: Hashable
+    student_b: Hashable
+    similarity: int         # fuzzy score, 0-100
+    answer_a: str
+    answer_b: str
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> List[int]:
+    """Hashes of the character shingles of a normalized text."""
+    text = _WHITESPACE_RE.sub(" ", text)
+    if len(text) <= size:
+        return [zlib.crc32(text.encode("utf-8"))]
+    return list({zlib.crc32(text[i:i + size].encode("utf-8")) for i in range(len(text) - size + 1)})
+
+
+class MinHasher:
+    """MinHash signatures with universal hashing (a*x + b) mod p."""
+
+    def __init__(self, num_perm: int = NUM_BANDS * ROWS_PER_BAND, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._a = [rng.randrange(1, _MERSENNE_PRIME) for _ in range(num_perm)]
+        self._b = [rng.randrange(0, _MERSENNE_PRIME) for _ in range(num_perm)]
+        if NUMPY_AVAILABLE:
+            self._a_array = numpy.array(self._a, dtype=numpy.int64)[:, None]
+            self._b_array = numpy.array(self._b, dtype=numpy.int64)[:, None]
+
+    def signature(self, shingle_hashes: Sequence[int]) -> Tuple[int, ...]:
+        """MinHash signature of a set of shingle hashes (same result with or without NumPy)."""
+        values = [h % _MERSENNE_PRIME for h in shingle_hashes]
+        if NUMPY_AVAILABLE:
+            x = numpy.array(values, dtype=numpy.int64)[None, :]
+            return tuple(((self._a_array * x + self._b_array) % _MERSENNE_PRIME).min(axis=1).tolist())
+        return tuple(
+            min((a * x + b) % _MERSENNE_PRIME for x in values)
+            for a, b in zip(self._a, self._b)
+        )
+
+
+_default_hasher = None
+
+
+def _hasher() -> MinHasher:
+    global _default_hasher
+    if _default_hasher is None:
+        _default_hasher = MinHasher()
+    return _default_hasher
+
+
+def _comparable(clean: str, clean_correct: Optional[str], min_chars: int) -> bool:
+    """Whether an answer is free text that is worth comparing between students."""
+    if len(clean) < min_chars or is_bare_answer(clean):
+        return False
+    if clean_correct and text_similarity(clean_correct, clean) >= KEY_SIMILARITY_CUTOFF:
+        return False
+    return True
+
+
+def find_similar_answers(
+    answers: Iterable[Tuple[Hashable, str]],
+    correct_answer: Optional[str] = None,
+    threshold: int = DEFAULT_THRESHOLD,
+    min_chars: int = MIN_ANSWER_CHARS,
+    bands: int = NUM_BANDS,
+    rows: int = ROWS_PER_BAND
+) -> List[SimilarPair]:
+    """
+    Find pairs of students with near-identical answers to the same question.
+
+    Args:
+        answers: (student, answer text) pairs for one question
+        correct_answer: Answer key; answers close to it are ignored
+        threshold: Fuzzy score (0-100) needed to confirm a candidate pair
+        min_chars: Shorter normalized answers are ignored
+        bands: LSH bands
+        rows: Signature rows per band (bands * rows hash functions)
+
+    Returns:
+        Confirmed pairs of different students, most similar first
+    """
+    hasher = _hasher() if bands * rows == NUM_BANDS * ROWS_PER_BAND else MinHasher(bands * rows)
+    clean_correct = normalize_answer(correct_answer) if correct_answer else None
+
+    # Students with the same normalized text share one signature
+    students_by_text: Dict[str, List[Hashable]] = defaultdict(list)
+    originals: Dict[Tuple[Hashable, str], str] = {}
+    for student, text in answers:
+        clean = normalize_answer(text or "")
+        originals[(student, clean)] = text
+        students_by_text[clean].append(student)
+
+    texts = [clean for clean in students_by_text if _comparable(clean, clean_correct, min_chars)]
+
+    # LSH: texts agreeing on a whole band land in the same bucket
+    buckets: Dict[Tuple, List[int]] = defaultdict(list)
+    signatures = []
+    with instrumentation.stage("collusion.minhash"):
+        for index, clean in enumerate(texts):
+            signature = hasher.signature(shingles(clean))
+            signatures.append(signature)
+            for band in range(bands):
+                buckets[(band,) + signature[band * rows:(band + 1) * rows]].append(index)
+
+    candidates = set()
+    for members in buckets.values():
+        for i in range(len(members)):
+            for j in range(i + 1, len(members)):
+                candidates.add((members[i], members[j]))
+    instrumentation.count("collusion.candidates", len(candidates))
+
+    # Most similar pair of answers of every two students (a student may have
+    # answered more than once; those answers are not compared with each other)
+    best: Dict[frozenset, SimilarPair] = {}
+
+    def add_pairs(text_a: str, text_b: Optional[str], similarity: int):
+        group_a = students_by_text[text_a]
+        if text_b is None:
+            text_b = text_a
+            student_pairs = [(a, b) for i, a in enumerate(group_a) for b in group_a[i + 1:]]
+        else:
+            student_pairs = [(a, b) for a in group_a for b in students_by_text[text_b]]
+        for a, b in student_pairs:
+            if a == b:
+                continue
+            key = frozenset((a, b))
+            if key not in best or best[key].similarity < similarity:
+                best[key] = SimilarPair(a, b, similarity, originals[(a, text_a)], originals[(b, text_b)])
+
+    # Identical answers need no confirmation
+    for clean in texts:
+        if len(students_by_text[clean]) > 1:
+            add_pairs(clean, None, 100)
+
+    with instrumentation.stage("collusion.confirm"):
+        for i, j in candidates:
+            agreement = sum(1 for x, y in zip(signatures[i], signatures[j]) if x == y) / hasher.num_perm
+            if agreement < MIN_JACCARD:
+                continue
+            similarity = text_similarity(texts[i], texts[j])
+            if similarity >= threshold:
+                add_pairs(texts[i], texts[j], similarity)
+
+    return sorted(best.values(), key=lambda pair: -pair.similarity)
+
+
+def _submission_questions(
+    submission: Mapping[str, Any],
+    tests: Dict[str, Any]
+) -> List[Tuple[str, str, str, str]]:
+    """
+    (question key, topic, correct answer, student answer) of each answered question.
+
+    Args:
+        submission: One submission
+        tests: Saved tests opened so far, by path (submissions to a saved
+            test read their questions and answer keys from it)
+    """
+    if "test" in submission:
+        from .test_format import TestFile, submission_answer_keys
+
+        path = submission["test"]
+        if path not in tests:
+            tests[path] = TestFile(path)
+        questions, correct_answers, given_answers = submission_answer_keys(
+            tests[path], submission.get("user_answers", []))
+        return [
+            (question.get("question") or f"#{question.get('id', index)}", question.get("topic", ""), correct, given)
+            for index, (question, correct, given) in enumerate(zip(questions, correct_answers, given_answers), 1)
+        ]
+    if "items" in submission:
+        return [
+            (item.get("question") or f"#{index}", item.get("topic", ""),
+             item.get("correct_answer", ""), item.get("user_answer", ""))
+            for index, item in enumerate(submission["items"], 1)
+        ]
+    return [
+        (question.get("question") or f"#{index}", question.get("topic", ""), correct, given)
+        for index, (question, correct, given) in enumerate(
+            zip(submission.get("questions", []), submission.get("answers", []), submission.get("user_answers", [])), 1)
+    ]
+
+
+def collusion_report(
+    submissions: Iterable[Mapping[str, Any]],
+    threshold: int = DEFAULT_THRESHOLD,
+    min_chars: int = MIN_ANSWER_CHARS
+) -> List[Dict[str, Any]]:
+    """
+    Compare the answers of a whole class, question by question.
+
+    Submissions have the shapes accepted by `grade` ({"items": [...]}, a
+    `generate` line with "user_answers" or {"test": path, "user_answers":
+    ...} for a saved test); students are identified by their "student" or
+    "id" field, else by position. Answers belong to the same question when
+    the question texts match (or, without question texts, by position in the
+    test). Two submissions of the same student are not compared.
+
+    Raises:
+        ValueError: If a saved test cannot be read or does not match its answers
+
+    Returns:
+        One entry per suspicious pair: question, topic, students, similarity
+        and both answers, most similar first
+    """
+    by_question: Dict[str, Dict[str, Any]] = {}
+    tests: Dict[str, Any] = {}
+    try:
+        for position, submission in enumerate(submissions, 1):
+            student = submission.get("student", submission.get("id", position))
+            for key, topic, correct, given in _submission_questions(submission, tests):
+                entry = by_question.setdefault(key, {"topic": topic, "correct": correct, "answers": []})
+                entry["answers"].append((student, given))
+    finally:
+        for test in tests.values():
+            test.close()
+
+    report = []
+    for key, entry in by_question.items():
+        for pair in find_similar_answers(entry["answers"], entry["correct"], threshold, min_chars):
+            report.append({
+                "question": key,
+                "topic": entry["topic"],
+                "students": [pair.student_a, pair.student_b],
+                "similarity": pair.similarity,
+                "answers": [pair.answer_a, pair.answer_b],
+            })
+    report.sort(key=lambda row: -row["similarity"])
+    return report
@@ -1,73 +1,187 @@
 # core/evaluator.py
 
-from fuzzywuzzy import fuzz
 from unidecode import unidecode
 import re
-from typing import List, Optional
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from . import instrumentation
+from .lazy_import import lazy_module
+from .tfidf import tfidf_for_topic
+from .topic_catalog import catalog
+
+# fuzzywuzzy (și python-Levenshtein) se încarcă doar la prima evaluare
+fuzz = lazy_module("fuzzywuzzy.fuzz")
+
+
+# --- Extragere caracteristici (toate regex-urile sunt compilate o singură dată, la import) ---
+
+# Liste [...] sau tupluri (...)
+_STRUCT_RE = re.compile(r'[\[\(].*?[\]\)]')
+_NUMBER_RE = re.compile(r'-?\d+(\.\d+)?')
+_DIGIT_RE = re.compile(r'\d')
+
+# Numele problemelor (n-queens, 8-queens etc.) nu sunt răspunsuri numerice
+_PROBLEM_NAME_RES = tuple(re.compile(p) for p in (
+    r'\d+-queens?',
+    r'\d+-colou?ring',
+    r'\d+-knights?',
+    r'n-queens?',
+    r'k-colou?r',
+))
+
+# Modele specifice pentru răspunsuri numerice (contează doar dacă oricare se potrivește)
+_NUMERIC_CONTEXT_RE = re.compile('|'.join('(?:%s)' % p for p in (
+    r'there\s+(are|is)\s+\d+',
+    r'\d+\s+(solutions?|moves?|steps?|colors?|ways?)',
+    r'answer\s+is\s+\d+',
+    r'exactly\s+\d+',
+    r'total\s+(of\s+)?\d+',
+    r'num[ăa]r(ul)?(\s+de)?\s+.*\s+\d+',
+    r'minimum\s+(of\s+)?\d+',
+    r'requires?\s+\d+',
+    r'valoare(a)?\s+.*\s+\d+',  # Specific Minimax
+    r'noduri\s+.*\s+\d+',  # Specific Minimax
+)))
+
+# Modele prioritare pentru numărul relevant (în ordinea priorității)
+_PRIORITY_NUMBER_RES = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'(?:minim|minimum|necesit[aă]|require[sd]?|need[sd]?)\s+(-?\d+(?:\.\d+)?)',
+    r'(?:exact|exactly|precisely)\s+(-?\d+(?:\.\d+)?)',
+    r'(?:răspuns|answer|result|solu[tț]ie|valoare|value)[^\d]*(-?\d+(?:\.\d+)?)',
+    r'(?:num[ăa]r|number|count)[^\d]*(-?\d+(?:\.\d+)?)',
+    r'(?:este|is|are|:)\s+(-?\d+(?:\.\d+)?)',
+))
+
+# "Nu" are prioritate față de "Da"
+_NO_RE = re.compile(r'\bnu\b|\bno\b|\bnegativ|\bfalse\b')
+_YES_RE = re.compile(r'\bda\b|\byes\b|\bpozitiv|\btrue\b')
+
+# Un text normalizat pe care WRatio nu îl reduce la nimic conține litere sau cifre
+_ALNUM_RE = re.compile(r'[a-z0-9]')
+
+# Ce rămâne dintr-un răspuns "gol" (doar număr / structură / da-nu) după eliminarea elementului cheie
+_BARE_FILLER_RE = re.compile(r'-?\d+(?:\.\d+)?|\b(?:nu|no|da|yes)\b|[\s.,;:!?()\[\]-]+')
+
+
+class AnswerFeatures(NamedTuple):
+    """Tot ce folosește evaluate_answer dintr-un text, extras într-o singură trecere."""
+    structure: str                 # prima listă/tuplu, "" dacă nu există
+    number: str                    # cel mai relevant număr, "" dacă nu există
+    yes_no: Optional[str]          # 'yes', 'no' sau None
+    is_numeric: bool               # răspunsul este în principal numeric
+    problem_names: Tuple[str, ...]  # ex. "8-queens", "k-color"
+
+
+def _split_structures(text: str) -> Tuple[str, str]:
+    """Returnează (prima structură, textul fără structuri) dintr-o singură scanare."""
+    first = ""
+    parts = []
+    position = 0
+    for match in _STRUCT_RE.finditer(text):
+        if not first:
+            first = match.group(0).strip()
+        parts.append(text[position:match.start()])
+        position = match.end()
+    if not parts:
+        return first, text
+    parts.append(text[position:])
+    return first, "".join(parts)
+
+
+def _is_numeric(text_without_structs: str, problem_names: Tuple[str, ...]) -> bool:
+    if not _NUMBER_RE.search(text_without_structs):
+        return False
 
+    if problem_names:
+        for pattern in _PROBLEM_NAME_RES:
+            if pattern.search(text_without_structs):
+                # Verifică dacă mai există ALT număr care să fie răspunsul
+                if not _DIGIT_RE.search(pattern.sub('', text_without_structs)):
+                    return False
 
-def extract_structured_data(text: str) -> str:
-    """
-    Extrage structuri de date precum liste [...] sau tupluri (...)
-    Vital pentru N-Queens (liste) și Nash Equilibrium (tupluri).
-    """
-    # Caută formatul [...] sau (...)
-    match = re.search(r'([\[\(].*?[\]\)])', text)
-    return match.group(1).strip() if match else ""
+    # Dacă numărul este singurul conținut semnificativ
+    words = text_without_structs.lower().split()
+    if len(words) <= 3 and any(char.isdigit() for word in words for char in word):
+        return True
 
+    return _NUMERIC_CONTEXT_RE.search(text_without_structs) is not None
 
-def is_primarily_numeric_answer(text: str) -> bool:
+
+def _relevant_number(text_without_structs: str) -> str:
+    for pattern in _PRIORITY_NUMBER_RES:
+        match = pattern.search(text_without_structs)
+        if match:
+            return match.group(1)
+
+    # Fallback: primul număr găsit (inclusiv negativ)
+    match = _NUMBER_RE.search(text_without_structs)
+    return match.group(0) if match else ""
+
+
+def _yes_no(text: str) -> Optional[str]:
+    text_clean = text.lower().strip()
+    if _NO_RE.search(text_clean):
+        return 'no'
+    if _YES_RE.search(text_clean):
+        return 'yes'
+    return None
+
+
+@lru_cache(maxsize=4096)
+def extract_answer_features(text: str) -> AnswerFeatures:
     """
-    Determină dacă răspunsul este în principal numeric.
+    Extrage toate caracteristicile unui răspuns (structuri, numere, da/nu,
+    nume de probleme) cu o singură eliminare a structurilor.
+
+    Rezultatul este memorat: răspunsurile corecte se repetă între studenți.
     """
-    # Elimină structurile complexe mai întâi
-    text_without_structs = re.sub(r'[\[\(].*?[\]\)]', '', text)
+    structure, text_without_structs = _split_structures(text)
+
+    if _DIGIT_RE.search(text_without_structs):
+        problem_names = tuple(
+            match.group(0)
+            for pattern in _PROBLEM_NAME_RES
+            for match in pattern.finditer(text_without_structs)
+        )
+        number = _relevant_number(text_without_structs)
+        is_numeric = _is_numeric(text_without_structs, problem_names)
+    else:
+        # Fără cifre nu există număr; doar "n-queens"/"k-color" pot apărea
+        problem_names = tuple(
+            match.group(0)
+            for pattern in _PROBLEM_NAME_RES[3:]
+            for match in pattern.finditer(text_without_structs)
+        )
+        number = ""
+        is_numeric = False
 
-    # Caută numere (inclusiv negative și float)
-    num_match = re.search(r'-?\d+(\.\d+)?', text_without_structs)
-    if not num_match:
-        return False
+    return AnswerFeatures(structure, number, _yes_no(text), is_numeric, problem_names)
 
-    # Exclude numele problemelor (n-queens, 8-queens etc.)
-    problem_name_patterns = [
-        r'\d+-queens?',
-        r'\d+-colou?ring',
-        r'\d+-knights?',
-        r'n-queens?',
-        r'k-colou?r',
-    ]
 
-    for pattern in problem_name_patterns:
-        if re.search(pattern, text_without_structs):
-            # Verifică dacă mai există ALT număr care să fie răspunsul
-            temp_text = re.sub(pattern, '', text_without_structs)
-            if not re.search(r'-?\d+', temp_text):
-                return False
+def is_bare_answer(text: str) -> bool:
+    """
+    Răspunsul conține doar elementul cheie (ex. "92", "[1, 3, 0, 2]", "Nu, 4").
 
-    # Dacă numărul este singurul conținut semnificativ
-    words = text_without_structs.lower().split()
-    if len(words) <= 3 and any(char.isdigit() for word in words for char in word):
-        return True
+    Nu face parte din extract_answer_features: evaluarea nu îl folosește.
+    """
+    _, text_without_structs = _split_structures(text)
+    return bool(text.strip()) and not _BARE_FILLER_RE.sub('', text_without_structs)
 
-    # Modele specifice pentru răspunsuri numerice
-    numeric_patterns = [
-        r'there\s+(are|is)\s+\d+',
-        r'\d+\s+(solutions?|moves?|steps?|colors?|ways?)',
-        r'answer\s+is\s+\d+',
-        r'exactly\s+\d+',
-        r'total\s+(of\s+)?\d+',
-        r'num[ăa]r(ul)?(\s+de)?\s+.*\s+\d+',
-        r'minimum\s+(of\s+)?\d+',
-        r'requires?\s+\d+',
-        r'valoare(a)?\s+.*\s+\d+',  # Specific Minimax
-        r'noduri\s+.*\s+\d+',  # Specific Minimax
-    ]
 
-    for pattern in numeric_patterns:
-        if re.search(pattern, text_without_structs):
-            return True
+def extract_structured_data(text: str) -> str:
+    """
+    Extrage structuri de date precum liste [...] sau tupluri (...)
+    Vital pentru N-Queens (liste) și Nash Equilibrium (tupluri).
+    """
+    return extract_answer_features(text).structure
+
 
-    return False
+def is_primarily_numeric_answer(text: str) -> bool:
+    """
+    Determină dacă răspunsul este în principal numeric.
+    """
+    return extract_answer_features(text).is_numeric
 
 
 def extract_standalone_number(text: str) -> str:
@@ -75,52 +189,35 @@ def extract_standalone_number(text: str) -> str:
     Extrage cel mai relevant număr din text.
     Suportă acum numere negative și zecimale.
     """
-    # Ignorăm numerele din interiorul listelor/tuplurilor
-    text_without_structs = re.sub(r'[\[\(].*?[\]\)]', '', text)
-
-    # Modele prioritare
-    priority_patterns = [
-        r'(?:minim|minimum|necesit[aă]|require[sd]?|need[sd]?)\s+(-?\d+(?:\.\d+)?)',
-        r'(?:exact|exactly|precisely)\s+(-?\d+(?:\.\d+)?)',
-        r'(?:răspuns|answer|result|solu[tț]ie|valoare|value)[^\d]*(-?\d+(?:\.\d+)?)',
-        r'(?:num[ăa]r|number|count)[^\d]*(-?\d+(?:\.\d+)?)',
-        r'(?:este|is|are|:)\s+(-?\d+(?:\.\d+)?)',
-    ]
-
-    for pattern in priority_patterns:
-        match = re.search(pattern, text_without_structs, re.IGNORECASE)
-        if match:
-            return match.group(1)
-
-    # Fallback: primul număr găsit (inclusiv negativ)
-    match = re.search(r'-?\d+(\.\d+)?', text_without_structs)
-    return match.group(0) if match else ""
+    return extract_answer_features(text).number
 
 
 def extract_yes_no_response(text: str) -> Optional[str]:
     """Extrage răspuns Da/Nu."""
-    text_clean = text.lower().strip()
+    return extract_answer_features(text).yes_no
 
-    no_patterns = [r'\bnu\b', r'\bno\b', r'\bnegativ', r'\bfalse\b']
-    for pattern in no_patterns:
-        if re.search(pattern, text_clean): return 'no'
 
-    yes_patterns = [r'\bda\b', r'\byes\b', r'\bpozitiv', r'\btrue\b']
-    for pattern in yes_patterns:
-        if re.search(pattern, text_clean): return 'yes'
+@lru_cache(maxsize=1024)
+def _compile_keyword(keyword: str):
+    """
+    Normalizează și compilează un keyword (o singură dată per proces).
 
-    return None
+    Returns:
+        Tuple (keyword normalizat, regex compilat)
+    """
+    norm_keyword = unidecode(keyword.lower().strip())
+    # Folosim word boundary (\b) pentru potrivire exactă, sau potrivire parțială relaxată
+    # Dacă keyword-ul are mai multe cuvinte (ex: "alpha beta"), permitem spații flexibile
+    pattern = re.escape(norm_keyword).replace(r'\ ', r'\s+')
+    return norm_keyword, re.compile(pattern, re.IGNORECASE)
 
 
 def extract_keywords_from_text(text: str, keywords: List[str]) -> List[str]:
     """Extrage keywords prezenți în text."""
     found = []
     for keyword in keywords:
-        norm_keyword = unidecode(keyword.lower().strip())
-        # Folosim word boundary (\b) pentru potrivire exactă, sau potrivire parțială relaxată
-        # Dacă keyword-ul are mai multe cuvinte (ex: "alpha beta"), permitem spații flexibile
-        pattern = re.escape(norm_keyword).replace(r'\ ', r'\s+')
-        if re.search(pattern, text, re.IGNORECASE):
+        norm_keyword, matcher = _compile_keyword(keyword)
+        if matcher.search(text):
             found.append(norm_keyword)
     return found
 
@@ -133,114 +230,347 @@ KEYWORD_WRONG_PENALTY_EACH = 10  # Redus de la 20 (pentru a nu depuncta drastic
 KEYWORD_WRONG_PENALTY_MAX = 30  # Redus de la 40
 
 
-def evaluate_keyword_match(correct_answer: str, user_answer: str, keywords: List[str]) -> int:
-    if not keywords:
-        return 0
+# Ponderile combinării componentelor (calibrate manual)
+SCORING_WEIGHTS = {
+    "yes_no": 0.5,             # Caz Da/Nu + număr
+    "yes_no_number": 0.4,
+    "yes_no_text": 0.1,
+    "key_element": 0.8,        # Structura/Numărul contează 80% (crescut de la 70%)
+    "key_text": 0.2,
+    "keyword": KEYWORD_MATCH_WEIGHT,
+    "keyword_text": TEXT_SIMILARITY_WEIGHT,
+    "tfidf": 0.0,              # Similaritate TF-IDF pe răspunsurile textuale (0 = dezactivată)
+}
 
-    clean_correct = unidecode(correct_answer.lower().strip())
-    clean_user = unidecode(user_answer.lower().strip())
+# Similaritatea fuzzy se calculează pe cel mult atâtea caractere din fiecare text
+# (None = fără limită). Costul WRatio crește cu pătratul lungimii (~0.25 ms la
+# 1000 de caractere, ~23 ms la 20000); cele mai lungi răspunsuri corecte din
+# template-uri au sub 250 de caractere, deci limita schimbă doar scorul
+# răspunsurilor de peste 1000 de caractere
+FUZZY_MAX_CHARS = 1000
 
-    correct_keywords = extract_keywords_from_text(clean_correct, keywords)
-    user_keywords = extract_keywords_from_text(clean_user, keywords)
+# Se incrementează la orice schimbare a modului de calcul al componentelor
+# (invalidează componentele salvate pentru re-evaluarea incrementală)
+COMPONENTS_VERSION = 2
+
+
+class EvaluationResult(NamedTuple):
+    """Scorul unui răspuns împreună cu traseul deciziilor (pentru audit)."""
+    score: int
+    path: str                           # yes_no_number, structured, numeric, text_keywords, text, empty
+    components: Dict[str, Optional[int]]  # scorurile parțiale (0-100)
+    decisions: Tuple[str, ...]          # deciziile luate, în ordine
 
-    if not correct_keywords:
-        return 0
+
+def normalize_answer(text: str) -> str:
+    """Normalizarea folosită la evaluare: litere mici, fără diacritice, fără spații la capete."""
+    return unidecode(text.lower().strip())
+
+
+def keyword_match_counts(clean_correct: str, clean_user: str, keywords: List[str]) -> Tuple[int, int, int, int]:
+    """
+    Numără keywords-urile din răspunsul corect și din cel al utilizatorului.
+
+    Args:
+        clean_correct: Răspunsul corect normalizat
+        clean_user: Răspunsul utilizatorului normalizat
+        keywords: Keywords-urile topicului
+
+    Returns:
+        Tuple (în răspunsul corect, potrivite, lipsă, greșite)
+    """
+    with instrumentation.stage("evaluate.keywords"):
+        correct_keywords = extract_keywords_from_text(clean_correct, keywords)
+        user_keywords = extract_keywords_from_text(clean_user, keywords)
 
     matched_keywords = set(correct_keywords) & set(user_keywords)
     missed_keywords = set(correct_keywords) - set(user_keywords)
     wrong_keywords = set(user_keywords) - set(correct_keywords)
+    return len(correct_keywords), len(matched_keywords), len(missed_keywords), len(wrong_keywords)
+
 
-    match_score = len(matched_keywords) / len(correct_keywords) * 100
-    miss_penalty = len(missed_keywords) / len(correct_keywords) * KEYWORD_MISS_PENALTY_PERCENT
+def _keyword_score(clean_correct: str, clean_user: str, keywords: List[str]) -> int:
+    total, matched, missed, wrong = keyword_match_counts(clean_correct, clean_user, keywords)
+
+    if not total:
+        return 0
+
+    match_score = matched / total * 100
+    miss_penalty = missed / total * KEYWORD_MISS_PENALTY_PERCENT
     # Penalizare mai mică pentru cuvinte greșite (posibil sinonime neidentificate)
-    wrong_penalty = min(len(wrong_keywords) * KEYWORD_WRONG_PENALTY_EACH, KEYWORD_WRONG_PENALTY_MAX)
+    wrong_penalty = min(wrong * KEYWORD_WRONG_PENALTY_EACH, KEYWORD_WRONG_PENALTY_MAX)
 
     final_score = match_score - miss_penalty - wrong_penalty
     return max(0, min(100, int(final_score)))
 
 
-def evaluate_answer(correct_answer: str, user_answer: str, keywords: Optional[List[str]] = None) -> int:
-    if not user_answer:
+def evaluate_keyword_match(correct_answer: str, user_answer: str, keywords: List[str]) -> int:
+    if not keywords:
         return 0
 
-    clean_correct = unidecode(correct_answer.lower().strip())
-    clean_user = unidecode(user_answer.lower().strip())
+    clean_correct = normalize_answer(correct_answer)
+    clean_user = normalize_answer(user_answer)
+    return _keyword_score(clean_correct, clean_user, keywords)
+
+
+def text_similarity(clean_correct: str, clean_user: str) -> int:
+    """Similaritate fuzzy la nivel de caractere (cel mai scump pas al evaluării)."""
+    with instrumentation.stage("evaluate.fuzzy"):
+        return fuzz.WRatio(clean_correct[:FUZZY_MAX_CHARS], clean_user[:FUZZY_MAX_CHARS])
 
-    # 1. Extragere structuri (Liste SAU Tupluri)
-    correct_struct = extract_structured_data(clean_correct)
-    user_struct = extract_structured_data(clean_user)
 
-    # 2. Extragere Numere (suport extins)
-    correct_num = extract_standalone_number(clean_correct)
-    user_num = extract_standalone_number(clean_user)
+# Procesarea textelor din fuzzywuzzy (utils.full_process): tot ce nu e literă sau cifră devine spațiu
+_FUZZ_NON_WORD_RE = re.compile(r'(?ui)\W')
+
+
+def _fuzz_process(text: str) -> str:
+    return _FUZZ_NON_WORD_RE.sub(' ', text).lower().strip()
+
+
+def _contained_key_similarity(clean_correct: str, clean_user: str, user_key: str) -> Optional[int]:
+    """
+    Similaritatea fuzzy a unui răspuns format doar din elementul cheie,
+    conținut întocmai în răspunsul corect (ex. "7" pentru "... mutari este 7").
+
+    Pentru un text conținut în celălalt, WRatio dă potrivirea parțială (100)
+    scalată după raportul lungimilor: 90 sub 8x, 60 de la 8x. Comparația
+    întreagă nu poate depăși 80 (lungimi în raport de cel puțin 1.5), iar
+    variantele pe tokeni sunt înmulțite cu 0.95, deci rezultatul este exact
+    cel al WRatio.
+
+    Returns:
+        Similaritatea (0-100) sau None când scurtătura nu se aplică
+    """
+    if FUZZY_MAX_CHARS is not None and max(len(clean_correct), len(clean_user)) > FUZZY_MAX_CHARS:
+        return None
+    processed_user = _fuzz_process(clean_user)
+    if not processed_user or processed_user != _fuzz_process(user_key):
+        return None
+    processed_correct = _fuzz_process(clean_correct)
+    if processed_user not in processed_correct:
+        return None
+    length_ratio = len(processed_correct) / len(processed_user)
+    if length_ratio < 1.5:
+        return None
+    return 90 if length_ratio < 8 else 60
+
+
+def score_components(
+    correct_answer: str,
+    user_answer: str,
+    keywords: Optional[List[str]] = None,
+    topic: Optional[str] = None
+) -> Tuple[str, Dict[str, Optional[int]], Tuple[str, ...]]:
+    """
+    Calculează componentele scorului în trei niveluri:
+
+    1. decizii ieftine pe structură / număr / da-nu (elementul cheie)
+    2. scurtături pentru similaritatea textului, cu exact valoarea pe care ar
+       da-o fuzzy: texte normalizate identice (100); răspuns format doar din
+       elementul cheie corect (structurat / numeric), conținut în răspunsul
+       corect (vezi _contained_key_similarity)
+    3. similaritate fuzzy (pe texte limitate la FUZZY_MAX_CHARS)
+
+    Scurtăturile nu schimbă scorul: dau aceleași componente ca drumul complet.
+
+    Pentru răspunsurile textuale se adaugă și similaritatea TF-IDF a topicului
+    (componenta "tfidf"), când topic este dat și SCORING_WEIGHTS["tfidf"] > 0.
+
+    Returns:
+        Tuple (path, components, decisions); scorul final se obține cu
+        combine_components(path, components)
+    """
+    if not user_answer:
+        return "empty", {}, ("empty_answer",)
 
-    correct_yes_no = extract_yes_no_response(clean_correct)
-    user_yes_no = extract_yes_no_response(clean_user)
+    with instrumentation.stage("evaluate.normalize"):
+        clean_correct = normalize_answer(correct_answer)
+        clean_user = normalize_answer(user_answer)
 
-    is_numeric_answer = is_primarily_numeric_answer(clean_correct)
+    with instrumentation.stage("evaluate.extract"):
+        correct_features = extract_answer_features(clean_correct)
+        user_features = extract_answer_features(clean_user)
 
-    score_key_element = 0
+    correct_struct, user_struct = correct_features.structure, user_features.structure
+    correct_num, user_num = correct_features.number, user_features.number
+    correct_yes_no, user_yes_no = correct_features.yes_no, user_features.yes_no
 
-    # --- Caz SPECIAL: Yes/No + Number (ex: "Nu. Necesită minim 4 culori") ---
+    decisions = []
+    components = {}
+
+    # --- Nivel 1: decizii pe elementul cheie ---
+
+    # Caz SPECIAL: Yes/No + Number (ex: "Nu. Necesită minim 4 culori")
     if correct_yes_no and correct_num:
-        yes_no_score = 100 if correct_yes_no == user_yes_no else 0
+        path = "yes_no_number"
+        components["yes_no"] = 100 if correct_yes_no == user_yes_no else 0
         if correct_num == user_num:
-            num_score = 100
+            components["number"] = 100
         elif user_num:
-            num_score = 50
+            components["number"] = 50
         else:
-            num_score = 0
+            components["number"] = 0
 
-        score_text = fuzz.WRatio(clean_correct, clean_user)
-        final_score = int((yes_no_score * 0.5) + (num_score * 0.4) + (score_text * 0.1))
-        return min(final_score, 100)
-
-    # --- Caz A: Răspuns Structurat (LISTĂ sau TUPLU) ---
-    if correct_struct:
+    # Caz A: Răspuns Structurat (LISTĂ sau TUPLU)
+    elif correct_struct:
+        path = "structured"
         # Dacă e tuplu (paranteze rotunde), ordinea contează mai mult (Nash)
         if '(' in correct_struct:
-            score_key_element = fuzz.ratio(correct_struct, user_struct)
+            components["key"] = fuzz.ratio(correct_struct, user_struct)
         else:
             # Dacă e listă (paranteze pătrate), ordinea contează mai puțin (N-Queens)
-            score_key_element = fuzz.token_sort_ratio(correct_struct, user_struct)
+            components["key"] = fuzz.token_sort_ratio(correct_struct, user_struct)
 
-    # --- Caz B: Răspuns NUMERIC ---
-    elif correct_num and is_numeric_answer:
-        if correct_num == user_num:
-            score_key_element = 100
-        elif user_num:
-            # Număr greșit
-            score_key_element = 0
-        else:
-            score_key_element = 0
+    # Caz B: Răspuns NUMERIC
+    elif correct_num and correct_features.is_numeric:
+        path = "numeric"
+        components["key"] = 100 if correct_num == user_num else 0
 
-    # --- Caz C: Răspuns TEXTUAL ---
+    # Caz C: Răspuns TEXTUAL
     else:
+        path = "text_keywords" if keywords else "text"
         if keywords:
-            score_keywords = evaluate_keyword_match(correct_answer, user_answer, keywords)
-            score_text = fuzz.WRatio(clean_correct, clean_user)
-            final_score = int((score_keywords * KEYWORD_MATCH_WEIGHT) + (score_text * TEXT_SIMILARITY_WEIGHT))
-            return min(final_score, 100)
-        else:
-            score_key_element = 100
+            components["keywords"] = _keyword_score(clean_correct, clean_user, keywords)
+        if topic and SCORING_WEIGHTS.get("tfidf"):
+            components["tfidf"] = tfidf_for_topic(topic).similarity(clean_correct, clean_user)
+            decisions.append("tfidf")
+
+    instrumentation.count(f"evaluate.path.{path}")
+    decisions.append(f"path:{path}")
+
+    # --- Nivel 2: similaritatea textului cunoscută fără fuzzy ---
+    # WRatio dă 100 pentru două texte identice care conțin litere sau cifre
+    # (fără ele textul procesat e gol și WRatio dă 0, deci se calculează)
+    if clean_correct == clean_user and _ALNUM_RE.search(clean_correct):
+        instrumentation.count("evaluate.tier.exact")
+        components["text"] = 100
+        decisions.append("exact_match")
+        return path, components, tuple(decisions)
+
+    # Elementul cheie corect, scris singur
+    if components.get("key") == 100:
+        user_key = user_struct if path == "structured" else user_num
+        similarity = _contained_key_similarity(clean_correct, clean_user, user_key)
+        if similarity is not None:
+            instrumentation.count("evaluate.tier.key_only")
+            components["text"] = similarity
+            decisions.append("key_only")
+            return path, components, tuple(decisions)
+
+    # --- Nivel 3: similaritate fuzzy (limitată) ---
+    instrumentation.count("evaluate.tier.fuzzy")
+    components["text"] = text_similarity(clean_correct, clean_user)
+    if FUZZY_MAX_CHARS is not None and max(len(clean_correct), len(clean_user)) > FUZZY_MAX_CHARS:
+        decisions.append(f"fuzzy:truncated_to_{FUZZY_MAX_CHARS}")
+    else:
+        decisions.append("fuzzy")
 
-            # Calcul final pentru cazurile A și B
-    score_text = fuzz.WRatio(clean_correct, clean_user)
+    return path, components, tuple(decisions)
 
-    if correct_struct or (correct_num and is_numeric_answer):
-        # Structura/Numărul contează 80% (crescut de la 70%)
-        final_score = int((score_key_element * 0.8) + (score_text * 0.2))
+
+def combine_components(
+    path: str,
+    components: Dict[str, Optional[int]],
+    weights: Dict[str, float] = None
+) -> int:
+    """
+    Combină componentele calculate de score_components într-un scor 0-100.
+
+    Args:
+        path: Traseul ales de score_components
+        components: Scorurile parțiale
+        weights: Ponderi (implicit SCORING_WEIGHTS)
+    """
+    w = SCORING_WEIGHTS if weights is None else weights
+
+    if path == "empty":
+        return 0
+    if path == "yes_no_number":
+        final_score = int((components["yes_no"] * w["yes_no"]) + (components["number"] * w["yes_no_number"])
+                          + (components["text"] * w["yes_no_text"]))
+    elif path in ("structured", "numeric"):
+        final_score = int((components["key"] * w["key_element"]) + (components["text"] * w["key_text"]))
     else:
-        final_score = score_text
+        if path == "text_keywords":
+            text_score = (components["keywords"] * w["keyword"]) + (components["text"] * w["keyword_text"])
+        else:
+            text_score = components["text"]
+        # TF-IDF ia o parte din scorul textual (doar dacă a fost calculat)
+        tfidf_weight = w.get("tfidf", 0.0)
+        if tfidf_weight and "tfidf" in components:
+            text_score = text_score * (1 - tfidf_weight) + components["tfidf"] * tfidf_weight
+        final_score = int(text_score)
 
     return min(final_score, 100)
 
 
+def evaluate_answer_detailed(
+    correct_answer: str,
+    user_answer: str,
+    keywords: Optional[List[str]] = None,
+    topic: Optional[str] = None
+) -> EvaluationResult:
+    """Evaluează un răspuns și păstrează componentele și deciziile pentru audit."""
+    path, components, decisions = score_components(correct_answer, user_answer, keywords, topic)
+    return EvaluationResult(combine_components(path, components), path, components, decisions)
+
+
+def evaluate_answer(
+    correct_answer: str,
+    user_answer: str,
+    keywords: Optional[List[str]] = None,
+    topic: Optional[str] = None
+) -> int:
+    return evaluate_answer_detailed(correct_answer, user_answer, keywords, topic).score
+
+
+def evaluate_batch(
+    correct_answers: Sequence[str],
+    user_answers: Sequence[str],
+    topics: Sequence[str],
+) -> List[int]:
+    """
+    Evaluează mai multe răspunsuri într-un singur apel.
+
+    Keywords-urile se încarcă o singură dată per topic.
+
+    Args:
+        correct_answers: Răspunsurile corecte
+        user_answers: Răspunsurile utilizatorului (același ordin)
+        topics: Topicul fiecărei întrebări
+
+    Returns:
+        Lista de scoruri (0-100)
+    """
+    return [result.score for result in evaluate_batch_detailed(correct_answers, user_answers, topics)]
+
+
+def evaluate_batch_detailed(
+    correct_answers: Sequence[str],
+    user_answers: Sequence[str],
+    topics: Sequence[str],
+) -> List[EvaluationResult]:
+    """Ca evaluate_batch, dar întoarce și componentele și deciziile fiecărui scor."""
+    keywords_by_topic: Dict[str, List[str]] = {}
+    results = []
+    for correct, user, topic in zip(correct_answers, user_answers, topics):
+        if topic not in keywords_by_topic:
+            keywords_by_topic[topic] = load_keywords_for_topic(topic)
+        results.append(evaluate_answer_detailed(correct, user, keywords_by_topic[topic], topic))
+    return results
+
+
 def load_keywords_for_topic(topic: str) -> List[str]:
+    # Template-urile nu se schimbă în timpul rulării: citim de pe disc o singură dată
+    spec = catalog.spec(topic)
+    return list(_load_keywords_cached(spec.template if spec else topic.lower().replace("-", "_")))
+
+
+@lru_cache(maxsize=None)
+def _load_keywords_cached(topic_normalized: str) -> tuple:
     import json
     import os
 
-    topic_normalized = topic.lower().replace("-", "_")
     # Ajustare cale pentru a funcționa indiferent de unde e apelat
     current_dir = os.path.dirname(__file__)
     # Încearcă mai multe căi relative posibile
@@ -256,11 +586,11 @@ def load_keywords_for_topic(topic: str) -> List[str]:
             break
 
     if not template_path:
-        return []
+        return ()
 
     try:
         with open(template_path, "r", encoding="utf-8") as f:
             template = json.load(f)
-            return template.get("keywords", [])
+            return tuple(template.get("keywords", []))
     except (FileNotFoundError, json.JSONDecodeError):
-        return []
\ No newline at end of file
+        return ()
\ No newline at end of file
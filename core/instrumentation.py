@@ -0,0 +1,208 @@
+# core/instrumentation.py
+
+"""
+Opt-in per-stage timing and counters for generation and grading.
+
+Disabled by default: stage() then returns a shared no-op context manager and
+count() returns immediately, so the hooks cost a function call. Enable with
+enable() or by setting SMARTEST_INSTRUMENT=1; when SMARTEST_METRICS_FILE is
+also set, a Prometheus text file is written there at exit.
+
+Usage:
+    from core import instrumentation
+
+    with instrumentation.stage("evaluate.fuzzy"):
+        ...
+    instrumentation.count("minimax.leaves_visited", 4)
+
+    print(instrumentation.summary_table())
+    instrumentation.write_prometheus("metrics.prom")
+"""
+
+import atexit
+import os
+import threading
+import time
+from typing import Any, Dict
+
+
+ENABLE_ENV = "SMARTEST_INSTRUMENT"
+METRICS_FILE_ENV = "SMARTEST_METRICS_FILE"
+
+_enabled = os.environ.get(ENABLE_ENV, "") not in ("", "0")
+_lock = threading.Lock()
+_stages: Dict[str, list] = {}  # name -> [calls, total_seconds, max_seconds]
+_counters: Dict[str, int] = {}
+
+
+class _NullStage:
+    """Context manager used while instrumentation is disabled."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    """Times one execution of a named stage."""
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def enable():
+    """Start recording stages and counters."""
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    """Stop recording (collected data is kept until reset())."""
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def stage(name: str):
+    """
+    Context manager timing a stage.
+
+    Args:
+        name: Stage name, dotted by component (e.g. "evaluate.fuzzy")
+    """
+    if not _enabled:
+        return _NULL_STAGE
+    return _Stage(name)
+
+
+def record(name: str, seconds: float):
+    """Record one execution of a stage measured elsewhere."""
+    if not _enabled:
+        return
+    with _lock:
+        entry = _stages.get(name)
+        if entry is None:
+            _stages[name] = [1, seconds, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+            if seconds > entry[2]:
+                entry[2] = seconds
+
+
+def count(name: str, value: int = 1):
+    """Increment a counter (cache hits, solver nodes expanded, ...)."""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def reset():
+    """Discard all collected data."""
+    with _lock:
+        _stages.clear()
+        _counters.clear()
+
+
+def snapshot() -> Dict[str, Any]:
+    """
+    Copy of the collected data.
+
+    Returns:
+        {"stages": {name: {"calls", "total_s", "max_s"}}, "counters": {name: value}}
+    """
+    with _lock:
+        stages = {
+            name: {"calls": calls, "total_s": total, "max_s": max_s}
+            for name, (calls, total, max_s) in _stages.items()
+        }
+        counters = dict(_counters)
+    return {"stages": stages, "counters": counters}
+
+
+def summary_table() -> str:
+    """Render stages (slowest total first) and counters as a text table."""
+    data = snapshot()
+    lines = [f"{'stage':<36} {'calls':>9} {'total ms':>11} {'mean us':>10} {'max us':>10}", "-" * 80]
+    for name, s in sorted(data["stages"].items(), key=lambda item: -item[1]["total_s"]):
+        mean_us = s["total_s"] / s["calls"] * 1e6 if s["calls"] else 0.0
+        lines.append(f"{name:<36} {s['calls']:>9} {s['total_s'] * 1000:>11.2f} "
+                     f"{mean_us:>10.1f} {s['max_s'] * 1e6:>10.1f}")
+
+    if data["counters"]:
+        lines.append("")
+        lines.append(f"{'counter':<36} {'value':>9}")
+        lines.append("-" * 46)
+        for name, value in sorted(data["counters"].items()):
+            lines.append(f"{name:<36} {value:>9}")
+
+    return "\n".join(lines)
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text() -> str:
+    """Render collected data in the Prometheus text exposition format."""
+    data = snapshot()
+    lines = [
+        "# HELP smartest_stage_calls_total Number of executions of a stage.",
+        "# TYPE smartest_stage_calls_total counter",
+    ]
+    for name, s in sorted(data["stages"].items()):
+        lines.append(f'smartest_stage_calls_total{{stage="{_label(name)}"}} {s["calls"]}')
+
+    lines.append("# HELP smartest_stage_seconds_total Total time spent in a stage.")
+    lines.append("# TYPE smartest_stage_seconds_total counter")
+    for name, s in sorted(data["stages"].items()):
+        lines.append(f'smartest_stage_seconds_total{{stage="{_label(name)}"}} {s["total_s"]:.9f}')
+
+    lines.append("# HELP smartest_stage_seconds_max Longest single execution of a stage.")
+    lines.append("# TYPE smartest_stage_seconds_max gauge")
+    for name, s in sorted(data["stages"].items()):
+        lines.append(f'smartest_stage_seconds_max{{stage="{_label(name)}"}} {s["max_s"]:.9f}')
+
+    lines.append("# HELP smartest_events_total Event counters (cache hits, solver nodes, ...).")
+    lines.append("# TYPE smartest_events_total counter")
+    for name, value in sorted(data["counters"].items()):
+        lines.append(f'smartest_events_total{{event="{_label(name)}"}} {value}')
+
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path: str):
+    """Write prometheus_text() to a file (atomically)."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(prometheus_text())
+    os.replace(tmp_path, path)
+
+
+def _write_metrics_at_exit():
+    path = os.environ.get(METRICS_FILE_ENV)
+    if path and (_stages or _counters):
+        write_prometheus(path)
+
+
+atexit.register(_write_metrics_at_exit)
@@ -0,0 +1,286 @@
+# core/item_stats.py
+
+"""
+Streaming item statistics per question variant.
+
+Every graded answer updates the statistics of its item, identified by
+(topic, variant id, params). All statistics are computed with single-pass
+(Welford) accumulators, so they stay current as submissions stream in and
+two partial results (e.g. of two workers, or a stored row and a new batch)
+merge exactly without rescanning the answers:
+
+    mean, stdev     of the item's scores (0-100)
+    p_value         classical difficulty: mean score / 100 (1.0 = everyone
+                    gets full marks)
+    pass_rate       share of answers scoring at least PASS_MARK
+    discrimination  point-biserial correlation between passing the item and
+                    the student's score on the rest of the test (a good
+                    item is passed by the students who do well overall)
+    histogram       score distribution in HISTOGRAM_BINS bins of 10 points
+
+Items outside the usual bounds are flagged ("too_easy", "too_hard",
+"low_discrimination"); a template whose variants are repeatedly flagged is
+badly calibrated.
+
+Usage:
+    collector = ItemStatsCollector()
+    collector.add_submission(questions, scores)    # question dicts of TestBuilder
+    collector.report(min_count=30)
+
+The results store keeps the accumulators of every item it records
+(ResultsStore.item_statistics).
+"""
+
+import json
+import math
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+PASS_MARK = 50
+HISTOGRAM_BINS = 10
+
+# Classical test theory rules of thumb
+EASY_P_VALUE = 0.9
+HARD_P_VALUE = 0.2
+MIN_DISCRIMINATION = 0.2
+MIN_COUNT = 30              # fewer answers are not flagged
+
+ItemKey = Tuple[str, str, str]
+
+
+def item_key(question: Mapping[str, Any]) -> ItemKey:
+    """(topic, variant id, canonical params JSON) of a question dict."""
+    params = json.dumps(dict(question.get("params") or {}), sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return (question.get("topic") or "", question.get("variant") or "", params)
+
+
+class RunningStats:
+    """Count, mean and variance of a stream (Welford), mergeable (Chan et al.)."""
+    __slots__ = ("count", "mean", "m2")
+
+    def __init__(self, count: int = 0, mean: float = 0.0, m2: float = 0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def merge(self, other: "RunningStats"):
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+
+    @property
+    def variance(self) -> float:
+        """Sample variance (0 for fewer than two values)."""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stdev(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class RunningCorrelation:
+    """Pearson correlation of a stream of (x, y) pairs (bivariate Welford), mergeable."""
+    __slots__ = ("x", "y", "comoment")
+
+    def __init__(self, x: RunningStats = None, y: RunningStats = None, comoment: float = 0.0):
+        self.x = x or RunningStats()
+        self.y = y or RunningStats()
+        self.comoment = comoment
+
+    def add(self, x: float, y: float):
+        # The co-moment uses x's old mean and y's new mean
+        dx = x - self.x.mean
+        self.x.add(x)
+        self.y.add(y)
+        self.comoment += dx * (y - self.y.mean)
+
+    def merge(self, other: "RunningCorrelation"):
+        if not other.x.count:
+            return
+        n_a, n_b = self.x.count, other.x.count
+        dx, dy = other.x.mean - self.x.mean, other.y.mean - self.y.mean
+        self.comoment += other.comoment + dx * dy * n_a * n_b / (n_a + n_b)
+        self.x.merge(other.x)
+        self.y.merge(other.y)
+
+    @property
+    def correlation(self) -> Optional[float]:
+        """Pearson r, or None while either variable is constant."""
+        denominator = math.sqrt(self.x.m2 * self.y.m2)
+        return self.comoment / denominator if denominator > 0 else None
+
+
+class ItemStats:
+    """Accumulated statistics of one item."""
+    __slots__ = ("scores", "passes", "rest", "histogram")
+
+    def __init__(self):
+        self.scores = RunningStats()
+        self.passes = 0
+        # (passed the item, score on the rest of the test) of multi-item tests
+        self.rest = RunningCorrelation()
+        self.histogram = [0] * HISTOGRAM_BINS
+
+    def add(self, score: float, rest_score: Optional[float] = None):
+        """
+        Add one graded answer.
+
+        Args:
+            score: Score of the answer, 0-100
+            rest_score: Average score of the student's other answers in the
+                same test (None for single-question tests)
+        """
+        passed = score >= PASS_MARK
+        self.scores.add(score)
+        self.passes += passed
+        if rest_score is not None:
+            self.rest.add(1.0 if passed else 0.0, rest_score)
+        self.histogram[min(HISTOGRAM_BINS - 1, max(0, int(score * HISTOGRAM_BINS // 100)))] += 1
+
+    def merge(self, other: "ItemStats"):
+        self.scores.merge(other.scores)
+        self.passes += other.passes
+        self.rest.merge(other.rest)
+        self.histogram = [a + b for a, b in zip(self.histogram, other.histogram)]
+
+    @property
+    def count(self) -> int:
+        return self.scores.count
+
+    @property
+    def p_value(self) -> Optional[float]:
+        return self.scores.mean / 100 if self.count else None
+
+    @property
+    def pass_rate(self) -> Optional[float]:
+        return self.passes / self.count if self.count else None
+
+    @property
+    def discrimination(self) -> Optional[float]:
+        return self.rest.correlation
+
+    def flags(self, min_count: int = MIN_COUNT) -> List[str]:
+        """Calibration problems of the item (none below min_count answers)."""
+        if self.count < min_count:
+            return []
+        flags = []
+        if self.p_value > EASY_P_VALUE:
+            flags.append("too_easy")
+        elif self.p_value < HARD_P_VALUE:
+            flags.append("too_hard")
+        discrimination = self.discrimination
+        if discrimination is not None and discrimination < MIN_DISCRIMINATION:
+            flags.append("low_discrimination")
+        return flags
+
+    def summary(self, min_count: int = MIN_COUNT) -> Dict[str, Any]:
+        """JSON-serializable statistics."""
+        def rounded(value):
+            return None if value is None else round(value, 4)
+
+        return {
+            "count": self.count,
+            "mean": rounded(self.scores.mean if self.count else None),
+            "stdev": rounded(self.scores.stdev),
+            "p_value": rounded(self.p_value),
+            "pass_rate": rounded(self.pass_rate),
+            "discrimination": rounded(self.discrimination),
+            "histogram": list(self.histogram),
+            "flags": self.flags(min_count),
+        }
+
+    # --- Persistence (results store) ---
+
+    def to_state(self) -> List[Any]:
+        """Accumulator state as a flat list (inverse of from_state)."""
+        rest = self.rest
+        return [
+            self.scores.count, self.scores.mean, self.scores.m2, self.passes,
+            rest.x.count, rest.x.mean, rest.x.m2, rest.y.mean, rest.y.m2, rest.comoment,
+            json.dumps(self.histogram),
+        ]
+
+    @classmethod
+    def from_state(cls, state: Sequence[Any]) -> "ItemStats":
+        (count, mean, m2, passes, rest_count, x_mean, x_m2, y_mean, y_m2, comoment, histogram) = state
+        stats = cls()
+        stats.scores = RunningStats(count, mean, m2)
+        stats.passes = passes
+        stats.rest = RunningCorrelation(
+            RunningStats(rest_count, x_mean, x_m2), RunningStats(rest_count, y_mean, y_m2), comoment)
+        stats.histogram = json.loads(histogram)
+        return stats
+
+
+class ItemStatsCollector:
+    """Item statistics of a stream of graded submissions."""
+
+    def __init__(self):
+        self.items: Dict[ItemKey, ItemStats] = {}
+
+    def add_submission(self, questions: Sequence[Mapping[str, Any]], scores: Sequence[float]):
+        """
+        Add the scores of one submission.
+
+        Args:
+            questions: Question dicts ("topic", "variant", "params")
+            scores: Score of each question, same order
+        """
+        scores = list(scores)
+        total, count = sum(scores), len(scores)
+        for question, score in zip(questions, scores):
+            rest_score = (total - score) / (count - 1) if count > 1 else None
+            key = item_key(question)
+            stats = self.items.get(key)
+            if stats is None:
+                stats = self.items[key] = ItemStats()
+            stats.add(score, rest_score)
+
+    def merge(self, other: "ItemStatsCollector"):
+        for key, stats in other.items.items():
+            if key in self.items:
+                self.items[key].merge(stats)
+            else:
+                self.items[key] = stats
+
+    def by_topic(self) -> Dict[str, ItemStats]:
+        """Statistics of every topic (all variants and params merged)."""
+        return merge_by_topic(self.items)
+
+    def report(self, min_count: int = MIN_COUNT) -> List[Dict[str, Any]]:
+        """One summary per item, flagged items first."""
+        return item_report(self.items, min_count)
+
+
+def merge_by_topic(items: Mapping[ItemKey, ItemStats]) -> Dict[str, ItemStats]:
+    """Merge the statistics of the items of each topic."""
+    topics: Dict[str, ItemStats] = {}
+    for (topic, _, _), stats in items.items():
+        topics.setdefault(topic, ItemStats()).merge(stats)
+    return topics
+
+
+def item_report(items: Mapping[ItemKey, ItemStats], min_count: int = MIN_COUNT) -> List[Dict[str, Any]]:
+    """
+    Summaries of items, flagged items first, then by topic and variant.
+
+    Returns:
+        Dicts with "topic", "variant", "params" and the ItemStats.summary fields
+    """
+    report = []
+    for (topic, variant, params), stats in items.items():
+        row = {"topic": topic, "variant": variant, "params": json.loads(params)}
+        row.update(stats.summary(min_count))
+        report.append(row)
+    report.sort(key=lambda row: (not row["flags"], row["topic"], row["variant"], -row["count"]))
+    return report
+
@@ -0,0 +1,42 @@
+# core/lazy_import.py
+
+"""
+Deferred imports for heavy optional dependencies.
+
+    fuzz = lazy_module("fuzzywuzzy.fuzz")
+    fuzz.WRatio(a, b)   # fuzzywuzzy is imported here, on first use
+"""
+
+import importlib
+import threading
+
+
+class LazyModule:
+    """Module proxy that imports the real module on first attribute access."""
+
+    def __init__(self, name: str):
+        self.__dict__["_name"] = name
+        self.__dict__["_lock"] = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            module = self.__dict__.get("_module")
+            if module is None:
+                module = importlib.import_module(self._name)
+                self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        value = getattr(self._load(), attr)
+        # Cache on the proxy so later lookups skip __getattr__
+        self.__dict__[attr] = value
+        return value
+
+    def __repr__(self):
+        state = "loaded" if "_module" in self.__dict__ else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_module(name: str) -> LazyModule:
+    """Return a proxy that imports module `name` when first used."""
+    return LazyModule(name)
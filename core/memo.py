@@ -0,0 +1,305 @@
+# core/memo.py
+
+"""
+Shared memoization layer for solver results.
+
+Solvers that search (backtracking, game-tree search over larger inputs)
+see the same inputs again and again across students. Such solvers opt in with
+the memoized_solver decorator; results are keyed by (topic, variant id,
+solver version, canonical params) and kept in a bounded LRU with optional
+TTL. A lookup costs about 10 us (argument binding, JSON key, lock), more than
+the table lookups and small fixed-size searches of the current handlers, so
+none of them is decorated; only decorate solvers that take longer than that. When SMARTEST_MEMO_DB points to a file, an SQLite second tier keeps warm
+results across restarts; its rows expire after the TTL, or DEFAULT_DISK_TTL
+when the memo has none, and expired rows are deleted when the file is opened.
+
+The solver version is a digest of the solver's source file and of the
+topic's template, so fixing a solver or a template never serves answers
+computed by the old code (rows stored under the old version are no longer
+read, and expire from the disk tier).
+
+Usage:
+    class NQueensHandler(BaseQuestionHandler):
+        @memoized_solver("n-queens", "num_solutions")
+        def count_solutions(self, n: int) -> int:
+            ...   # backtracking search
+
+Solver arguments and results must be JSON-serializable; values read back
+from the disk tier are JSON round-tripped (tuples come back as lists).
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from . import instrumentation
+
+
+# Environment variables configuring the default memo
+MEMO_DB_ENV = "SMARTEST_MEMO_DB"
+MEMO_SIZE_ENV = "SMARTEST_MEMO_SIZE"
+MEMO_TTL_ENV = "SMARTEST_MEMO_TTL"
+
+DEFAULT_MAX_ENTRIES = 4096
+DEFAULT_DISK_TTL = 30 * 24 * 3600.0   # 30 days
+
+_MISSING = object()
+
+
+class SolverMemo:
+    """Bounded LRU + TTL memo with an optional SQLite second tier."""
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl: Optional[float] = None,
+        disk_path: Optional[str] = None
+    ):
+        """
+        Create a memo.
+
+        Args:
+            max_entries: Maximum number of in-memory entries
+            ttl: Seconds an entry stays valid (None = forever in memory,
+                DEFAULT_DISK_TTL on disk)
+            disk_path: SQLite file for the second tier (None = memory only)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_ttl = ttl if ttl is not None else DEFAULT_DISK_TTL
+        self.disk_path = disk_path
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()      # in-memory entries and counters
+        self._db_lock = threading.Lock()   # the SQLite connection; never taken while holding _lock
+        self._entries = OrderedDict()  # key -> (value, stored_at), least recently used first
+        self._db = None
+        if disk_path:
+            self._db = sqlite3.connect(disk_path, timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS memo (key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM memo WHERE stored_at < ?", (time.time() - self.disk_ttl,))
+            self._db.commit()
+
+    @staticmethod
+    def make_key(topic: str, variant: str, params: Dict[str, Any], version: str = "") -> str:
+        """
+        Build the memo key.
+
+        Args:
+            topic: Topic ID
+            variant: Variant ID (or solver name)
+            params: JSON-serializable solver inputs
+            version: Solver version (see solver_version)
+
+        Returns:
+            Canonical string key
+        """
+        canonical = json.dumps(params, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return f"{topic}|{variant}|{version}|{canonical}"
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl is not None and time.time() - stored_at > self.ttl
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """
+        Look a key up in memory, then on disk.
+
+        Returns:
+            Tuple of (found, value)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if not self._expired(entry[1]):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    instrumentation.count("memo.hit")
+                    return True, entry[0]
+                del self._entries[key]
+
+        # The disk lookup runs outside _lock so memory hits of other threads
+        # never wait for SQLite
+        value = self._disk_get(key)
+        with self._lock:
+            if value is not _MISSING:
+                self.disk_hits += 1
+                instrumentation.count("memo.disk_hit")
+                self._remember(key, value, time.time())
+                return True, value
+
+            self.misses += 1
+            instrumentation.count("memo.miss")
+            return False, None
+
+    def put(self, key: str, value: Any):
+        """Store a value in memory and, when enabled, on disk."""
+        stored_at = time.time()
+        with self._lock:
+            self._remember(key, value, stored_at)
+        with self._db_lock:
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO memo (key, value, stored_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), stored_at),
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, value: Any, stored_at: float):
+        self._entries[key] = (value, stored_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _disk_get(self, key: str) -> Any:
+        with self._db_lock:
+            if self._db is None:
+                return _MISSING
+            row = self._db.execute("SELECT value, stored_at FROM memo WHERE key = ?", (key,)).fetchone()
+        if row is None or time.time() - row[1] > self.disk_ttl:
+            return _MISSING
+        return json.loads(row[0])
+
+    def clear(self, disk: bool = False):
+        """Drop in-memory entries (and the disk tier when disk=True)."""
+        with self._lock:
+            self._entries.clear()
+        with self._db_lock:
+            if disk and self._db is not None:
+                self._db.execute("DELETE FROM memo")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+    def close(self):
+        """Close the disk tier."""
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+_default_memo = None
+_default_memo_lock = threading.Lock()
+
+
+def get_default_memo() -> SolverMemo:
+    """
+    Return the process-wide memo.
+
+    Configured through SMARTEST_MEMO_SIZE, SMARTEST_MEMO_TTL (seconds) and
+    SMARTEST_MEMO_DB (SQLite file for the second tier).
+    """
+    global _default_memo
+    if _default_memo is not None:
+        return _default_memo
+
+    with _default_memo_lock:
+        if _default_memo is None:
+            ttl = os.environ.get(MEMO_TTL_ENV)
+            _default_memo = SolverMemo(
+                max_entries=int(os.environ.get(MEMO_SIZE_ENV, DEFAULT_MAX_ENTRIES)),
+                ttl=float(ttl) if ttl else None,
+                disk_path=os.environ.get(MEMO_DB_ENV) or None,
+            )
+        return _default_memo
+
+
+def configure_memo(
+    max_entries: int = DEFAULT_MAX_ENTRIES,
+    ttl: Optional[float] = None,
+    disk_path: Optional[str] = None
+) -> SolverMemo:
+    """Replace the process-wide memo (e.g. to enable the disk tier)."""
+    global _default_memo
+    with _default_memo_lock:
+        if _default_memo is not None:
+            _default_memo.close()
+        _default_memo = SolverMemo(max_entries, ttl, disk_path)
+        return _default_memo
+
+
+def solver_version(func: Callable, topic: str) -> str:
+    """
+    Digest of the code and template a solver's results depend on.
+
+    Covers the whole source file of the solver (helpers included) and the
+    topic's template file.
+    """
+    from .topic_catalog import catalog
+
+    digest = hashlib.sha256()
+    for path in (inspect.getsourcefile(func), catalog.template_path(topic)):
+        try:
+            with open(path, "rb") as f:
+                digest.update(f.read())
+        except (OSError, TypeError):
+            # No file (e.g. defined interactively): fall back to the bytecode
+            digest.update(func.__code__.co_code)
+    return digest.hexdigest()[:12]
+
+
+def memoized_solver(topic: str, variant: str = None, memo: SolverMemo = None, version: str = None) -> Callable:
+    """
+    Decorator memoizing a solver function (or handler method).
+
+    The key is (topic, variant, solver version, bound arguments); `self` is
+    not part of it, so every handler instance shares the results.
+
+    Args:
+        topic: Topic ID
+        variant: Variant ID (defaults to the function name)
+        memo: Memo to use (defaults to get_default_memo() at call time)
+        version: Solver version (defaults to solver_version(), computed on first call)
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        name = variant or func.__name__
+        versions = [version] if version is not None else []
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            params = {k: v for k, v in bound.arguments.items() if k != "self"}
+
+            if not versions:
+                versions.append(solver_version(func, topic))
+            store = memo or get_default_memo()
+            key = store.make_key(topic, name, params, versions[0])
+            found, value = store.get(key)
+            if found:
+                return value
+
+            value = func(*args, **kwargs)
+            store.put(key, value)
+            return value
+
+        return wrapper
+
+    return decorator
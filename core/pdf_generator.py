@@ -11,6 +11,7 @@ try:
     from reportlab.lib.units import inch
     from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
     from reportlab.lib.enums import TA_CENTER, TA_LEFT
+    from .canvas_renderer import CanvasRenderer, text_styles
     REPORTLAB_AVAILABLE = True
 except ImportError as e:
     import logging
@@ -18,19 +19,46 @@ except ImportError as e:
     REPORTLAB_AVAILABLE = False
 
 
+# Available rendering backends
+RENDERERS = ("platypus", "canvas")
+
+# Single-pass escaping table for ReportLab paragraph markup
+_ESCAPE_TABLE = str.maketrans({
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '\n': '<br/>',
+})
+
+
 class PDFGenerator:
     """Generate PDF files for questions and answers."""
     
-    def __init__(self):
-        """Initialize PDF generator."""
+    def __init__(self, renderer: str = "platypus", cache=None):
+        """
+        Initialize PDF generator.
+        
+        Args:
+            renderer: Rendering backend. "platypus" builds a flowable story,
+                "canvas" draws plain text directly on the canvas and is much
+                faster for large batches of question/answer sheets.
+            cache: Optional RenderCache; identical documents are then copied
+                from the cache instead of being rendered again.
+        """
+        if renderer not in RENDERERS:
+            raise ValueError(f"Unknown renderer '{renderer}'. Available: {list(RENDERERS)}")
+        
         if not REPORTLAB_AVAILABLE:
             raise ImportError(
                 "ReportLab is required for PDF generation. "
                 "Install it with: pip install reportlab"
             )
         
+        self.renderer = renderer
+        self.cache = cache
         self.styles = getSampleStyleSheet()
         self._setup_custom_styles()
+        self._text_styles = None
     
     def _setup_custom_styles(self):
         """Setup custom paragraph styles."""
@@ -79,6 +107,19 @@ class PDFGenerator:
             title: Title for the document
             include_topics: Whether to include topic names
         """
+        content = [
+            [q.get('topic_name') if include_topics else None, q.get('question', '')]
+            for q in questions
+        ]
+        if self.renderer == "canvas":
+            render = lambda: self._generate_questions_canvas(questions, filename, title, include_topics)
+        else:
+            render = lambda: self._generate_questions_platypus(questions, filename, title, include_topics)
+        
+        self._render("questions_pdf", content, {"title": title}, filename, render)
+    
+    def _generate_questions_platypus(self, questions: list, filename: str, title: str, include_topics: bool):
+        """Platypus backend for generate_questions_pdf."""
         doc = SimpleDocTemplate(filename, pagesize=A4)
         story = []
         
@@ -128,6 +169,15 @@ class PDFGenerator:
             filename: Output PDF filename
             title: Title for the document
         """
+        if self.renderer == "canvas":
+            render = lambda: self._generate_answers_canvas(answers, filename, title)
+        else:
+            render = lambda: self._generate_answers_platypus(answers, filename, title)
+        
+        self._render("answers_pdf", list(answers), {"title": title}, filename, render)
+    
+    def _generate_answers_platypus(self, answers: list, filename: str, title: str):
+        """Platypus backend for generate_answers_pdf."""
         doc = SimpleDocTemplate(filename, pagesize=A4)
         story = []
         
@@ -169,6 +219,21 @@ class PDFGenerator:
             score: Score percentage (0-100)
             filename: Output PDF filename
         """
+        content = [question, user_answer, correct_answer, score]
+        render = lambda: self._generate_evaluation_platypus(
+            question, user_answer, correct_answer, score, filename
+        )
+        self._render("evaluation_pdf", content, {}, filename, render)
+    
+    def _generate_evaluation_platypus(
+        self,
+        question: str,
+        user_answer: str,
+        correct_answer: str,
+        score: int,
+        filename: str
+    ):
+        """Platypus backend for generate_evaluation_pdf."""
         doc = SimpleDocTemplate(filename, pagesize=A4)
         story = []
         
@@ -206,6 +271,25 @@ class PDFGenerator:
         # Build PDF
         doc.build(story)
     
+    def _render(self, kind: str, content, options: dict, filename: str, render):
+        """
+        Run a render callable, going through the render cache when configured.
+        
+        Args:
+            kind: Document kind used in the cache key
+            content: Content being rendered (JSON-serializable)
+            options: Layout options that influence the output
+            filename: Output PDF filename
+            render: Callable that writes filename
+        """
+        if self.cache is None:
+            render()
+            return
+        
+        options = dict(options, renderer=self.renderer, pagesize=list(A4))
+        key = self.cache.make_key(kind, content, options)
+        self.cache.render(key, filename, render)
+    
     def _escape_html(self, text: str) -> str:
         """
         Escape special HTML characters for ReportLab.
@@ -219,15 +303,54 @@ class PDFGenerator:
         if not text:
             return ""
         
-        # Replace special characters
-        text = text.replace('&', '&amp;')
-        text = text.replace('<', '&lt;')
-        text = text.replace('>', '&gt;')
+        # Replace special characters and preserve line breaks in one pass
+        return text.translate(_ESCAPE_TABLE)
+    
+    def _get_text_styles(self) -> dict:
+        """Flatten the paragraph styles used by the canvas renderer (once)."""
+        if self._text_styles is None:
+            self._text_styles = text_styles(
+                self.styles,
+                ['CustomTitle', 'QuestionHeading', 'TopicStyle', 'Normal'],
+            )
+        return self._text_styles
+    
+    def _generate_questions_canvas(self, questions: list, filename: str, title: str, include_topics: bool):
+        """Canvas backend for generate_questions_pdf (same layout)."""
+        styles = self._get_text_styles()
+        page = CanvasRenderer(filename, pagesize=A4)
         
-        # Preserve line breaks
-        text = text.replace('\n', '<br/>')
+        page.paragraph(title, styles['CustomTitle'])
+        page.spacer(0.3*inch)
+        
+        for i, q in enumerate(questions, 1):
+            page.paragraph(f"Question {i}", styles['QuestionHeading'])
+            
+            if include_topics and 'topic_name' in q:
+                page.paragraph(f"Topic: {q['topic_name']}", styles['TopicStyle'])
+            
+            page.paragraph(q.get('question', '') or '', styles['Normal'])
+            page.spacer(0.5*inch)
+            
+            if i < len(questions):
+                page.page_break()
+        
+        page.save()
+    
+    def _generate_answers_canvas(self, answers: list, filename: str, title: str):
+        """Canvas backend for generate_answers_pdf (same layout)."""
+        styles = self._get_text_styles()
+        page = CanvasRenderer(filename, pagesize=A4)
+        
+        page.paragraph(title, styles['CustomTitle'])
+        page.spacer(0.3*inch)
+        
+        for i, answer in enumerate(answers, 1):
+            page.paragraph(f"Answer {i}", styles['QuestionHeading'])
+            page.paragraph(answer or '', styles['Normal'])
+            page.spacer(0.4*inch)
         
-        return text
+        page.save()
 
 
 def is_pdf_available() -> bool:
@@ -1,101 +1,212 @@
 # core/question_factory.py
 
+import importlib
 import json
-import os
-from typing import Tuple, Dict, Any
-
-from .base_question_handler import BaseQuestionHandler
-from .question_handlers import (
-    NQueensHandler,
-    KnightsTourHandler,
-    GraphColoringHandler,
-    GeneralisedHanoiHandler,
-    MinimaxHandler,
-    NashEquilibriumHandler,
-    CSPHandler,
-)
-
-# Map topic names to handler classes
-HANDLER_CLASSES = {
-    "n-queens": NQueensHandler,
-    "knights-tour": KnightsTourHandler,
-    "knights_tour": KnightsTourHandler,
-    "graph-coloring": GraphColoringHandler,
-    "graph_coloring": GraphColoringHandler,
-    "generalised-hanoi": GeneralisedHanoiHandler,
-    "generalised_hanoi": GeneralisedHanoiHandler,
-    "minimax": MinimaxHandler,
-    "nash-equilibrium": NashEquilibriumHandler,
-    "nash_equilibrium": NashEquilibriumHandler,
-    "csp": CSPHandler,
-}
-
-TEMPLATES_PATH = os.path.join(os.path.dirname(__file__), "..", "templates")
+import random
+import threading
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Tuple, Dict, Any, Mapping, NamedTuple, Optional
+
+from . import instrumentation
+from .base_question_handler import BaseQuestionHandler, current_rng, use_rng
+from .solver_budget import SolverBudget
+from .topic_catalog import TEMPLATES_PATH, catalog
+
+# Map topic names (every alias from the topic catalog) to handler classes.
+# Entries may be classes or "module.ClassName" paths (relative to
+# core.question_handlers), which are imported the first time the topic is used.
+HANDLER_CLASSES = {alias: catalog.handler_path(alias) for alias in catalog.aliases()}
+
+
+class GeneratedItem(NamedTuple):
+    """Immutable result of one generation call."""
+    topic: str
+    variant_id: str
+    question: str
+    answer: str
+    params: Mapping[str, Any]  # read-only parameters the question was built from
+    seed: int                  # generate_item(topic, params, seed=seed, variant_id=variant_id) regenerates the item
+    fallback: str = ""         # "resampled" / "variant" when the solver ran out of budget
+
+
+# Handler instances are stateless between calls, so one per topic is shared
+_handlers: Dict[str, BaseQuestionHandler] = {}
+_handlers_lock = threading.Lock()
 
 
 def load_template(topic: str) -> Dict[str, Any]:
     """
     Load a JSON template for a given topic.
     
+    Templates are read from disk once per process and shared afterwards,
+    so the returned dictionary must be treated as read-only.
+    
     Args:
         topic: The topic name
         
     Returns:
         Dictionary containing the template data
     """
-    path = os.path.join(TEMPLATES_PATH, f"{topic.replace('-', '_')}.json")
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {}
+    return _read_template(catalog.template_path(topic))
 
 
-def generate_question_and_answer(topic: str, params: Dict[str, Any] = None) -> Tuple[Any, Any]:
+@lru_cache(maxsize=None)
+def _read_template(path: str) -> Dict[str, Any]:
+    """Read and parse a template file (cached per path)."""
+    instrumentation.count("templates.read_from_disk")
+    with instrumentation.stage("factory.template_io"):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+
+def resolve_handler_class(topic: str):
     """
-    Generate question and answer for the given topic.
+    Resolve the handler class registered for a topic, importing it if needed.
     
-    This is the main entry point for question generation. It:
-    1. Loads the template for the topic
-    2. Creates the appropriate handler
-    3. Generates the question and answer dynamically
+    Args:
+        topic: The topic name
+        
+    Returns:
+        Handler class, or None if the topic is not registered
+    """
+    entry = HANDLER_CLASSES.get(topic.lower(), HANDLER_CLASSES.get(catalog.resolve(topic)))
+    if not isinstance(entry, str):
+        return entry
+    
+    module_name, class_name = entry.rsplit(".", 1)
+    module = importlib.import_module(f".question_handlers.{module_name}", __package__)
+    return getattr(module, class_name)
+
+
+def get_handler(topic: str):
+    """
+    Get the shared handler instance for a topic.
     
     Args:
-        topic: The topic name (e.g., 'n-queens', 'minimax')
-        params: Optional parameters for question generation
+        topic: The topic name
         
     Returns:
-        Tuple of (question, answer)
+        Handler instance, or None if the topic has no template or handler
+    """
+    # Aliases of one topic share the same handler
+    key = catalog.resolve(topic) or topic.lower()
+    handler = _handlers.get(key)
+    if handler is not None:
+        instrumentation.count("handlers.cache_hit")
+        return handler
+    
+    instrumentation.count("handlers.cache_miss")
+    handler_class = resolve_handler_class(key)
+    template = load_template(topic)
+    if not handler_class or not template:
+        return None
+    
+    with _handlers_lock:
+        return _handlers.setdefault(key, handler_class(template))
+
+
+def preload_handlers():
+    """Load every template, create every handler and precompute the catalog."""
+    for topic in HANDLER_CLASSES:
+        get_handler(topic)
+    catalog.precompute()
+
+
+def generate_item(
+    topic: str,
+    params: Mapping[str, Any] = None,
+    variant_index: int = None,
+    seed: int = None,
+    variant_id: str = None,
+    budget: SolverBudget = None
+) -> Optional[GeneratedItem]:
     """
-    params = params or {}
+    Generate one question as an immutable item (reentrant, thread-safe).
     
-    # Normalize topic name
-    topic_normalized = topic.lower().replace("-", "_")
+    The caller's params are never modified and the call draws random numbers
+    from its own generator seeded with `seed`, so concurrent callers can
+    share the handler registry and the same seed always gives the same item.
+    
+    Args:
+        topic: The topic name (e.g., 'n-queens', 'minimax')
+        params: Optional parameters for question generation (read only)
+        variant_index: Specific question variant (random if None)
+        seed: Seed of the per-call generator (drawn from the current
+            generator if None)
+        variant_id: Select the variant by ID instead of index
+        budget: Solver budget (default: SolverBudget.default())
+        
+    Returns:
+        GeneratedItem, or None for an unknown topic
+    """
+    params = MappingProxyType(dict(params or {}))
+    if seed is None:
+        seed = current_rng().getrandbits(63)
     
     # Load template
     template = load_template(topic)
     
     if not template:
         # Unknown topic - return empty
-        return None, None
+        return None
     
-    # Get handler class for this topic
-    handler_class = HANDLER_CLASSES.get(topic.lower())
+    # Get the shared handler for this topic
+    handler = get_handler(topic)
+    topic_id = catalog.resolve(topic) or topic
     
-    if not handler_class:
-        # No handler found - try to use template directly
-        return _generate_from_template_only(template, params)
+    if handler and variant_id is not None:
+        variant_index = handler.variant_index_of(variant_id)
     
-    # Create handler instance
-    handler = handler_class(template)
+    with use_rng(random.Random(seed)):
+        if not handler:
+            # No handler found - try to use template directly
+            question, answer = _generate_from_template_only(template, params)
+            return GeneratedItem(topic_id, "", question, answer, params, seed)
+        
+        # Generate question and answer
+        with instrumentation.stage("factory.generate"):
+            question, answer, variant, prepared_params, fallback = handler.generate_detailed(
+                params, variant_index, budget
+            )
+    
+    return GeneratedItem(
+        topic_id, variant.get("id", ""), question, answer,
+        MappingProxyType(prepared_params), seed, fallback
+    )
+
+
+def generate_question_and_answer(
+    topic: str,
+    params: Dict[str, Any] = None,
+    variant_index: int = None
+) -> Tuple[Any, Any]:
+    """
+    Generate question and answer for the given topic.
     
-    # Generate question and answer
-    question, answer = handler.generate(params)
+    This is the main entry point for question generation. It:
+    1. Loads the template for the topic
+    2. Creates the appropriate handler
+    3. Generates the question and answer dynamically
     
-    return question, answer
+    Args:
+        topic: The topic name (e.g., 'n-queens', 'minimax')
+        params: Optional parameters for question generation
+        variant_index: Specific question variant (random if None)
+        
+    Returns:
+        Tuple of (question, answer)
+    """
+    item = generate_item(topic, params, variant_index)
+    if item is None:
+        return None, None
+    return item.question, item.answer
 
 
-def _generate_from_template_only(template: Dict[str, Any], params: Dict[str, Any]) -> Tuple[str, str]:
+def _generate_from_template_only(template: Dict[str, Any], params: Mapping[str, Any]) -> Tuple[str, str]:
     """
     Fallback method to generate from template when no handler is available.
     
@@ -119,7 +230,8 @@ def _generate_from_template_only(template: Dict[str, Any], params: Dict[str, Any
         question_template = template.get("question", "")
         answer_template = template.get("answer", "")
     
-    # Apply default parameters from template
+    # Apply default parameters from template (on a copy of the caller's params)
+    params = dict(params)
     params_definition = template.get("params", {})
     for key, meta in params_definition.items():
         if key not in params:
@@ -1,12 +1,18 @@
 # core/question_handlers/__init__.py
 
-from .n_queens_handler import NQueensHandler
-from .knights_tour_handler import KnightsTourHandler
-from .graph_coloring_handler import GraphColoringHandler
-from .generalised_hanoi_handler import GeneralisedHanoiHandler
-from .minimax_handler import MinimaxHandler
-from .nash_equilibrium_handler import NashEquilibriumHandler
-from .csp_handler import CSPHandler
+import importlib
+
+# Handler classes are imported on first access (PEP 562), so loading one
+# topic does not import every handler module.
+_HANDLER_MODULES = {
+    'NQueensHandler': '.n_queens_handler',
+    'KnightsTourHandler': '.knights_tour_handler',
+    'GraphColoringHandler': '.graph_coloring_handler',
+    'GeneralisedHanoiHandler': '.generalised_hanoi_handler',
+    'MinimaxHandler': '.minimax_handler',
+    'NashEquilibriumHandler': '.nash_equilibrium_handler',
+    'CSPHandler': '.csp_handler',
+}
 
 __all__ = [
     'NQueensHandler',
@@ -17,3 +23,16 @@ __all__ = [
     'NashEquilibriumHandler',
     'CSPHandler',
 ]
+
+
+def __getattr__(name):
+    module_name = _HANDLER_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    handler_class = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = handler_class
+    return handler_class
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,8 +1,9 @@
 # core/question_handlers/csp_handler.py
 
 from typing import Dict, Any, Tuple, List
-import random
+from .. import instrumentation
 from ..base_question_handler import BaseQuestionHandler
+from ..solver_budget import tick
 
 
 class CSPHandler(BaseQuestionHandler):
@@ -19,13 +20,13 @@ class CSPHandler(BaseQuestionHandler):
         
         # Generate a valid partial assignment
         # Choose one variable and a value that won't immediately violate constraints
-        chosen_var = random.choice(["V1", "V3"])  # Avoid V2 as it's constrained by both
+        chosen_var = self.rng.choice(["V1", "V3"])  # Avoid V2 as it's constrained by both
         if chosen_var == "V1":
             # V1 can be any value (V2 will be constrained to != V1)
-            chosen_val = random.choice([1, 2, 3])
+            chosen_val = self.rng.choice([1, 2, 3])
         else:  # V3
             # V3 should be >= 2 to allow V2 < V3
-            chosen_val = random.choice([2, 3])
+            chosen_val = self.rng.choice([2, 3])
         
         partial_assignment = {chosen_var: chosen_val}
         
@@ -58,6 +59,8 @@ class CSPHandler(BaseQuestionHandler):
         if remaining_vars:
             next_var = remaining_vars[0]
             for value in current_domains[next_var]:
+                instrumentation.count("csp.values_tried")
+                tick()
                 temp_assignment = assignment.copy()
                 temp_assignment[next_var] = value
                 
@@ -7,6 +7,13 @@ from ..base_question_handler import BaseQuestionHandler
 class KnightsTourHandler(BaseQuestionHandler):
     """Handler for Knight's Tour problem questions."""
     
+    @classmethod
+    def is_valid_params(cls, params: Dict[str, Any]) -> bool:
+        """The start position must lie on the board."""
+        board_size = params.get("board_size", 8)
+        start_pos = params.get("start_pos", [1, 1])
+        return all(1 <= coordinate <= board_size for coordinate in start_pos)
+    
     def generate_custom(self, variant: Dict[str, Any], params: Dict[str, Any]) -> Tuple[str, str]:
         """
         Generate Knight's Tour question and answer with computation.
@@ -1,7 +1,7 @@
 # core/question_handlers/minimax_handler.py
 
 from typing import Dict, Any, Tuple, List
-import random
+from .. import instrumentation
 from ..base_question_handler import BaseQuestionHandler
 
 
@@ -10,7 +10,7 @@ class MinimaxHandler(BaseQuestionHandler):
     
     def generate_minimax_tree(self) -> Dict[str, Any]:
         """Generate a simple minimax tree with 4 leaves."""
-        leaf_values = [random.randint(1, 10) for _ in range(4)]
+        leaf_values = [self.rng.randint(1, 10) for _ in range(4)]
         
         tree_description = (
             "Nivel 0 (Rădăcină - MAX):\n"
@@ -56,6 +56,7 @@ class MinimaxHandler(BaseQuestionHandler):
         # Root (MAX)
         root_value = max(result_node1, result_node2)
         
+        instrumentation.count("minimax.leaves_visited", visited_leaves)
         return root_value, visited_leaves
     
     def generate_custom(self, variant: Dict[str, Any], params: Dict[str, Any]) -> Tuple[str, str]:
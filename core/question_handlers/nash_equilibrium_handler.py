@@ -1,7 +1,7 @@
 # core/question_handlers/nash_equilibrium_handler.py
 
 from typing import Dict, Any, Tuple
-import random
+from .. import instrumentation
 from ..base_question_handler import BaseQuestionHandler
 
 class NashEquilibriumHandler(BaseQuestionHandler):
@@ -11,10 +11,10 @@ class NashEquilibriumHandler(BaseQuestionHandler):
         """Generate a random 2x2 normal-form game."""
         # Payoffs as (J1, J2)
         return {
-            "U_L": (random.randint(0, 5), random.randint(0, 5)),
-            "U_R": (random.randint(0, 5), random.randint(0, 5)),
-            "D_L": (random.randint(0, 5), random.randint(0, 5)),
-            "D_R": (random.randint(0, 5), random.randint(0, 5)),
+            "U_L": (self.rng.randint(0, 5), self.rng.randint(0, 5)),
+            "U_R": (self.rng.randint(0, 5), self.rng.randint(0, 5)),
+            "D_L": (self.rng.randint(0, 5), self.rng.randint(0, 5)),
+            "D_R": (self.rng.randint(0, 5), self.rng.randint(0, 5)),
         }
 
     def find_nash_pure(self, game: Dict[str, Tuple[int, int]]) -> list:
@@ -47,6 +47,7 @@ class NashEquilibriumHandler(BaseQuestionHandler):
             ("D", "R"): ("D" == best_J1_R and "R" == best_J2_D),
         }
 
+        instrumentation.count("nash.profiles_checked", len(profiles))
         return [p for p, ok in profiles.items() if ok]
 
     def format_game_matrix(self, g):
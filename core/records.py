@@ -0,0 +1,180 @@
+# core/records.py
+
+"""
+Compact question and answer-key records.
+
+Generated questions are normally plain dicts, each with its own topic_name
+string and params dict. Callers that keep many generated questions in memory
+at once (TestBuilder.build_records, used by tools/load_test.py) can use the
+records below instead: they store the same data with __slots__, interned IDs
+and texts and shared read-only params, so identical question and answer
+texts and parameter combinations (common with stratified sampling) are
+stored once. The topic name is looked up in the topic catalog instead of
+being stored. The batch CLI streams one test at a time and keeps dicts.
+
+Records convert to and from the dict format used by the GUI, PDF export and
+the HTTP API.
+"""
+
+import json
+import sys
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Tuple
+
+from .topic_catalog import catalog
+
+
+_TOPIC_NAMES = catalog.names()
+
+# Most recently used shared params; older entries are dropped (records that
+# hold them keep their copy), so a long-running process does not grow
+SHARED_PARAMS_SIZE = 4096
+
+_shared_params: "OrderedDict[str, Mapping[str, Any]]" = OrderedDict()
+_shared_params_lock = threading.Lock()
+_EMPTY_PARAMS = MappingProxyType({})
+
+
+def share_params(params: Mapping[str, Any]) -> Mapping[str, Any]:
+    """
+    Return a shared read-only copy of a params mapping.
+
+    Equal mappings return the same object (while among the last
+    SHARED_PARAMS_SIZE used), so many records with the same parameters keep
+    only one copy in memory.
+    """
+    if not params:
+        return _EMPTY_PARAMS
+    try:
+        key = json.dumps(params, sort_keys=True, separators=(",", ":"))
+    except TypeError:
+        # Not JSON-serializable: keep a private copy
+        return MappingProxyType(dict(params))
+
+    with _shared_params_lock:
+        shared = _shared_params.get(key)
+        if shared is None:
+            shared = _shared_params[key] = MappingProxyType(dict(params))
+            if len(_shared_params) > SHARED_PARAMS_SIZE:
+                _shared_params.popitem(last=False)
+        else:
+            _shared_params.move_to_end(key)
+    return shared
+
+
+class QuestionRecord:
+    """One generated question."""
+    __slots__ = ("id", "topic", "question", "params", "variant", "seed", "fallback")
+
+    def __init__(
+        self,
+        id: int,
+        topic: str,
+        question: str,
+        params: Mapping[str, Any] = None,
+        variant: str = "",
+        seed: int = None,
+        fallback: str = ""
+    ):
+        self.id = id
+        self.topic = sys.intern(topic)
+        self.question = sys.intern(question)
+        self.params = share_params(params or {})
+        self.variant = sys.intern(variant or "")
+        self.seed = seed
+        self.fallback = sys.intern(fallback or "")
+
+    @property
+    def topic_name(self) -> str:
+        """Display name of the topic (from the topic catalog)."""
+        return _TOPIC_NAMES.get(self.topic, self.topic)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to the question dict used by the GUI, PDF export and API."""
+        data = {
+            "id": self.id,
+            "topic": self.topic,
+            "topic_name": self.topic_name,
+            "question": self.question,
+            "params": dict(self.params),
+            "variant": self.variant,
+            "seed": self.seed,
+        }
+        if self.fallback:
+            data["fallback"] = self.fallback
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "QuestionRecord":
+        """Build a record from a question dict (topic_name is ignored)."""
+        return cls(
+            data["id"],
+            data["topic"],
+            data["question"],
+            data.get("params"),
+            data.get("variant", ""),
+            data.get("seed"),
+            data.get("fallback", ""),
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, QuestionRecord):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return f"QuestionRecord(id={self.id!r}, topic={self.topic!r}, variant={self.variant!r})"
+
+
+class AnswerKeyRecord:
+    """Correct answer of one question."""
+    __slots__ = ("question_id", "topic", "answer")
+
+    def __init__(self, question_id: int, topic: str, answer: str):
+        self.question_id = question_id
+        self.topic = sys.intern(topic)
+        self.answer = sys.intern(answer)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"question_id": self.question_id, "topic": self.topic, "answer": self.answer}
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "AnswerKeyRecord":
+        return cls(data["question_id"], data["topic"], data["answer"])
+
+    def __eq__(self, other):
+        if not isinstance(other, AnswerKeyRecord):
+            return NotImplemented
+        return (self.question_id, self.topic, self.answer) == (other.question_id, other.topic, other.answer)
+
+    def __repr__(self):
+        return f"AnswerKeyRecord(question_id={self.question_id!r}, topic={self.topic!r})"
+
+
+def records_from_test(
+    questions: Iterable[Mapping[str, Any]],
+    answers: Iterable[str]
+) -> Tuple[List[QuestionRecord], List[AnswerKeyRecord]]:
+    """
+    Convert the (questions, answers) lists of TestBuilder to records.
+
+    Returns:
+        Tuple of (question_records, answer_key_records)
+    """
+    question_records = []
+    answer_records = []
+    for data, answer in zip(questions, answers):
+        record = QuestionRecord.from_dict(data)
+        question_records.append(record)
+        answer_records.append(AnswerKeyRecord(record.id, record.topic, answer))
+    return question_records, answer_records
+
+
+def records_to_test(
+    question_records: Iterable[QuestionRecord],
+    answer_records: Iterable[AnswerKeyRecord]
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Convert records back to the (questions, answers) lists of TestBuilder."""
+    return [r.to_dict() for r in question_records], [r.answer for r in answer_records]
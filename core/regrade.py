@@ -0,0 +1,160 @@
+# core/regrade.py
+
+"""
+Incremental re-grading.
+
+Grading keeps, for every answer, the component scores computed by
+evaluator.score_components together with two fingerprints:
+
+    fingerprint   the topic, correct answer (answer key) and student answer
+    config        what the answer's components depend on: the evaluator
+                  COMPONENTS_VERSION and FUZZY_MAX_CHARS, plus the topic
+                  keywords, keyword penalties and TF-IDF index (when
+                  enabled) for the text paths
+
+When an answer key is corrected or the evaluator configuration changes,
+grade_answers(..., previous=...) recomputes only the answers whose
+fingerprint or config changed; every other answer is recombined from its
+stored components with the current SCORING_WEIGHTS (weight changes never
+need a recompute).
+
+Stored answers are plain JSON-serializable dicts:
+    {"fingerprint": ..., "config": ..., "path": ..., "components": {...}, "score": ...}
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+from . import evaluator
+from . import instrumentation
+from .tfidf import tfidf_for_topic
+
+
+# Paths whose components depend on the topic keywords
+_KEYWORD_PATHS = ("text_keywords", "text")
+
+
+def _digest(value: Any) -> str:
+    payload = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def answer_fingerprint(correct_answer: str, user_answer: str, topic: str) -> str:
+    """Fingerprint of one graded answer (answer key and student answer)."""
+    return _digest([topic, correct_answer, user_answer])
+
+
+def component_fingerprint(path: str, keywords: Sequence[str], topic: str = None) -> str:
+    """
+    Fingerprint of the evaluator configuration the components of `path` depend on.
+
+    Args:
+        path: Scoring path of the answer (see evaluator.score_components)
+        keywords: Keywords of the answer's topic
+        topic: Topic of the answer (its TF-IDF index is used on the text paths)
+    """
+    config = [evaluator.COMPONENTS_VERSION, evaluator.FUZZY_MAX_CHARS]
+    if path in _KEYWORD_PATHS:
+        # Keywords decide between the two text paths, so both depend on them
+        config += [
+            sorted(keywords),
+            evaluator.KEYWORD_MISS_PENALTY_PERCENT,
+            evaluator.KEYWORD_WRONG_PENALTY_EACH,
+            evaluator.KEYWORD_WRONG_PENALTY_MAX,
+        ]
+        if topic and evaluator.SCORING_WEIGHTS.get("tfidf"):
+            config.append(tfidf_for_topic(topic).fingerprint)
+    return _digest(config)
+
+
+def weights_fingerprint(weights: Mapping[str, float] = None) -> str:
+    """Fingerprint of the combination weights (default: evaluator.SCORING_WEIGHTS)."""
+    return _digest(dict(evaluator.SCORING_WEIGHTS if weights is None else weights))
+
+
+class RegradeStats:
+    """Counts of reused and recomputed answers."""
+    __slots__ = ("reused", "new", "key_changed", "config_changed")
+
+    def __init__(self):
+        self.reused = 0
+        self.new = 0
+        self.key_changed = 0
+        self.config_changed = 0
+
+    @property
+    def recomputed(self) -> int:
+        return self.new + self.key_changed + self.config_changed
+
+    def add(self, other: "RegradeStats"):
+        for name in self.__slots__:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+    def to_dict(self) -> Dict[str, int]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def grade_answers(
+    correct_answers: Sequence[str],
+    user_answers: Sequence[str],
+    topics: Sequence[str],
+    previous: Optional[Sequence[Mapping[str, Any]]] = None,
+    stats: Optional[RegradeStats] = None
+) -> List[Dict[str, Any]]:
+    """
+    Grade answers, reusing the stored components of a previous grading.
+
+    Args:
+        correct_answers: Correct answers (answer key)
+        user_answers: Student answers (same order)
+        topics: Topic of each question
+        previous: Stored answers of a previous grading, by position (optional)
+        stats: Updated with the number of reused and recomputed answers
+
+    Returns:
+        One stored-answer dict per answer (see module docstring)
+    """
+    stats = stats if stats is not None else RegradeStats()
+    previous = previous or ()
+    keywords_by_topic: Dict[str, List[str]] = {}
+    graded = []
+
+    for index, (correct, user, topic) in enumerate(zip(correct_answers, user_answers, topics)):
+        if topic not in keywords_by_topic:
+            keywords_by_topic[topic] = evaluator.load_keywords_for_topic(topic)
+        keywords = keywords_by_topic[topic]
+        fingerprint = answer_fingerprint(correct, user, topic)
+
+        old = previous[index] if index < len(previous) else None
+        if old is None:
+            stats.new += 1
+        elif old.get("fingerprint") != fingerprint:
+            stats.key_changed += 1
+        elif old.get("config") != component_fingerprint(old.get("path", ""), keywords, topic):
+            stats.config_changed += 1
+        else:
+            # Same answer, same configuration: recombine the stored components
+            stats.reused += 1
+            instrumentation.count("regrade.reused")
+            path, components = old["path"], dict(old["components"])
+            graded.append({
+                "fingerprint": fingerprint,
+                "config": old["config"],
+                "path": path,
+                "components": components,
+                "score": evaluator.combine_components(path, components),
+            })
+            continue
+
+        instrumentation.count("regrade.recomputed")
+        path, components, _ = evaluator.score_components(correct, user, keywords, topic)
+        graded.append({
+            "fingerprint": fingerprint,
+            "config": component_fingerprint(path, keywords, topic),
+            "path": path,
+            "components": components,
+            "score": evaluator.combine_components(path, components),
+        })
+
+    return graded
@@ -0,0 +1,216 @@
+# core/render_cache.py
+
+"""
+Content-addressed on-disk cache for rendered documents.
+
+Rendered PDFs and text exports are stored under a key derived from the
+content being rendered plus the layout options. Identical documents are then
+served as file copies instead of being rendered again. The cache is bounded
+in size and evicts least recently used entries.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+
+# Environment variable that enables the default cache for the CLI/GUI
+CACHE_DIR_ENV = "SMARTEST_RENDER_CACHE"
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class RenderCache:
+    """Size-bounded LRU cache of rendered files, keyed by content hash."""
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Open (or create) a cache directory.
+
+        Args:
+            directory: Directory holding cached files
+            max_bytes: Maximum total size of cached files
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> size, least recently used first
+        self._total_bytes = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        """Rebuild the LRU order from file modification times."""
+        files = []
+        for name in os.listdir(self.directory):
+            if name.startswith("."):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, name, stat.st_size))
+
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self._total_bytes += size
+
+    @staticmethod
+    def make_key(kind: str, content: Any, options: Dict[str, Any] = None) -> str:
+        """
+        Compute the cache key for a document.
+
+        Args:
+            kind: Document kind (e.g. "questions_pdf", "answers_txt")
+            content: JSON-serializable content that gets rendered
+            options: Layout options that influence the output
+
+        Returns:
+            Hex digest identifying the rendered document
+        """
+        payload = json.dumps(
+            {"kind": kind, "content": content, "options": options or {}},
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def fetch(self, key: str, filename: str) -> bool:
+        """
+        Copy a cached document to filename.
+
+        Returns:
+            True on a cache hit, False otherwise
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return False
+            self._entries.move_to_end(key)
+
+        path = self._path(key)
+        try:
+            shutil.copyfile(path, filename)
+            os.utime(path, None)
+        except FileNotFoundError:
+            # Removed behind our back - forget it
+            with self._lock:
+                size = self._entries.pop(key, 0)
+                self._total_bytes -= size
+                self.misses += 1
+            return False
+
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def store(self, key: str, filename: str):
+        """Add a freshly rendered file to the cache."""
+        size = os.path.getsize(filename)
+        if size > self.max_bytes:
+            return
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        os.close(fd)
+        try:
+            shutil.copyfile(filename, tmp_path)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            old_size = self._entries.pop(key, 0)
+            self._entries[key] = size
+            self._total_bytes += size - old_size
+            self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until under max_bytes (lock held)."""
+        while self._total_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def render(self, key: str, filename: str, render: Callable[[], None]) -> bool:
+        """
+        Serve filename from the cache or render it and store the result.
+
+        Args:
+            key: Cache key from make_key()
+            filename: Output filename
+            render: Callable that writes filename
+
+        Returns:
+            True if the document was served from the cache
+        """
+        if self.fetch(key, filename):
+            return True
+        render()
+        self.store(key, filename)
+        return False
+
+    def clear(self):
+        """Remove every cached document."""
+        with self._lock:
+            for key in list(self._entries):
+                try:
+                    os.remove(self._path(key))
+                except FileNotFoundError:
+                    pass
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> Optional[RenderCache]:
+    """
+    Return the process-wide cache configured through SMARTEST_RENDER_CACHE.
+
+    Returns:
+        RenderCache, or None when caching is not enabled
+    """
+    global _default_cache
+    directory = os.environ.get(CACHE_DIR_ENV)
+    if not directory:
+        return None
+
+    with _default_cache_lock:
+        if _default_cache is None or _default_cache.directory != directory:
+            _default_cache = RenderCache(directory)
+        return _default_cache
@@ -0,0 +1,534 @@
+# core/results_store.py
+
+"""
+Persistent store for generated tests, answer keys, submissions and scores.
+
+Results are kept in an SQLite database in WAL mode, so readers (reports, the
+GUI) never block the writer. Writes are queued and applied by a single
+writer thread, which drains everything queued so far and commits it in one
+transaction: when a whole lab submits at once, hundreds of submissions share
+a commit instead of serializing the grader on one fsync per row. Callers
+return as soon as their write is queued; flush() waits until it is on disk.
+
+Tables:
+    tests        one row per generated test (ID = fingerprint of its content)
+    questions    questions and answer keys of each test
+    submissions  one row per graded submission (student, test, average)
+    answers      per-answer student text, score, scoring path and components
+    item_stats   streaming statistics of each item (topic, variant, params),
+                 see core.item_stats; updated in the same transaction as
+                 the submissions, so they never need a rescan
+
+Indexes cover per-student (submissions.student) and per-question
+(answers.question_hash, questions.question_hash) queries; the question hash
+identifies the same question text across tests.
+
+Usage:
+    store = ResultsStore("results.db")
+    test_id = store.record_test(questions, answers, seed=2024)
+    store.record_submission("ana", questions, answers, user_answers, scores, test_id=test_id)
+    store.student_results("ana")
+    store.item_statistics(topic="n-queens")
+
+The CLI and GUI use the store named by SMARTEST_RESULTS_DB (get_default_store).
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+from . import instrumentation
+from .item_stats import MIN_COUNT, ItemStats, ItemStatsCollector, item_report, merge_by_topic
+
+logger = logging.getLogger(__name__)
+
+
+RESULTS_DB_ENV = "SMARTEST_RESULTS_DB"
+
+# Upper bound of writes committed in one transaction
+DEFAULT_BATCH_SIZE = 1000
+# Seconds between checks that the writer is still alive while flush() waits
+WRITER_CHECK_INTERVAL = 0.5
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tests (
+    id TEXT PRIMARY KEY,
+    created REAL NOT NULL,
+    seed INTEGER,
+    student TEXT,
+    num_questions INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS questions (
+    test_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    question_hash TEXT NOT NULL,
+    topic TEXT,
+    variant TEXT,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    params TEXT,
+    seed INTEGER,
+    PRIMARY KEY (test_id, position)
+);
+CREATE TABLE IF NOT EXISTS submissions (
+    id TEXT PRIMARY KEY,
+    test_id TEXT,
+    student TEXT,
+    submitted REAL NOT NULL,
+    num_answers INTEGER NOT NULL,
+    average REAL
+);
+CREATE TABLE IF NOT EXISTS answers (
+    submission_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    question_hash TEXT NOT NULL,
+    topic TEXT,
+    correct_answer TEXT,
+    user_answer TEXT,
+    score INTEGER,
+    path TEXT,
+    components TEXT,
+    PRIMARY KEY (submission_id, position)
+);
+CREATE TABLE IF NOT EXISTS item_stats (
+    topic TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    params TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    mean REAL NOT NULL,
+    m2 REAL NOT NULL,
+    passes INTEGER NOT NULL,
+    rest_count INTEGER NOT NULL,
+    pass_mean REAL NOT NULL,
+    pass_m2 REAL NOT NULL,
+    rest_mean REAL NOT NULL,
+    rest_m2 REAL NOT NULL,
+    comoment REAL NOT NULL,
+    histogram TEXT NOT NULL,
+    PRIMARY KEY (topic, variant, params)
+);
+CREATE INDEX IF NOT EXISTS idx_submissions_student ON submissions (student, submitted);
+CREATE INDEX IF NOT EXISTS idx_submissions_test ON submissions (test_id);
+CREATE INDEX IF NOT EXISTS idx_answers_question ON answers (question_hash);
+CREATE INDEX IF NOT EXISTS idx_questions_question ON questions (question_hash);
+CREATE INDEX IF NOT EXISTS idx_questions_topic ON questions (topic, variant);
+"""
+
+_STOP = object()
+
+
+def question_hash(question: str) -> str:
+    """Key of a question text, shared by every test containing it."""
+    return hashlib.sha256(question.encode("utf-8")).hexdigest()[:16]
+
+
+def test_fingerprint(questions: Sequence[Mapping[str, Any]], answers: Sequence[str]) -> str:
+    """
+    ID of a test: a digest of its questions and answer key.
+
+    The same generated test (e.g. regenerated from its seed, or read back
+    from a `generate` line when grading) always gets the same ID.
+    """
+    payload = json.dumps(
+        [[q.get("question", ""), answer] for q, answer in zip(questions, answers)],
+        ensure_ascii=False, separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    # WAL + NORMAL: durable at checkpoints, no fsync per transaction
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+class ResultsStore:
+    """SQLite results store with a batching writer thread."""
+
+    def __init__(self, path: str, batch_size: int = DEFAULT_BATCH_SIZE):
+        """
+        Open (and create if needed) a results database.
+
+        Args:
+            path: SQLite file
+            batch_size: Maximum number of queued writes per transaction
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.batches = 0
+        self.writes = 0
+        self.errors = 0
+
+        setup = _connect(path)
+        setup.executescript(_SCHEMA)
+        setup.commit()
+        setup.close()
+
+        self._reader = _connect(path)
+        self._reader_lock = threading.Lock()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="results-store-writer", daemon=True)
+        self._writer.start()
+
+    # --- Writes (queued) ---
+
+    def record_test(
+        self,
+        questions: Sequence[Mapping[str, Any]],
+        answers: Sequence[str],
+        seed: Optional[int] = None,
+        student: Any = None
+    ) -> str:
+        """
+        Queue a generated test and its answer key.
+
+        Args:
+            questions: Question dicts (as produced by TestBuilder)
+            answers: Correct answers, same order
+            seed: Seed the test was generated from
+            student: Student the test was generated for
+
+        Returns:
+            Test ID (see test_fingerprint)
+        """
+        answers = [_answer_text(answer) for answer in answers]
+        test_id = test_fingerprint(questions, answers)
+        test_row = (test_id, time.time(), seed, _text(student), len(questions))
+        question_rows = [
+            (
+                test_id, position, question_hash(q.get("question", "")), q.get("topic"), q.get("variant"),
+                q.get("question", ""), answer, json.dumps(dict(q.get("params") or {}), ensure_ascii=False),
+                q.get("seed"),
+            )
+            for position, (q, answer) in enumerate(zip(questions, answers), 1)
+        ]
+        self._put(("test", test_row, question_rows))
+        return test_id
+
+    def record_submission(
+        self,
+        student: Any,
+        questions: Sequence[Mapping[str, Any]],
+        correct_answers: Sequence[str],
+        user_answers: Sequence[str],
+        scores: Sequence[int],
+        graded: Optional[Sequence[Mapping[str, Any]]] = None,
+        test_id: Optional[str] = None
+    ) -> str:
+        """
+        Queue a graded submission.
+
+        Args:
+            student: Student identifier
+            questions: Question dicts (at least "question" and "topic";
+                "variant" and "params" identify the item in item_stats)
+            correct_answers: Answer key, same order
+            user_answers: Student answers, same order
+            scores: Scores, same order
+            graded: Stored answers of core.regrade (path and components), optional
+            test_id: ID of the recorded test (default: fingerprint of questions and answer key)
+
+        Returns:
+            Submission ID
+
+        Raises:
+            ValueError: If the lists (graded included) have different lengths
+            TypeError: If a score is not a number
+            RuntimeError: If the store is closed or its writer has stopped
+        """
+        lengths = {len(questions), len(correct_answers), len(user_answers), len(scores)}
+        if graded is not None:
+            lengths.add(len(graded))
+        if len(lengths) > 1:
+            raise ValueError(f"questions, answers, scores and graded differ in length: {sorted(lengths)}")
+        # Converted here, so a bad value fails in the caller instead of losing the writer's batch
+        correct_answers = [_answer_text(answer) for answer in correct_answers]
+        user_answers = [_answer_text(answer) for answer in user_answers]
+        scores = [_score(score) for score in scores]
+
+        submission_id = uuid.uuid4().hex
+        if test_id is None:
+            test_id = test_fingerprint(questions, correct_answers)
+        graded = graded or [{}] * len(scores)
+        answer_rows = [
+            (
+                submission_id, position, question_hash(q.get("question", "")), q.get("topic"),
+                correct, given, score, g.get("path"),
+                json.dumps(g["components"], ensure_ascii=False) if "components" in g else None,
+            )
+            for position, (q, correct, given, score, g) in enumerate(
+                zip(questions, correct_answers, user_answers, scores, graded), 1)
+        ]
+        average = sum(scores) / len(scores) if scores else None
+        submission_row = (submission_id, test_id, _text(student), time.time(), len(answer_rows), average)
+        items = ItemStatsCollector()
+        items.add_submission(questions, scores)
+        self._put(("submission", submission_row, (answer_rows, items)))
+        return submission_id
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued write is committed.
+
+        Returns:
+            False if the timeout expired first
+
+        Raises:
+            RuntimeError: If the writer thread has stopped (its queued writes are lost)
+        """
+        done = threading.Event()
+        self._put(("flush", done, None))
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = WRITER_CHECK_INTERVAL
+            if deadline is not None:
+                wait = max(0.0, min(wait, deadline - time.monotonic()))
+            if done.wait(wait):
+                return True
+            if not self._writer.is_alive():
+                raise RuntimeError("results store writer has stopped; queued writes were not saved")
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+
+    def close(self):
+        """Commit queued writes and stop the writer."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._writer.join()
+        with self._reader_lock:
+            self._reader.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _put(self, operation):
+        if self._closed:
+            raise RuntimeError("results store is closed")
+        if not self._writer.is_alive():
+            raise RuntimeError("results store writer has stopped")
+        self._queue.put(operation)
+
+    def _write_loop(self):
+        connection = _connect(self.path)
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            # Everything queued meanwhile goes into the same transaction
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            flushes = []
+            records = []
+            for operation in batch:
+                if operation is _STOP:
+                    stopping = True
+                elif operation[0] == "flush":
+                    flushes.append(operation[1])
+                else:
+                    records.append(operation)
+
+            if records:
+                try:
+                    self._write(connection, records)
+                    self.batches += 1
+                    self.writes += len(records)
+                    instrumentation.count("results_store.batches")
+                except Exception:
+                    # One bad record must not lose the rest of the batch (nor stop
+                    # the writer): retry them one by one and drop those that fail
+                    logger.warning("results store: batch of %d record(s) failed, retrying one by one", len(records))
+                    for record in records:
+                        try:
+                            self._write(connection, [record])
+                            self.writes += 1
+                        except Exception:
+                            self.errors += 1
+                            logger.exception("results store: dropped %s %s", record[0], record[1][0])
+
+            for done in flushes:
+                done.set()
+        connection.close()
+
+    def _write(self, connection: sqlite3.Connection, records: Sequence[tuple]):
+        """Write queued test and submission records in one transaction."""
+        tests, questions, submissions, answers = [], [], [], []
+        items = ItemStatsCollector()
+        for kind, row, rows in records:
+            if kind == "test":
+                tests.append(row)
+                questions.extend(rows)
+            else:
+                submissions.append(row)
+                answers.extend(rows[0])
+                items.merge(rows[1])
+
+        with instrumentation.stage("results_store.commit"), connection:
+            connection.executemany("INSERT OR REPLACE INTO tests VALUES (?, ?, ?, ?, ?)", tests)
+            connection.executemany("INSERT OR REPLACE INTO questions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", questions)
+            connection.executemany("INSERT INTO submissions VALUES (?, ?, ?, ?, ?, ?)", submissions)
+            connection.executemany("INSERT INTO answers VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", answers)
+            self._merge_item_stats(connection, items)
+
+    @staticmethod
+    def _merge_item_stats(connection: sqlite3.Connection, items: ItemStatsCollector):
+        """Merge the statistics of a batch into the stored ones (single writer, no race)."""
+        rows = []
+        for key, stats in items.items.items():
+            stored = connection.execute(
+                "SELECT count, mean, m2, passes, rest_count, pass_mean, pass_m2, rest_mean, rest_m2, comoment, "
+                "histogram FROM item_stats WHERE topic = ? AND variant = ? AND params = ?", key).fetchone()
+            if stored is not None:
+                merged = ItemStats.from_state(stored)
+                merged.merge(stats)
+                stats = merged
+            rows.append(tuple(key) + tuple(stats.to_state()))
+        connection.executemany(
+            "INSERT OR REPLACE INTO item_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    # --- Queries (pending writes are flushed first) ---
+
+    def _query(self, sql: str, params: Sequence[Any] = ()) -> List[Dict[str, Any]]:
+        self.flush()
+        with self._reader_lock:
+            cursor = self._reader.execute(sql, params)
+            names = [column[0] for column in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def student_results(self, student: Any) -> List[Dict[str, Any]]:
+        """Submissions of a student, oldest first."""
+        return self._query(
+            "SELECT id, test_id, student, submitted, num_answers, average FROM submissions "
+            "WHERE student = ? ORDER BY submitted", (_text(student),))
+
+    def submission_answers(self, submission_id: str) -> List[Dict[str, Any]]:
+        """Answers and scores of one submission, in question order."""
+        rows = self._query(
+            "SELECT position, question_hash, topic, correct_answer, user_answer, score, path, components "
+            "FROM answers WHERE submission_id = ? ORDER BY position", (submission_id,))
+        for row in rows:
+            row["components"] = json.loads(row["components"]) if row["components"] else None
+        return rows
+
+    def question_results(self, question: str) -> List[Dict[str, Any]]:
+        """Every recorded answer to a question (by question text), with the student."""
+        return self._query(
+            "SELECT s.student, s.submitted, a.submission_id, a.user_answer, a.score "
+            "FROM answers a JOIN submissions s ON s.id = a.submission_id "
+            "WHERE a.question_hash = ? ORDER BY s.submitted", (question_hash(question),))
+
+    def test_questions(self, test_id: str) -> List[Dict[str, Any]]:
+        """Questions and answer key of a recorded test."""
+        rows = self._query(
+            "SELECT position, topic, variant, question, answer, params, seed FROM questions "
+            "WHERE test_id = ? ORDER BY position", (test_id,))
+        for row in rows:
+            row["params"] = json.loads(row["params"]) if row["params"] else {}
+        return rows
+
+    def item_accumulators(self, topic: Optional[str] = None) -> Dict[tuple, ItemStats]:
+        """Stored ItemStats by (topic, variant, params JSON), optionally of one topic."""
+        sql = ("SELECT topic, variant, params, count, mean, m2, passes, rest_count, pass_mean, pass_m2, "
+               "rest_mean, rest_m2, comoment, histogram FROM item_stats")
+        rows = self._query(sql + " WHERE topic = ?", (topic,)) if topic else self._query(sql)
+        return {
+            (row["topic"], row["variant"], row["params"]): ItemStats.from_state(list(row.values())[3:])
+            for row in rows
+        }
+
+    def item_answer_count(self) -> int:
+        """Number of answers in the item statistics (changes whenever new answers are merged)."""
+        return self._query("SELECT COALESCE(SUM(count), 0) AS answers FROM item_stats")[0]["answers"]
+
+    def item_statistics(self, topic: Optional[str] = None, min_count: int = MIN_COUNT) -> List[Dict[str, Any]]:
+        """
+        Difficulty and discrimination of every recorded item (see core.item_stats).
+
+        Args:
+            topic: Only the items of this topic
+            min_count: Items with fewer answers are not flagged
+
+        Returns:
+            item_stats.item_report rows, flagged items first
+        """
+        return item_report(self.item_accumulators(topic), min_count)
+
+    def topic_statistics(self, min_count: int = MIN_COUNT) -> List[Dict[str, Any]]:
+        """Statistics of every topic, all its variants and params merged."""
+        report = []
+        for topic, stats in sorted(merge_by_topic(self.item_accumulators()).items()):
+            row = {"topic": topic}
+            row.update(stats.summary(min_count))
+            report.append(row)
+        return report
+
+    def stats(self) -> Dict[str, Any]:
+        """Row counts and writer counters."""
+        counts = self._query(
+            "SELECT (SELECT COUNT(*) FROM tests) AS tests, (SELECT COUNT(*) FROM submissions) AS submissions, "
+            "(SELECT COUNT(*) FROM answers) AS answers")[0]
+        counts.update(batches=self.batches, writes=self.writes, errors=self.errors)
+        return counts
+
+
+def _text(value: Any) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def _answer_text(value: Any) -> str:
+    """Answers are stored as text; structured answers (lists, dicts) as JSON."""
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, default=str)
+
+
+def _score(value: Any) -> int:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise TypeError(f"score must be a number, not {type(value).__name__}")
+    return int(round(value))
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_default_store() -> Optional[ResultsStore]:
+    """
+    Return the process-wide store named by SMARTEST_RESULTS_DB.
+
+    Returns:
+        The store, or None when SMARTEST_RESULTS_DB is not set
+    """
+    global _default_store
+    if _default_store is not None:
+        return _default_store
+
+    path = os.environ.get(RESULTS_DB_ENV)
+    if not path:
+        return None
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ResultsStore(path)
+            # Queued writes must reach the database before the process exits
+            atexit.register(_default_store.close)
+        return _default_store
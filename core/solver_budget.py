@@ -0,0 +1,124 @@
+# core/solver_budget.py
+
+"""
+Time and node budgets for solvers, with cooperative cancellation.
+
+Every generate_custom call runs inside a budget scope. Solvers call tick()
+in their inner loops; once the budget's deadline or node limit is passed,
+tick() raises BudgetExceeded and the handler falls back to re-sampled
+parameters or a cheaper variant (see BaseQuestionHandler.generate_detailed).
+
+Outside a budget scope tick() does nothing, so solvers can also be called
+directly.
+
+Defaults come from SMARTEST_SOLVER_TIMEOUT (seconds) and
+SMARTEST_SOLVER_MAX_NODES, or set_default_limits().
+"""
+
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+
+TIMEOUT_ENV = "SMARTEST_SOLVER_TIMEOUT"
+MAX_NODES_ENV = "SMARTEST_SOLVER_MAX_NODES"
+
+DEFAULT_MAX_SECONDS = 1.0
+DEFAULT_MAX_NODES = 5_000_000
+
+# The clock is read once every CLOCK_INTERVAL nodes
+CLOCK_INTERVAL = 1024
+
+_default_max_seconds = float(os.environ.get(TIMEOUT_ENV, DEFAULT_MAX_SECONDS))
+_default_max_nodes = int(os.environ.get(MAX_NODES_ENV, DEFAULT_MAX_NODES))
+
+_current_budget = contextvars.ContextVar("smartest_solver_budget", default=None)
+
+
+class BudgetExceeded(Exception):
+    """Raised by tick() when a solver runs out of time or nodes."""
+
+
+class SolverBudget:
+    """
+    Time and node limits for one solver run.
+
+    A budget is started when its scope is entered; use one instance per
+    generation call (instances are not shared between threads).
+    """
+    __slots__ = ("max_seconds", "max_nodes", "nodes", "deadline", "_next_clock_check")
+
+    def __init__(self, max_seconds: Optional[float] = None, max_nodes: Optional[int] = None):
+        """
+        Args:
+            max_seconds: Wall-clock limit (None = unlimited)
+            max_nodes: Limit on nodes reported through tick() (None = unlimited)
+        """
+        self.max_seconds = max_seconds
+        self.max_nodes = max_nodes
+        self.nodes = 0
+        self.deadline = None
+        self._next_clock_check = CLOCK_INTERVAL
+
+    @classmethod
+    def default(cls) -> "SolverBudget":
+        """New budget with the process-wide default limits."""
+        return cls(_default_max_seconds, _default_max_nodes)
+
+    def start(self):
+        """Reset the node count and start the clock."""
+        self.nodes = 0
+        self._next_clock_check = CLOCK_INTERVAL
+        self.deadline = time.perf_counter() + self.max_seconds if self.max_seconds is not None else None
+
+    def tick(self, nodes: int = 1):
+        """
+        Account for explored nodes.
+
+        Raises:
+            BudgetExceeded: If the node limit or the deadline is passed
+        """
+        self.nodes += nodes
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise BudgetExceeded(f"node limit of {self.max_nodes} exceeded")
+        if self.deadline is not None and self.nodes >= self._next_clock_check:
+            self._next_clock_check = self.nodes + CLOCK_INTERVAL
+            if time.perf_counter() > self.deadline:
+                raise BudgetExceeded(f"time limit of {self.max_seconds}s exceeded")
+
+
+def set_default_limits(max_seconds: Optional[float] = DEFAULT_MAX_SECONDS, max_nodes: Optional[int] = DEFAULT_MAX_NODES):
+    """Change the limits used by SolverBudget.default() (None = unlimited)."""
+    global _default_max_seconds, _default_max_nodes
+    _default_max_seconds = max_seconds
+    _default_max_nodes = max_nodes
+
+
+@contextmanager
+def budget_scope(budget: SolverBudget):
+    """Start `budget` and make it the current budget for the block."""
+    budget.start()
+    token = _current_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _current_budget.reset(token)
+
+
+def current_budget() -> Optional[SolverBudget]:
+    """Budget of the running solver, or None outside a budget scope."""
+    return _current_budget.get()
+
+
+def tick(nodes: int = 1):
+    """
+    Report explored nodes to the current budget (no-op outside a scope).
+
+    Raises:
+        BudgetExceeded: If the current budget is exhausted
+    """
+    budget = _current_budget.get()
+    if budget is not None:
+        budget.tick(nodes)
@@ -1,8 +1,11 @@
 # core/test_builder.py
 
 import random
-from typing import List, Dict, Any, Tuple
-from .question_factory import generate_question_and_answer
+from typing import List, Dict, Any, Iterator, Tuple
+from .base_question_handler import current_rng
+from .question_factory import GeneratedItem, generate_item
+from .records import AnswerKeyRecord, QuestionRecord
+from .topic_catalog import catalog
 
 
 class TestBuilder:
@@ -11,22 +14,21 @@ class TestBuilder:
     Allows selecting topics and generating multiple questions.
     """
     
-    # Available topics/chapters
-    AVAILABLE_TOPICS = {
-        "n-queens": "N-Queens Problem (Backtracking)",
-        "knights-tour": "Knight's Tour Problem",
-        "graph-coloring": "Graph Coloring (CSP)",
-        "generalised-hanoi": "Generalized Hanoi Towers",
-        "minimax": "Minimax with Alpha-Beta Pruning",
-        "nash-equilibrium": "Nash Equilibrium (Game Theory)",
-        "csp": "Constraint Satisfaction Problems",
-    }
+    # Available topics/chapters (defined once in the topic catalog)
+    AVAILABLE_TOPICS = catalog.names()
     
-    def __init__(self):
-        """Initialize the test builder."""
+    def __init__(self, cache=None):
+        """
+        Initialize the test builder.
+        
+        Args:
+            cache: Optional RenderCache used by the save_*_to_file methods
+        """
+        self.cache = cache
         self.questions = []
         self.answers = []
         self.topics = []
+        self.seed = None
     
     def get_available_topics(self) -> Dict[str, str]:
         """
@@ -41,60 +43,197 @@ class TestBuilder:
         self, 
         topics: List[str] = None, 
         num_questions: int = 5,
-        params: Dict[str, Any] = None
+        params: Dict[str, Any] = None,
+        stratified: bool = True,
+        seed: int = None
     ) -> Tuple[List[Dict[str, Any]], List[str]]:
         """
-        Generate a test with multiple questions.
+        Generate a test with multiple questions and keep it on the builder.
         
         Args:
             topics: List of topic IDs to include. If None, uses all topics.
             num_questions: Number of questions to generate
             params: Optional parameters for question generation
+            stratified: Spread each topic's questions evenly over its
+                variants and parameter combinations (see TopicCatalog)
+            seed: Seed for the whole test (random if None)
             
         Returns:
             Tuple of (questions_list, answers_list)
-            Each question is a dict with: {id, topic, question, params}
+            Each question is a dict with: {id, topic, topic_name, question,
+            params, variant, seed}
             Each answer is a string
         """
-        params = params or {}
+        valid_topics = self._validate_topics(topics)
+        questions, answers = self.build_test(valid_topics, num_questions, params, stratified, seed)
         
-        # Use all topics if none specified
-        if not topics:
-            topics = list(self.AVAILABLE_TOPICS.keys())
+        # Store for later use
+        self.questions = questions
+        self.answers = answers
+        self.topics = valid_topics
+        self.seed = seed
         
-        # Validate topics
-        valid_topics = [t for t in topics if t in self.AVAILABLE_TOPICS]
-        if not valid_topics:
-            raise ValueError(f"No valid topics provided. Available: {list(self.AVAILABLE_TOPICS.keys())}")
+        return questions, answers
+    
+    def build_test(
+        self,
+        topics: List[str] = None,
+        num_questions: int = 5,
+        params: Dict[str, Any] = None,
+        stratified: bool = True,
+        seed: int = None
+    ) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """
+        Generate a test without touching the builder's state.
+        
+        Safe to call from many threads on one shared builder.
         
+        Returns:
+            Tuple of (questions_list, answers_list), as generate_test
+        """
         questions = []
         answers = []
         
-        for i in range(num_questions):
-            # Select topic (cycle through if more questions than topics)
-            topic = valid_topics[i % len(valid_topics)]
-            
-            # Generate question and answer
-            question_text, answer_text = generate_question_and_answer(topic, params)
+        for question_obj, answer_text in self.iter_test(topics, num_questions, params, stratified, seed):
+            questions.append(question_obj)
+            answers.append(answer_text)
+        
+        return questions, answers
+    
+    def build_records(
+        self,
+        topics: List[str] = None,
+        num_questions: int = 5,
+        params: Dict[str, Any] = None,
+        stratified: bool = True,
+        seed: int = None
+    ) -> Tuple[List[QuestionRecord], List[AnswerKeyRecord]]:
+        """
+        Generate a test as compact records (for mass generation and grading).
+        
+        Same questions as build_test with the same seed; use
+        QuestionRecord.to_dict() where the dict format is needed.
+        
+        Returns:
+            Tuple of (question_records, answer_key_records)
+        """
+        questions = []
+        answers = []
+        
+        for i, item in enumerate(self.iter_items(topics, num_questions, params, stratified, seed)):
+            questions.append(QuestionRecord(
+                i + 1, item.topic, item.question, item.params, item.variant_id, item.seed, item.fallback
+            ))
+            answers.append(AnswerKeyRecord(i + 1, item.topic, item.answer))
+        
+        return questions, answers
+    
+    def iter_test(
+        self,
+        topics: List[str] = None,
+        num_questions: int = 5,
+        params: Dict[str, Any] = None,
+        stratified: bool = True,
+        seed: int = None
+    ) -> Iterator[Tuple[Dict[str, Any], str]]:
+        """
+        Generate a test one question at a time.
+        
+        Useful for showing progress while a long test is being generated.
+        Results are not stored on the builder; use generate_test for that.
+        
+        Args:
+            topics: List of topic IDs to include. If None, uses all topics.
+            num_questions: Number of questions to generate
+            params: Optional parameters for question generation; they
+                override the sampled parameter values
+            stratified: Spread each topic's questions evenly over its
+                variants and parameter combinations
+            seed: Seed for the whole test (random if None)
             
+        Yields:
+            Tuples of (question_obj, answer_text) in question order
+        """
+        for i, item in enumerate(self.iter_items(topics, num_questions, params, stratified, seed)):
             # Create question object
             question_obj = {
                 "id": i + 1,
-                "topic": topic,
-                "topic_name": self.AVAILABLE_TOPICS[topic],
-                "question": question_text,
-                "params": params.copy()
+                "topic": item.topic,
+                "topic_name": self.AVAILABLE_TOPICS[item.topic],
+                "question": item.question,
+                "params": dict(item.params),
+                "variant": item.variant_id,
+                "seed": item.seed,
             }
+            if item.fallback:
+                # The solver ran out of budget (see BaseQuestionHandler.generate_detailed)
+                question_obj["fallback"] = item.fallback
             
-            questions.append(question_obj)
-            answers.append(answer_text)
+            yield question_obj, item.answer
+    
+    def iter_items(
+        self,
+        topics: List[str] = None,
+        num_questions: int = 5,
+        params: Dict[str, Any] = None,
+        stratified: bool = True,
+        seed: int = None
+    ) -> Iterator[GeneratedItem]:
+        """
+        Generate a test as immutable items (reentrant, no shared state).
         
-        # Store for later use
-        self.questions = questions
-        self.answers = answers
-        self.topics = valid_topics
+        Every question gets its own seed derived from the test seed, so a
+        single question can be regenerated from its item with
+        generate_item(item.topic, item.params, seed=item.seed, variant_id=item.variant_id).
         
-        return questions, answers
+        Args:
+            topics: List of topic IDs to include. If None, uses all topics.
+            num_questions: Number of questions to generate
+            params: Optional parameters; they override the sampled values
+            stratified: Spread each topic's questions evenly over its
+                variants and parameter combinations
+            seed: Seed for the whole test (random if None)
+            
+        Yields:
+            GeneratedItem per question, in question order
+        """
+        params = dict(params or {})
+        valid_topics = self._validate_topics(topics)
+        rng = random.Random(seed) if seed is not None else random.Random(current_rng().getrandbits(63))
+        
+        # Select topics (cycle through if more questions than topics)
+        topic_sequence = [valid_topics[i % len(valid_topics)] for i in range(num_questions)]
+        
+        # Draw every (variant, params) combination before repeating one
+        samples = {}
+        if stratified:
+            for topic in valid_topics:
+                samples[topic] = iter(catalog.sample_stratified(topic, topic_sequence.count(topic), rng))
+        
+        for topic in topic_sequence:
+            variant_index, question_params = next(samples.get(topic, iter(())), (None, {}))
+            question_params.update(params)
+            
+            yield generate_item(topic, question_params, variant_index, seed=rng.getrandbits(63))
+    
+    def _validate_topics(self, topics: List[str] = None) -> List[str]:
+        """
+        Keep only known topics (all topics if none are given).
+        
+        Raises:
+            ValueError: If none of the given topics is available
+        """
+        # Use all topics if none specified
+        if not topics:
+            topics = list(self.AVAILABLE_TOPICS.keys())
+        
+        # Validate topics (any alias is accepted and mapped to its canonical ID)
+        resolved = (catalog.resolve(t) for t in topics)
+        valid_topics = [t for t in resolved if t in self.AVAILABLE_TOPICS]
+        if not valid_topics:
+            raise ValueError(f"No valid topics provided. Available: {list(self.AVAILABLE_TOPICS.keys())}")
+        
+        return valid_topics
     
     def get_questions_text(self, include_topic: bool = True) -> str:
         """
@@ -167,9 +306,14 @@ class TestBuilder:
         if not filename.endswith('.txt'):
             filename += '.txt'
         
-        content = self.get_questions_text(include_topic)
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(content)
+        content = [
+            [q['id'], q['topic_name'] if include_topic else None, q['question']]
+            for q in self.questions
+        ]
+        self._write_text(
+            "questions_txt", content, filename,
+            lambda: self.get_questions_text(include_topic)
+        )
     
     def save_answers_to_file(self, filename: str):
         """
@@ -184,6 +328,48 @@ class TestBuilder:
         if not filename.endswith('.txt'):
             filename += '.txt'
         
-        content = self.get_answers_text()
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(content)
+        self._write_text("answers_txt", list(self.answers), filename, self.get_answers_text)
+    
+    def save_test_to_file(self, filename: str, compress: bool = True):
+        """
+        Save the test in the versioned test format (see core.test_format),
+        so it can be answered and graded later.
+        
+        Args:
+            filename: Output filename (sanitized)
+            compress: Compress every question record
+            
+        Returns:
+            Name of the written file
+        """
+        from .test_format import FILE_EXTENSION, save_test
+        
+        # Sanitize filename
+        import os
+        filename = os.path.basename(filename)  # Remove any path components
+        if not filename.endswith(FILE_EXTENSION):
+            filename += FILE_EXTENSION
+        
+        save_test(filename, self.questions, self.answers, seed=self.seed, compress=compress)
+        return filename
+    
+    def _write_text(self, kind: str, content, filename: str, render_text):
+        """
+        Write a text export, serving it from the render cache when possible.
+        
+        Args:
+            kind: Document kind used in the cache key
+            content: Content being rendered (JSON-serializable)
+            filename: Output filename
+            render_text: Callable returning the formatted text
+        """
+        def render():
+            with open(filename, 'w', encoding='utf-8') as f:
+                f.write(render_text())
+        
+        if self.cache is None:
+            render()
+            return
+        
+        key = self.cache.make_key(kind, content)
+        self.cache.render(key, filename, render)
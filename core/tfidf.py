@@ -0,0 +1,210 @@
+# core/tfidf.py
+
+"""
+Per-topic TF-IDF similarity for free-text answers.
+
+A sparse TF-IDF index is built once per topic from the template's answer
+and question texts and its keywords. Answers are turned into L2-normalized
+sparse vectors (sublinear term frequency times IDF) and compared with cosine
+similarity: a word-level, order-insensitive signal that costs O(words)
+instead of the character-level fuzzy ratio.
+
+Words missing from the topic vocabulary (numbers, names produced by the
+solvers, ...) are hashed into OOV_BUCKETS extra columns with the highest
+IDF, so they still match between the answer key and the student answer.
+
+For a whole class, batch_similarity() scores every (key, answer) pair and
+similarity_matrix() compares every text with every other as sparse matrix
+products; SciPy is used when installed, otherwise plain dict vectors.
+
+The signal is opt-in: the evaluator computes it only when
+SCORING_WEIGHTS["tfidf"] is above 0 (the default is 0; calibrate a weight
+with tools/calibrate_weights.py first), one answer at a time. Neither
+evaluate_answer nor evaluate_batch uses batch_similarity() or
+similarity_matrix(); they are for callers that score many pairs at once.
+
+Usage:
+    index = tfidf_for_topic("graph-coloring")
+    index.similarity(correct_answer, user_answer)    # 0-100
+"""
+
+import hashlib
+import json
+import math
+import re
+import zlib
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterable, List, Sequence
+
+from unidecode import unidecode
+
+from . import instrumentation
+from .topic_catalog import catalog
+
+try:
+    import scipy.sparse as sparse
+    SCIPY_AVAILABLE = True
+except ImportError:
+    sparse = None
+    SCIPY_AVAILABLE = False
+
+
+# Extra columns for out-of-vocabulary words
+OOV_BUCKETS = 1 << 12
+
+# Very common Romanian and English words carry no meaning for grading
+STOP_WORDS = frozenset("""
+    a al ale am an and are as at au be but by ca care ce cu cum de din
+    do for from in is it la le lui mai of on or pe sa se si sunt the this
+    to un una unei unui va was what which with
+""".split())
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+_PLACEHOLDER_RE = re.compile(r'\{[^}]*\}')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, transliterate and split into words (stop words and single letters removed)."""
+    return [
+        token for token in _TOKEN_RE.findall(unidecode(text.lower()))
+        if token not in STOP_WORDS and (len(token) > 1 or token.isdigit())
+    ]
+
+
+class TopicTfidf:
+    """TF-IDF vocabulary of one topic."""
+
+    def __init__(self, documents: Iterable[str]):
+        """
+        Args:
+            documents: Texts the vocabulary and IDF are computed from
+        """
+        document_frequency = Counter()
+        count = 0
+        for document in documents:
+            document_frequency.update(set(tokenize(document)))
+            count += 1
+
+        self.vocabulary: Dict[str, int] = {token: i for i, token in enumerate(sorted(document_frequency))}
+        # Smoothed IDF; unseen words get the highest value (as if df = 0)
+        self.idf = [math.log((1 + count) / (1 + document_frequency[token])) + 1 for token in sorted(document_frequency)]
+        self.oov_idf = math.log(1 + count) + 1
+        self.n_features = len(self.vocabulary) + OOV_BUCKETS
+        self._vector_cached = lru_cache(maxsize=4096)(self._vector)
+
+    @property
+    def fingerprint(self) -> str:
+        """Digest of the vocabulary and IDF (changes when the template texts change)."""
+        payload = json.dumps([sorted(self.vocabulary.items()), [round(v, 9) for v in self.idf], OOV_BUCKETS])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+    def _column(self, token: str) -> int:
+        column = self.vocabulary.get(token)
+        if column is None:
+            # crc32 (not hash()) so columns are the same in every process
+            column = len(self.vocabulary) + zlib.crc32(token.encode("utf-8")) % OOV_BUCKETS
+        return column
+
+    def _vector(self, text: str) -> Dict[int, float]:
+        weights: Dict[int, float] = {}
+        for token, tf in Counter(tokenize(text)).items():
+            column = self._column(token)
+            idf = self.idf[column] if column < len(self.idf) else self.oov_idf
+            weights[column] = weights.get(column, 0.0) + (1 + math.log(tf)) * idf
+
+        norm = math.sqrt(sum(w * w for w in weights.values()))
+        if norm:
+            for column in weights:
+                weights[column] /= norm
+        return weights
+
+    def vector(self, text: str) -> Dict[int, float]:
+        """
+        L2-normalized sparse vector of a text, as {column: weight}.
+
+        Vectors are cached and shared: do not modify the returned dict.
+        """
+        return self._vector_cached(text)
+
+    def similarity(self, text_a: str, text_b: str) -> int:
+        """Cosine similarity of two texts, 0-100."""
+        with instrumentation.stage("evaluate.tfidf"):
+            a, b = self.vector(text_a), self.vector(text_b)
+            if len(a) > len(b):
+                a, b = b, a
+            dot = sum(weight * b.get(column, 0.0) for column, weight in a.items())
+        return max(0, min(100, int(round(dot * 100))))
+
+    def matrix(self, texts: Sequence[str]):
+        """
+        Sparse matrix with one normalized row per text.
+
+        Returns:
+            scipy.sparse.csr_matrix of shape (len(texts), n_features), or
+            the list of dict vectors when SciPy is not installed
+        """
+        vectors = [self.vector(text) for text in texts]
+        if not SCIPY_AVAILABLE:
+            return vectors
+
+        indptr, indices, data = [0], [], []
+        for vector in vectors:
+            indices.extend(vector.keys())
+            data.extend(vector.values())
+            indptr.append(len(indices))
+        return sparse.csr_matrix((data, indices, indptr), shape=(len(vectors), self.n_features))
+
+    def batch_similarity(self, texts_a: Sequence[str], texts_b: Sequence[str]) -> List[int]:
+        """
+        Cosine similarity of each pair (texts_a[i], texts_b[i]), 0-100.
+
+        With SciPy this is one element-wise sparse product over the whole batch.
+        """
+        if not SCIPY_AVAILABLE:
+            return [self.similarity(a, b) for a, b in zip(texts_a, texts_b)]
+
+        with instrumentation.stage("evaluate.tfidf"):
+            dots = self.matrix(texts_a).multiply(self.matrix(texts_b)).sum(axis=1)
+        return [max(0, min(100, int(round(float(dot) * 100)))) for dot in dots.A1]
+
+    def similarity_matrix(self, texts_a: Sequence[str], texts_b: Sequence[str] = None) -> List[List[int]]:
+        """
+        Cosine similarity of every text in texts_a with every text in texts_b
+        (default: texts_a itself), 0-100, as one sparse matrix product.
+        """
+        texts_b = texts_a if texts_b is None else texts_b
+        if not SCIPY_AVAILABLE:
+            return [[self.similarity(a, b) for b in texts_b] for a in texts_a]
+
+        with instrumentation.stage("evaluate.tfidf"):
+            product = (self.matrix(texts_a) @ self.matrix(texts_b).T).toarray()
+        return [[max(0, min(100, int(round(value * 100)))) for value in row] for row in product]
+
+
+def _template_documents(topic: str) -> List[str]:
+    try:
+        with open(catalog.template_path(topic), "r", encoding="utf-8") as f:
+            template = json.load(f)
+    except (OSError, ValueError):
+        return []
+
+    documents = []
+    for variant in template.get("questions", []):
+        for field in ("answer", "question"):
+            text = _PLACEHOLDER_RE.sub(" ", variant.get(field, ""))
+            if text.strip():
+                documents.append(text)
+    documents.extend(template.get("keywords", []))
+    return documents
+
+
+@lru_cache(maxsize=None)
+def _tfidf_cached(template_key: str) -> TopicTfidf:
+    return TopicTfidf(_template_documents(template_key))
+
+
+def tfidf_for_topic(topic: str) -> TopicTfidf:
+    """TF-IDF index of a topic (built on first use, then shared)."""
+    spec = catalog.spec(topic)
+    return _tfidf_cached(spec.id if spec else topic)
@@ -0,0 +1,241 @@
+# core/topic_catalog.py
+
+"""
+Single catalog of exam topics.
+
+Every topic is declared once here: its canonical ID, display name, template
+file and handler class. Aliases (hyphen/underscore spellings, template names)
+resolve to the canonical ID with one dictionary lookup.
+
+For each topic the catalog also precomputes the question variants and the
+cartesian product of the template parameter choices, which allows stratified
+sampling: a large exam walks through every (variant, parameters) combination
+before repeating one, instead of relying on repeated random draws.
+"""
+
+import importlib
+import itertools
+import json
+import os
+import random
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+
+TEMPLATES_PATH = os.path.join(os.path.dirname(__file__), "..", "templates")
+
+
+class TopicSpec(NamedTuple):
+    """Static description of a topic."""
+    id: str
+    name: str
+    template: str
+    handler: str  # "module.ClassName" relative to core.question_handlers
+
+
+TOPICS = (
+    TopicSpec("n-queens", "N-Queens Problem (Backtracking)",
+              "n_queens", "n_queens_handler.NQueensHandler"),
+    TopicSpec("knights-tour", "Knight's Tour Problem",
+              "knights_tour", "knights_tour_handler.KnightsTourHandler"),
+    TopicSpec("graph-coloring", "Graph Coloring (CSP)",
+              "graph_coloring", "graph_coloring_handler.GraphColoringHandler"),
+    TopicSpec("generalised-hanoi", "Generalized Hanoi Towers",
+              "generalised_hanoi", "generalised_hanoi_handler.GeneralisedHanoiHandler"),
+    TopicSpec("minimax", "Minimax with Alpha-Beta Pruning",
+              "minimax", "minimax_handler.MinimaxHandler"),
+    TopicSpec("nash-equilibrium", "Nash Equilibrium (Game Theory)",
+              "nash_equilibrium", "nash_equilibrium_handler.NashEquilibriumHandler"),
+    TopicSpec("csp", "Constraint Satisfaction Problems",
+              "csp", "csp_handler.CSPHandler"),
+)
+
+
+class TopicCatalog:
+    """Topic registry with O(1) alias resolution and parameter-space metadata."""
+
+    def __init__(self, specs=TOPICS, templates_path: str = TEMPLATES_PATH):
+        """
+        Build the catalog.
+
+        Args:
+            specs: Topic specifications
+            templates_path: Directory containing the JSON templates
+        """
+        self.templates_path = templates_path
+        self._specs: Dict[str, TopicSpec] = {}
+        self._aliases: Dict[str, str] = {}
+        self._strata: Dict[str, Tuple[Tuple[int, Dict[str, Any]], ...]] = {}
+        self._lock = threading.Lock()
+
+        for spec in specs:
+            self._specs[spec.id] = spec
+            for alias in (spec.id, spec.id.replace("-", "_"), spec.template, spec.template.replace("_", "-")):
+                self._aliases[alias] = spec.id
+
+    # --- Identity ---
+
+    def resolve(self, topic: str) -> Optional[str]:
+        """
+        Resolve any spelling of a topic to its canonical ID.
+
+        Returns:
+            Canonical topic ID, or None for unknown topics
+        """
+        if not topic:
+            return None
+        return self._aliases.get(topic) or self._aliases.get(topic.strip().lower())
+
+    def spec(self, topic: str) -> Optional[TopicSpec]:
+        """Specification of a topic (any alias), or None."""
+        topic_id = self.resolve(topic)
+        return self._specs[topic_id] if topic_id else None
+
+    def ids(self) -> List[str]:
+        """Canonical topic IDs in catalog order."""
+        return list(self._specs)
+
+    def names(self) -> Dict[str, str]:
+        """Mapping of canonical topic ID to display name."""
+        return {topic_id: spec.name for topic_id, spec in self._specs.items()}
+
+    def aliases(self) -> Dict[str, str]:
+        """Mapping of every accepted spelling to its canonical ID."""
+        return dict(self._aliases)
+
+    def template_path(self, topic: str) -> str:
+        """
+        Path of the JSON template for a topic.
+
+        Unknown topics map to "<topic>.json" so custom templates without a
+        catalog entry keep working.
+        """
+        spec = self.spec(topic)
+        stem = spec.template if spec else topic.replace("-", "_")
+        return os.path.normpath(os.path.join(self.templates_path, f"{stem}.json"))
+
+    def handler_path(self, topic: str) -> Optional[str]:
+        """Handler "module.ClassName" path for a topic, or None."""
+        spec = self.spec(topic)
+        return spec.handler if spec else None
+
+    # --- Parameter space ---
+
+    def _load_template(self, topic: str) -> Dict[str, Any]:
+        try:
+            with open(self.template_path(topic), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def variants(self, topic: str) -> Tuple[str, ...]:
+        """Variant IDs of a topic, in template order."""
+        template = self._load_template(topic)
+        return tuple(
+            variant.get("id", str(index))
+            for index, variant in enumerate(template.get("questions", []))
+        )
+
+    def param_space(self, topic: str) -> Tuple[Dict[str, Any], ...]:
+        """
+        Cartesian product of the parameter choices declared in the template.
+
+        Parameters without choices contribute their default. Combinations
+        rejected by the handler's is_valid_params() are dropped.
+        """
+        return tuple(params for variant_index, params in self.strata(topic) if variant_index == 0) or ({},)
+
+    def strata(self, topic: str) -> Tuple[Tuple[int, Dict[str, Any]], ...]:
+        """
+        Every (variant_index, params) combination of a topic (precomputed once).
+
+        Returns:
+            Tuple of (variant_index, params) pairs
+        """
+        topic_id = self.resolve(topic) or topic
+        strata = self._strata.get(topic_id)
+        if strata is None:
+            strata = self._build_strata(topic_id)
+            with self._lock:
+                strata = self._strata.setdefault(topic_id, strata)
+        return strata
+
+    def _build_strata(self, topic: str) -> Tuple[Tuple[int, Dict[str, Any]], ...]:
+        template = self._load_template(topic)
+        params_definition = template.get("params", {})
+
+        names = []
+        values = []
+        for key, meta in params_definition.items():
+            names.append(key)
+            if isinstance(meta, dict) and meta.get("choices"):
+                values.append(list(meta["choices"]))
+            elif isinstance(meta, dict):
+                values.append([meta.get("default")])
+            else:
+                values.append([meta])
+
+        is_valid = self._validity_check(topic)
+        combos = [
+            params for params in (dict(zip(names, combo)) for combo in itertools.product(*values))
+            if is_valid(params)
+        ] or [{}]
+
+        variant_count = len(template.get("questions", []))
+        return tuple(
+            (variant_index, params)
+            for variant_index in range(variant_count)
+            for params in combos
+        )
+
+    def _validity_check(self, topic: str):
+        handler_path = self.handler_path(topic)
+        if not handler_path:
+            return lambda params: True
+        module_name, class_name = handler_path.rsplit(".", 1)
+        module = importlib.import_module(f".question_handlers.{module_name}", __package__)
+        return getattr(module, class_name).is_valid_params
+
+    def precompute(self):
+        """Precompute variants and parameter spaces for every topic."""
+        for topic_id in self._specs:
+            self.strata(topic_id)
+
+    # --- Sampling ---
+
+    def sample_stratified(
+        self,
+        topic: str,
+        count: int,
+        rng: random.Random = None
+    ) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        Draw `count` (variant_index, params) pairs covering the space evenly.
+
+        Every combination is used once (in random order) before any is
+        repeated, so variants and parameter values appear as evenly as the
+        count allows.
+
+        Args:
+            topic: Topic (any alias)
+            count: Number of samples
+            rng: Random generator (defaults to the module-level one)
+
+        Returns:
+            List of (variant_index, params) pairs; params are fresh dicts
+        """
+        rng = rng or random
+        strata = list(self.strata(topic))
+        if not strata or count <= 0:
+            return []
+
+        samples = []
+        while len(samples) < count:
+            rng.shuffle(strata)
+            samples.extend(strata[:count - len(samples)])
+
+        return [(variant_index, dict(params)) for variant_index, params in samples]
+
+
+# Process-wide catalog, built at import time (no I/O until parameters are needed)
+catalog = TopicCatalog()
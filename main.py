@@ -9,7 +9,6 @@
 import sys
 import os
 import subprocess
-from ui.enhanced_client import run_enhanced_cli
 
 
 def run_gui():
@@ -29,20 +28,35 @@ def run_gui():
         print("\nOpritor server...")
 
 
+def run_api():
+    """Pornește API-ul HTTP local (generare și evaluare) în procesul curent."""
+    from ui.api_server import run_server
+    run_server()
+
+
 if __name__ == "__main__":
+    # Cu argumente: comenzi non-interactive (generate, grade, bench, serve)
+    if len(sys.argv) > 1:
+        from ui.batch_cli import main as batch_main
+        sys.exit(batch_main(sys.argv[1:]))
+
     print("\n" + "=" * 40)
     print("      SmarTest - MAIN MENU")
     print("=" * 40)
     print("1. Interfață Grafică (Recomandat)")
     print("2. Interfață Linie de Comandă (CLI)")
+    print("3. Server API HTTP (integrare LMS)")
     print("=" * 40)
 
-    choice = input("\nAlege o opțiune (1 sau 2): ").strip()
+    choice = input("\nAlege o opțiune (1, 2 sau 3): ").strip()
 
     if choice == "1":
         run_gui()
-    elif choice == "2":
-        run_enhanced_cli()
+    elif choice == "3":
+        run_api()
     else:
-        print("Opțiune invalidă. Se pornește CLI implicit.")
+        # CLI-ul se importă doar când este folosit
+        from ui.enhanced_client import run_enhanced_cli
+        if choice != "2":
+            print("Opțiune invalidă. Se pornește CLI implicit.")
         run_enhanced_cli()
\ No newline at end of file
@@ -0,0 +1,16 @@
+# tests/conftest.py
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+@pytest.fixture
+def sample_test():
+    """A small generated test: (questions, answers)."""
+    from core.test_builder import TestBuilder
+
+    return TestBuilder().generate_test(num_questions=8, seed=2024)
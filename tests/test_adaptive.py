@@ -0,0 +1,55 @@
+# tests/test_adaptive.py
+
+import pytest
+
+from core.adaptive import AdaptiveIndex, AdaptiveSession, irt_parameters
+from core.item_stats import ItemStats
+
+TOPICS = ["n-queens", "minimax"]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return AdaptiveIndex.from_statistics(None, TOPICS)
+
+
+def _run(session, score):
+    while True:
+        next_question = session.next_question()
+        if next_question is None:
+            return session
+        question, _ = next_question
+        session.record(score, f"answer {question['id']}")
+
+
+def test_answers_are_kept_with_their_scores(index):
+    session = _run(AdaptiveSession(index, TOPICS, seed=1, max_questions=6), 75)
+    assert len(session.questions) == len(session.scores) == 6
+    assert session.user_answers == [f"answer {i}" for i in range(1, 7)]
+    assert {question["topic"] for question in session.questions} <= set(TOPICS)
+
+
+def test_ability_follows_the_scores(index):
+    strong = _run(AdaptiveSession(index, seed=2, max_questions=8), 100)
+    weak = _run(AdaptiveSession(index, seed=2, max_questions=8), 0)
+    assert strong.ability > 0 > weak.ability
+    assert strong.standard_error < 1    # the prior's standard error
+
+
+def test_pending_question_is_asked_again(index):
+    session = AdaptiveSession(index, seed=3)
+    first = session.next_question()
+    assert session.next_question() == first
+    session.record(50)
+    with pytest.raises(ValueError):
+        session.record(50)
+
+
+def test_item_parameters_from_statistics():
+    assert irt_parameters(None) == pytest.approx(irt_parameters(ItemStats()))
+    easy, hard = ItemStats(), ItemStats()
+    for student in range(100):
+        rest = float(student)
+        easy.add(100 if student >= 10 else 0, rest)
+        hard.add(100 if student >= 90 else 0, rest)
+    assert irt_parameters(easy)[1] < 0 < irt_parameters(hard)[1]
@@ -0,0 +1,103 @@
+# tests/test_api_server.py
+
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ui import api_server
+from ui.api_server import APIServer
+
+
+@pytest.fixture
+def server():
+    # Threads instead of the forked pool keep the tests fast; jobs are the same
+    server = APIServer(port=0, workers=1, max_queue=1)
+    server._pool = ThreadPoolExecutor(max_workers=1)
+    yield server
+    server._pool.shutdown(wait=True)
+
+
+def _dispatch(server, method, path, body=None):
+    data = body if isinstance(body, bytes) else json.dumps({} if body is None else body).encode("utf-8")
+    return asyncio.run(server._dispatch(method, path, data))
+
+
+@pytest.mark.parametrize("body", [
+    {"num_questions": True},
+    {"num_questions": 0},
+    {"num_questions": api_server.MAX_QUESTIONS_PER_REQUEST + 1},
+    {"topics": "n-queens"},
+    {"params": ["n", 4]},
+    [],
+    b"{not json",
+])
+def test_invalid_generate_requests_are_rejected(server, body):
+    status, payload, _ = _dispatch(server, "POST", "/generate-test", body)
+    assert status == 400
+    assert "error" in payload
+
+
+def test_invalid_grade_items_are_rejected(server):
+    status, payload, _ = _dispatch(server, "POST", "/grade-batch", {"items": [{"user_answer": 5}]})
+    assert status == 400
+    assert "items[1]" in payload["error"]
+    items = [{}] * (api_server.MAX_GRADE_ITEMS_PER_REQUEST + 1)
+    assert _dispatch(server, "POST", "/grade-batch", {"items": items})[0] == 413
+
+
+def test_routing_errors(server):
+    assert _dispatch(server, "GET", "/nowhere")[0] == 404
+    assert _dispatch(server, "GET", "/grade-batch")[0] == 405
+    assert _dispatch(server, "POST", "/health")[0] == 405
+    assert _dispatch(server, "POST", "/generate-question", {"topic": "sudoku"})[0] == 400
+
+
+def test_jobs_run_and_are_counted(server):
+    status, payload, _ = _dispatch(server, "POST", "/generate-question", {"topic": "n-queens"})
+    assert status == 200
+    assert payload["question"] and payload["answer"]
+
+    item = {"correct_answer": payload["answer"], "user_answer": payload["answer"], "topic": "n-queens"}
+    status, payload, _ = _dispatch(server, "POST", "/grade-batch", {"items": [item]})
+    assert (status, payload) == (200, {"scores": [100]})
+
+    status, health, _ = _dispatch(server, "GET", "/health")
+    assert status == 200
+    assert health["status"] == "ok"
+    assert health["completed"] == 2
+    assert health["in_flight"] == 0
+
+
+def test_full_queue_is_rejected_with_retry_after(server):
+    server.in_flight = server.workers + server.max_queue
+    status, _, headers = _dispatch(server, "POST", "/generate-question", {"topic": "n-queens"})
+    assert status == 503
+    assert headers == {"Retry-After": "1"}
+    assert server.stats()["rejected"] == 1
+
+
+def test_http_round_trip(server):
+    async def exchange(request):
+        server._server = await asyncio.start_server(server._handle_connection, server.host, 0)
+        port = server._server.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection(server.host, port)
+            writer.write(request)
+            response = await reader.read()
+            writer.close()
+            return response
+        finally:
+            server._server.close()
+            await server._server.wait_closed()
+
+    body = json.dumps({"topic": "minimax"}).encode("utf-8")
+    request = (b"POST /generate-question HTTP/1.1\r\nConnection: close\r\n"
+               b"Content-Length: %d\r\n\r\n" % len(body)) + body
+    head, _, payload = asyncio.run(exchange(request)).partition(b"\r\n\r\n")
+    assert head.startswith(b"HTTP/1.1 200 OK")
+    assert json.loads(payload)["topic"] == "minimax"
+
+    request = b"POST /grade-batch HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % (api_server.MAX_BODY_BYTES + 1)
+    assert asyncio.run(exchange(request)).startswith(b"HTTP/1.1 413")
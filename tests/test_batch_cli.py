@@ -0,0 +1,69 @@
+# tests/test_batch_cli.py
+
+import json
+
+import pytest
+
+from ui import api_server, batch_cli
+
+
+def test_bench_options_are_forwarded(capsys):
+    assert batch_cli.main(["bench", "--quick", "--filter", "eval/numeric"]) == batch_cli.EXIT_OK
+    out = capsys.readouterr().out
+    assert "eval/numeric" in out
+    assert "eval/structured" not in out
+
+
+def test_serve_options_are_forwarded(monkeypatch):
+    started = []
+    monkeypatch.setattr(api_server, "run_server", lambda *args: started.append(args))
+    assert batch_cli.main(["serve", "--port", "8123", "--workers", "2"]) == batch_cli.EXIT_OK
+    assert started == [(api_server.DEFAULT_HOST, 8123, 2, None)]
+
+
+def test_unknown_options_of_other_commands_are_rejected(capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        batch_cli.main(["grade", "--submissions", "x.jsonl", "--quick"])
+    assert exit_info.value.code == batch_cli.EXIT_USAGE
+    assert "--quick" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_generate_then_grade(tmp_path, workers):
+    tests = tmp_path / "tests.jsonl"
+    args = ["generate", "--topics", "n-queens,nash-equilibrium", "--count", "2", "--students", "5",
+            "--seed", "7", "--workers", str(workers), "--output", str(tests)]
+    assert batch_cli.main(args) == batch_cli.EXIT_OK
+    generated = [json.loads(line) for line in tests.read_text(encoding="utf-8").splitlines()]
+    assert [row["student"] for row in generated] == [1, 2, 3, 4, 5]
+    assert [row["seed"] for row in generated] == [8, 9, 10, 11, 12]
+
+    submissions = tmp_path / "submissions.jsonl"
+    with open(submissions, "w", encoding="utf-8") as f:
+        for row in generated:
+            row["user_answers"] = row["answers"] if row["student"] % 2 else ["nu stiu"] * len(row["answers"])
+            f.write(json.dumps(row) + "\n")
+        f.write("not json\n")
+
+    grades = tmp_path / "grades.jsonl"
+    args = ["grade", "--submissions", str(submissions), "--workers", str(workers), "--output", str(grades)]
+    assert batch_cli.main(args) == batch_cli.EXIT_PARTIAL_FAILURE
+    results = [json.loads(line) for line in grades.read_text(encoding="utf-8").splitlines()]
+    assert [row.get("student") for row in results] == [1, 2, 3, 4, 5, None]
+    assert all(score == 100 for score in results[0]["scores"])
+    assert results[1]["average"] < 50
+    assert "error" in results[-1]
+
+
+def test_jobs_are_read_in_bounded_windows():
+    read = []
+
+    def jobs():
+        for number in range(40):
+            read.append(number)
+            yield number
+
+    results = batch_cli._run_jobs(abs, jobs(), workers=2)
+    assert next(results) == 0
+    assert len(read) <= batch_cli.JOBS_PER_WORKER * 2
+    assert list(results) == list(range(1, 40))
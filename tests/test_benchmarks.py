@@ -0,0 +1,21 @@
+# tests/test_benchmarks.py
+
+from tools import benchmarks
+
+
+def test_setup_runs_before_every_call_and_is_not_timed():
+    events = []
+    result = benchmarks.time_case(lambda: events.append("call"), repeat=2, min_time=0.001,
+                                  setup=lambda: events.append("setup"))
+    assert events[0::2] == ["setup"] * (len(events) // 2)
+    assert events[1::2] == ["call"] * (len(events) // 2)
+    assert result["calls"] <= events.count("call")
+
+
+def test_generation_cases_use_the_public_entry_point():
+    cases = benchmarks._generation_cases()
+    assert cases and all(len(case) == 3 for case in cases)
+    name, func, setup = cases[0]
+    setup()
+    question, answer = func()
+    assert question and answer
@@ -0,0 +1,74 @@
+# tests/test_canvas_renderer.py
+
+import re
+
+import pytest
+
+pytest.importorskip("reportlab")
+
+from reportlab import rl_config
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+from core.canvas_renderer import wrap_text
+from core.pdf_generator import PDFGenerator
+from core.render_cache import RenderCache
+
+FONT, SIZE, WIDTH = "Helvetica", 11, 200.0
+
+
+def _page_count(path):
+    with open(path, "rb") as f:
+        return len(re.findall(rb"/Type /Page\b", f.read()))
+
+
+def test_wrapped_lines_fit_and_keep_every_word():
+    text = "Care este ordinea in care sunt expandate nodurile " * 6
+    lines = wrap_text(text, FONT, SIZE, WIDTH)
+    assert len(lines) > 1
+    assert " ".join(line for line, _ in lines).split() == text.split()
+
+    shrink = rl_config.spaceShrinkage * stringWidth(" ", FONT, SIZE)
+    for line, width in lines:
+        assert width == pytest.approx(stringWidth(line, FONT, SIZE))
+        assert width <= WIDTH + shrink * len(line.split())
+
+
+def test_newlines_force_breaks_and_whitespace_collapses():
+    lines = wrap_text("A  B\n\nC", FONT, SIZE, WIDTH)
+    assert [line for line, _ in lines] == ["A B", "", "C"]
+    assert wrap_text("", FONT, SIZE, WIDTH) == ()
+
+
+def test_canvas_layout_matches_platypus_page_count(tmp_path, sample_test):
+    questions, answers = sample_test
+    questions = questions * 6    # long enough to span several pages
+    pages = {}
+    for renderer in ("platypus", "canvas"):
+        path = str(tmp_path / f"{renderer}.pdf")
+        PDFGenerator(renderer).generate_questions_pdf(questions, path)
+        pages[renderer] = _page_count(path)
+    assert pages["canvas"] == pages["platypus"] > 1
+
+    path = str(tmp_path / "answers.pdf")
+    PDFGenerator("canvas").generate_answers_pdf(answers, path)
+    assert _page_count(path) >= 1
+
+
+def test_cached_generator_renders_each_document_once(tmp_path, sample_test):
+    questions, _ = sample_test
+    cache = RenderCache(str(tmp_path / "cache"))
+    first, second = str(tmp_path / "first.pdf"), str(tmp_path / "second.pdf")
+    PDFGenerator("canvas", cache=cache).generate_questions_pdf(questions, first)
+    PDFGenerator("canvas", cache=cache).generate_questions_pdf(questions, second)
+    with open(first, "rb") as f1, open(second, "rb") as f2:
+        assert f1.read() == f2.read()
+    assert cache.stats()["hits"] == 1
+
+    # The renderer is part of the key
+    PDFGenerator("platypus", cache=cache).generate_questions_pdf(questions, second)
+    assert cache.stats()["entries"] == 2
+
+
+def test_unknown_renderer():
+    with pytest.raises(ValueError):
+        PDFGenerator("latex")
@@ -0,0 +1,124 @@
+# tests/test_evaluator.py
+
+import gzip
+import json
+import os
+
+import pytest
+from fuzzywuzzy import fuzz
+
+from core import evaluator
+from core.evaluator import (
+    combine_components, evaluate_answer, evaluate_batch, extract_answer_features, is_bare_answer,
+    load_keywords_for_topic, normalize_answer, score_components,
+)
+
+# Template answers with user answers derived from them (the answer itself,
+# truncated, reordered, with typos, only the number or list, other answers...)
+# and the scores of the evaluator before the scoring tiers
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "data", "evaluator_baseline.json.gz")
+
+# (correct answer, user answer, topic, path, score); scores of the evaluator
+# before the scoring tiers were added
+KNOWN_SCORES = [
+    ("Numarul minim de mutari este 7", "7", None, "numeric", 92),
+    ("Numarul minim de mutari este 7", "Numarul minim de mutari este 7", None, "numeric", 100),
+    ("Numarul minim de mutari este 7", "8", None, "numeric", 0),
+    ("One valid arrangement is: [0, 4, 7, 5, 2, 6, 1, 3]", "[0, 4, 7, 5, 2, 6, 1, 3]", "n-queens", "structured", 98),
+    ("Echilibrul Nash este (Sus, Stanga)", "(Sus, Stanga)", "nash-equilibrium", "structured", 98),
+    ("Nu. Graful necesită minim 4 culori (numărul cromatic).", "Nu, are nevoie de 4 culori", "graph-coloring",
+     "yes_no_number", 98),
+    ("Nu. Graful necesită minim 4 culori (numărul cromatic).", "Da, 3 culori", "graph-coloring",
+     "yes_no_number", 28),
+    ("Strategia optima este backtracking cu euristica MRV", "backtracking cu MRV", "graph-coloring",
+     "text_keywords", 95),
+    ("Strategia optima este backtracking cu euristica MRV", "nu stiu", "graph-coloring", "text_keywords", 17),
+    ("Algoritmul alpha-beta taie ramurile inutile", "alpha beta taie ramuri", "minimax", "text_keywords", 31),
+    ("Raspunsul este ...", "...", None, "text", 0),
+    ("Ok !!!", "ok !!!", None, "text", 100),
+    ("anything", "", None, "empty", 0),
+]
+
+
+@pytest.mark.parametrize("correct, user, topic, path, score", KNOWN_SCORES)
+def test_known_scores(correct, user, topic, path, score):
+    keywords = load_keywords_for_topic(topic) if topic else None
+    got_path, components, _ = score_components(correct, user, keywords, topic)
+    assert got_path == path
+    assert combine_components(got_path, components) == score
+    assert evaluate_answer(correct, user, keywords, topic) == score
+
+
+def test_batch_matches_single_answers():
+    known = [row for row in KNOWN_SCORES if row[2]]
+    scores = evaluate_batch([row[0] for row in known], [row[1] for row in known], [row[2] for row in known])
+    assert scores == [row[4] for row in known]
+
+
+@pytest.mark.parametrize("text", [
+    "Numarul minim de mutari este 7",
+    "[0, 4, 7, 5, 2, 6, 1, 3]",
+    "Backtracking cu euristica MRV",
+    "...",
+])
+def test_identical_texts_score_like_fuzzy(text):
+    """The identical-text shortcut gives the text component fuzzy would give."""
+    _, components, decisions = score_components(text, text)
+    clean = normalize_answer(text)
+    assert components["text"] == fuzz.WRatio(clean, clean)
+    assert ("exact_match" in decisions) == (components["text"] == 100)
+
+
+def test_weights_only_change_the_combination():
+    path, components, _ = score_components("Numarul minim de mutari este 7", "7")
+    weights = dict(evaluator.SCORING_WEIGHTS, key_element=0.5, key_text=0.5)
+    assert combine_components(path, components, weights) == 80
+
+
+def test_no_score_differs_from_the_baseline():
+    with gzip.open(BASELINE_PATH, "rt", encoding="utf-8") as f:
+        baseline = json.load(f)
+    keys = baseline["keys"]
+    assert len(baseline["pairs"]) > 7000
+
+    differences = []
+    for key_index, user, expected in baseline["pairs"]:
+        topic, correct = keys[key_index]
+        score = evaluate_answer(correct, user, load_keywords_for_topic(topic), topic)
+        if score != expected:
+            differences.append((topic, correct, user, expected, score))
+    assert differences == []
+
+
+def test_key_only_answers_score_like_fuzzy(sample_test):
+    _, answers = sample_test
+    checked = 0
+    for answer in answers:
+        features = extract_answer_features(normalize_answer(answer))
+        for user in {features.number, features.structure} - {""}:
+            _, components, decisions = score_components(answer, user)
+            if "key_only" in decisions:
+                checked += 1
+                assert components["text"] == fuzz.WRatio(normalize_answer(answer), user)
+    assert checked
+
+
+def test_long_answers_are_capped():
+    correct = "Strategia optima este backtracking cu euristica MRV"
+    user = "backtracking cu MRV " * 500
+    _, components, decisions = score_components(correct, user)
+    assert "fuzzy:truncated_to_%d" % evaluator.FUZZY_MAX_CHARS in decisions
+    clean_user = normalize_answer(user)[:evaluator.FUZZY_MAX_CHARS]
+    assert components["text"] == fuzz.WRatio(normalize_answer(correct), clean_user)
+
+
+@pytest.mark.parametrize("text, bare", [
+    ("92", True),
+    ("[1, 3, 0, 2]", True),
+    ("nu, 4.", True),
+    ("(sus, stanga)", True),
+    ("", False),
+    ("sunt 92 de solutii", False),
+])
+def test_bare_answers(text, bare):
+    assert is_bare_answer(text) == bare
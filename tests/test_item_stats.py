@@ -0,0 +1,91 @@
+# tests/test_item_stats.py
+
+import random
+import statistics
+
+import pytest
+
+from core.item_stats import PASS_MARK, ItemStats, ItemStatsCollector, RunningCorrelation, RunningStats
+
+
+def _pearson(xs, ys):
+    mean_x, mean_y = statistics.mean(xs), statistics.mean(ys)
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    spread = (sum((x - mean_x) ** 2 for x in xs) * sum((y - mean_y) ** 2 for y in ys)) ** 0.5
+    return covariance / spread
+
+
+@pytest.fixture
+def answers():
+    rng = random.Random(7)
+    return [(rng.randint(0, 100), rng.uniform(0, 100)) for _ in range(500)]
+
+
+def test_single_pass_matches_direct_formulas(answers):
+    stats = ItemStats()
+    for score, rest in answers:
+        stats.add(score, rest)
+    scores = [score for score, _ in answers]
+    passed = [1.0 if score >= PASS_MARK else 0.0 for score in scores]
+
+    assert stats.count == len(answers)
+    assert stats.scores.mean == pytest.approx(statistics.mean(scores))
+    assert stats.scores.stdev == pytest.approx(statistics.stdev(scores))
+    assert stats.pass_rate == pytest.approx(sum(passed) / len(passed))
+    assert stats.discrimination == pytest.approx(_pearson(passed, [rest for _, rest in answers]))
+    assert sum(stats.histogram) == len(answers)
+
+
+@pytest.mark.parametrize("split", [1, 17, 250, 499])
+def test_merge_matches_single_pass(answers, split):
+    whole, first, second = ItemStats(), ItemStats(), ItemStats()
+    for index, (score, rest) in enumerate(answers):
+        whole.add(score, rest)
+        (first if index < split else second).add(score, rest)
+    first.merge(second)
+
+    assert first.count == whole.count
+    assert first.passes == whole.passes
+    assert first.histogram == whole.histogram
+    assert first.scores.mean == pytest.approx(whole.scores.mean)
+    assert first.scores.m2 == pytest.approx(whole.scores.m2)
+    assert first.discrimination == pytest.approx(whole.discrimination)
+
+
+def test_merge_with_empty_accumulators():
+    stats = RunningStats()
+    stats.merge(RunningStats())
+    assert stats.count == 0
+    correlation = RunningCorrelation()
+    correlation.add(1.0, 2.0)
+    correlation.merge(RunningCorrelation())
+    assert correlation.x.count == 1
+    assert correlation.correlation is None
+
+
+def test_state_round_trip(answers):
+    stats = ItemStats()
+    for score, rest in answers[:50]:
+        stats.add(score, rest)
+    restored = ItemStats.from_state(stats.to_state())
+    assert restored.summary() == stats.summary()
+
+
+def test_collectors_merge_like_one_stream(sample_test):
+    questions, _ = sample_test
+    rng = random.Random(3)
+    submissions = [[rng.randint(0, 100) for _ in questions] for _ in range(40)]
+
+    whole, first, second = ItemStatsCollector(), ItemStatsCollector(), ItemStatsCollector()
+    for index, scores in enumerate(submissions):
+        whole.add_submission(questions, scores)
+        (first if index % 3 else second).add_submission(questions, scores)
+    first.merge(second)
+
+    assert set(first.items) == set(whole.items)
+    for key, stats in whole.items.items():
+        merged = first.items[key]
+        assert (merged.count, merged.passes, merged.histogram) == (stats.count, stats.passes, stats.histogram)
+        assert merged.scores.mean == pytest.approx(stats.scores.mean)
+        assert merged.scores.m2 == pytest.approx(stats.scores.m2)
+        assert merged.rest.comoment == pytest.approx(stats.rest.comoment)
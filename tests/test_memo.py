@@ -0,0 +1,80 @@
+# tests/test_memo.py
+
+import pytest
+
+from core.memo import SolverMemo, memoized_solver
+
+
+def test_least_recently_used_entries_are_evicted():
+    memo = SolverMemo(max_entries=2)
+    memo.put("a", 1)
+    memo.put("b", 2)
+    assert memo.get("a") == (True, 1)
+    memo.put("c", 3)
+    assert memo.get("b") == (False, None)
+    assert memo.get("a") == (True, 1)
+    stats = memo.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["entries"]) == (2, 1, 1, 2)
+
+
+def test_expired_entries_are_dropped(monkeypatch):
+    memo = SolverMemo(ttl=10)
+    now = [1000.0]
+    monkeypatch.setattr("core.memo.time.time", lambda: now[0])
+    memo.put("a", 1)
+    now[0] += 11
+    assert memo.get("a") == (False, None)
+
+
+def test_disk_tier_survives_a_new_memo(tmp_path):
+    path = str(tmp_path / "memo.db")
+    first = SolverMemo(disk_path=path)
+    first.put("key", (1, "x"))
+    first.close()
+
+    second = SolverMemo(disk_path=path)
+    assert second.get("key") == (True, [1, "x"])    # JSON round trip
+    assert second.stats()["disk_hits"] == 1
+    second.close()
+
+
+def test_disk_lookup_does_not_hold_the_memory_lock(tmp_path, monkeypatch):
+    memo = SolverMemo(disk_path=str(tmp_path / "memo.db"))
+    held = []
+    disk_get = memo._disk_get
+    monkeypatch.setattr(memo, "_disk_get", lambda key: held.append(memo._lock.locked()) or disk_get(key))
+    assert memo.get("missing") == (False, None)
+    assert held == [False]
+    memo.close()
+
+
+def test_memoized_solver_keys_on_arguments_and_version():
+    memo = SolverMemo()
+    calls = []
+
+    def solve(self, n, pegs=3):
+        calls.append((n, pegs))
+        return n * pegs
+
+    first = memoized_solver("generalised-hanoi", "moves", memo=memo, version="1")(solve)
+    assert first(object(), 4) == 12
+    assert first(object(), n=4, pegs=3) == 12     # other instance, same bound arguments
+    assert first(object(), 4, 5) == 20
+    assert calls == [(4, 3), (4, 5)]
+
+    second = memoized_solver("generalised-hanoi", "moves", memo=memo, version="2")(solve)
+    assert second(object(), 4) == 12
+    assert len(calls) == 3
+
+
+def test_solver_errors_are_not_cached():
+    memo = SolverMemo()
+
+    @memoized_solver("n-queens", "count", memo=memo, version="1")
+    def count(n):
+        raise ValueError(n)
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            count(3)
+    assert memo.stats()["entries"] == 0
@@ -0,0 +1,58 @@
+# tests/test_regrade.py
+
+import pytest
+
+from core import evaluator
+from core.regrade import RegradeStats, grade_answers
+
+
+@pytest.fixture
+def graded(sample_test):
+    questions, answers = sample_test
+    user_answers = [answer if index % 2 else answer[:len(answer) // 2] for index, answer in enumerate(answers)]
+    topics = [question["topic"] for question in questions]
+    return answers, user_answers, topics, grade_answers(answers, user_answers, topics)
+
+
+def test_first_grading_matches_the_evaluator(graded):
+    answers, user_answers, topics, first = graded
+    assert [row["score"] for row in first] == evaluator.evaluate_batch(answers, user_answers, topics)
+
+
+def test_unchanged_answers_are_reused(graded):
+    answers, user_answers, topics, first = graded
+    stats = RegradeStats()
+    again = grade_answers(answers, user_answers, topics, previous=first, stats=stats)
+    assert stats.reused == len(answers)
+    assert stats.recomputed == 0
+    assert again == first
+
+
+def test_changed_answer_key_is_recomputed(graded):
+    answers, user_answers, topics, first = graded
+    fixed = list(answers)
+    fixed[2] = fixed[2] + " (corectat)"
+    stats = RegradeStats()
+    again = grade_answers(fixed, user_answers, topics, previous=first, stats=stats)
+    assert stats.key_changed == 1
+    assert stats.reused == len(answers) - 1
+    assert again[2]["score"] == evaluator.evaluate_batch([fixed[2]], [user_answers[2]], [topics[2]])[0]
+
+
+def test_weight_change_recombines_without_recomputing(graded, monkeypatch):
+    answers, user_answers, topics, first = graded
+    monkeypatch.setitem(evaluator.SCORING_WEIGHTS, "key_element", 0.5)
+    monkeypatch.setitem(evaluator.SCORING_WEIGHTS, "key_text", 0.5)
+    stats = RegradeStats()
+    again = grade_answers(answers, user_answers, topics, previous=first, stats=stats)
+    assert stats.reused == len(answers)
+    assert [row["score"] for row in again] == evaluator.evaluate_batch(answers, user_answers, topics)
+
+
+def test_evaluator_config_change_recomputes(graded, monkeypatch):
+    answers, user_answers, topics, first = graded
+    monkeypatch.setattr(evaluator, "FUZZY_MAX_CHARS", 10)
+    stats = RegradeStats()
+    grade_answers(answers, user_answers, topics, previous=first, stats=stats)
+    assert stats.config_changed == len(answers)
+    assert stats.reused == 0
@@ -0,0 +1,89 @@
+# tests/test_render_cache.py
+
+import os
+
+from core import render_cache
+from core.render_cache import RenderCache
+
+
+def _writer(filename, data, calls):
+    def render():
+        calls.append(filename)
+        with open(filename, "wb") as f:
+            f.write(data)
+    return render
+
+
+def test_keys_depend_on_content_and_options():
+    key = RenderCache.make_key("questions_pdf", [{"id": 1}], {"title": "Test"})
+    assert key == RenderCache.make_key("questions_pdf", [{"id": 1}], {"title": "Test"})
+    assert key != RenderCache.make_key("answers_pdf", [{"id": 1}], {"title": "Test"})
+    assert key != RenderCache.make_key("questions_pdf", [{"id": 2}], {"title": "Test"})
+    assert key != RenderCache.make_key("questions_pdf", [{"id": 1}], {"title": "Alt"})
+
+
+def test_second_render_is_served_from_the_cache(tmp_path):
+    cache = RenderCache(str(tmp_path / "cache"))
+    key = cache.make_key("answers_txt", ["a", "b"])
+    calls = []
+
+    first, second = str(tmp_path / "first.txt"), str(tmp_path / "second.txt")
+    assert not cache.render(key, first, _writer(first, b"rendered", calls))
+    assert cache.render(key, second, _writer(second, b"other", calls))
+    assert calls == [first]
+    with open(second, "rb") as f:
+        assert f.read() == b"rendered"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = RenderCache(str(tmp_path / "cache"), max_bytes=25)
+    output = str(tmp_path / "out.bin")
+    keys = [cache.make_key("doc", number) for number in range(3)]
+    for key in keys[:2]:
+        cache.render(key, output, _writer(output, b"x" * 10, []))
+    assert cache.fetch(keys[0], output)    # keys[1] is now the oldest
+    cache.render(keys[2], output, _writer(output, b"x" * 10, []))
+
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["entries"] == 2
+    assert stats["bytes"] <= 25
+    assert not cache.fetch(keys[1], output)
+    assert cache.fetch(keys[0], output)
+    assert cache.fetch(keys[2], output)
+
+
+def test_oversized_files_are_not_cached(tmp_path):
+    cache = RenderCache(str(tmp_path / "cache"), max_bytes=5)
+    output = str(tmp_path / "out.bin")
+    cache.render("big", output, _writer(output, b"x" * 10, []))
+    assert cache.stats()["entries"] == 0
+    assert os.listdir(cache.directory) == []
+
+
+def test_index_is_rebuilt_from_the_directory(tmp_path):
+    directory = str(tmp_path / "cache")
+    output = str(tmp_path / "out.bin")
+    cache = RenderCache(directory)
+    cache.render("a", output, _writer(output, b"abc", []))
+    cache.render("b", output, _writer(output, b"defgh", []))
+
+    reopened = RenderCache(directory)
+    assert reopened.stats()["entries"] == 2
+    assert reopened.stats()["bytes"] == 8
+    assert reopened.fetch("a", output)
+
+    reopened.clear()
+    assert reopened.stats()["entries"] == 0
+    assert not RenderCache(directory).fetch("a", output)
+
+
+def test_default_cache_follows_the_environment(tmp_path, monkeypatch):
+    monkeypatch.delenv(render_cache.CACHE_DIR_ENV, raising=False)
+    assert render_cache.get_default_cache() is None
+    monkeypatch.setenv(render_cache.CACHE_DIR_ENV, str(tmp_path))
+    cache = render_cache.get_default_cache()
+    assert cache.directory == str(tmp_path)
+    assert render_cache.get_default_cache() is cache
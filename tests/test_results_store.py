@@ -0,0 +1,129 @@
+# tests/test_results_store.py
+
+import json
+import uuid
+
+import pytest
+
+from core import results_store
+from core.item_stats import ItemStatsCollector
+from core.results_store import ResultsStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultsStore(str(tmp_path / "results.db"), batch_size=5)
+    yield store
+    store.close()
+
+
+def _record(store, questions, answers, student, score=80):
+    return store.record_submission(student, questions, answers, answers, [score] * len(questions))
+
+
+def test_batches_are_bounded_and_every_record_is_written(store, sample_test):
+    questions, answers = sample_test
+    for student in range(12):
+        _record(store, questions, answers, f"s{student}")
+    assert store.flush(timeout=10)
+
+    counts = store.stats()
+    assert counts["submissions"] == 12
+    assert counts["answers"] == 12 * len(questions)
+    assert counts["errors"] == 0
+    assert store.writes == 12
+    assert store.batches >= 3    # at most 5 records per transaction
+
+
+def test_a_failing_record_does_not_lose_its_batch(store, sample_test, monkeypatch):
+    questions, answers = sample_test
+    _record(store, questions, answers, "first")
+    store.flush()
+
+    # The same submission ID twice: the second insert violates the primary key
+    duplicate = uuid.UUID(int=1)
+    ids = iter([uuid.UUID(int=2), duplicate, uuid.UUID(int=3), duplicate, uuid.UUID(int=4)])
+    monkeypatch.setattr(results_store.uuid, "uuid4", lambda: next(ids))
+    for student in ("a", "b", "c", "d", "e"):
+        _record(store, questions, answers, student)
+    store.flush()
+
+    assert store.errors == 1
+    assert store.stats()["submissions"] == 5
+    assert store.student_results("d") == []
+    assert len(store.student_results("e")) == 1
+
+
+def test_values_are_validated_before_queuing(store, sample_test):
+    questions, answers = sample_test
+    with pytest.raises(ValueError):
+        store.record_submission("ana", questions, answers, answers[:-1], [100] * len(questions))
+    with pytest.raises(TypeError):
+        store.record_submission("ana", questions, answers, answers, [True] * len(questions))
+    with pytest.raises(TypeError):
+        store.record_submission("ana", questions, answers, answers, ["90"] * len(questions))
+    with pytest.raises(ValueError):
+        store.record_submission("ana", questions, answers, answers, [100] * len(questions), graded=[{}])
+
+    user_answers = [{"row": 1}] + [None] * (len(questions) - 1)
+    submission = store.record_submission("ana", questions, answers, user_answers, [99.6] * len(questions))
+    rows = store.submission_answers(submission)
+    assert json.loads(rows[0]["user_answer"]) == {"row": 1}
+    assert rows[1]["user_answer"] == ""
+    assert {row["score"] for row in rows} == {100}
+    assert store.errors == 0
+
+
+def test_item_statistics_match_a_single_collector(store, sample_test):
+    questions, answers = sample_test
+    collector = ItemStatsCollector()
+    for student in range(7):
+        scores = [(student * 13 + position * 29) % 101 for position in range(len(questions))]
+        store.record_submission(student, questions, answers, answers, scores)
+        collector.add_submission(questions, scores)
+
+    stored = store.item_accumulators()
+    assert set(stored) == set(collector.items)
+    for key, stats in collector.items.items():
+        assert stored[key].count == stats.count
+        assert stored[key].histogram == stats.histogram
+        assert stored[key].scores.mean == pytest.approx(stats.scores.mean)
+        assert stored[key].scores.m2 == pytest.approx(stats.scores.m2)
+        assert stored[key].rest.comoment == pytest.approx(stats.rest.comoment)
+    assert store.item_answer_count() == 7 * len(questions)
+
+
+def test_a_record_failing_with_any_error_is_dropped(store, sample_test, monkeypatch):
+    questions, answers = sample_test
+    write = store._write
+
+    def failing_write(connection, records):
+        if any(record[1][2] == "bad" for record in records):
+            raise KeyError("bad")
+        write(connection, records)
+
+    monkeypatch.setattr(store, "_write", failing_write)
+    for student in ("a", "bad", "c"):
+        _record(store, questions, answers, student)
+    assert store.flush(timeout=10)
+    assert store.errors == 1
+    assert store.stats()["submissions"] == 2
+    _record(store, questions, answers, "d")    # the writer is still running
+    assert store.flush(timeout=10)
+    assert store.stats()["submissions"] == 3
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_flush_reports_a_dead_writer(tmp_path, monkeypatch):
+    def crash(self):
+        self._queue.get()
+        raise RuntimeError("disk gone")
+
+    monkeypatch.setattr(results_store, "WRITER_CHECK_INTERVAL", 0.01)
+    monkeypatch.setattr(ResultsStore, "_write_loop", crash)
+    store = ResultsStore(str(tmp_path / "results.db"))
+    with pytest.raises(RuntimeError):
+        store.flush()      # the writer dies while flush() waits
+    with pytest.raises(RuntimeError):
+        store.flush()      # already dead
+    store.close()
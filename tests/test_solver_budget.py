@@ -0,0 +1,58 @@
+# tests/test_solver_budget.py
+
+import pytest
+
+from core.base_question_handler import BaseQuestionHandler
+from core.solver_budget import BudgetExceeded, SolverBudget, budget_scope, tick
+
+SEARCH = {"id": "search", "question": "Search {size}", "answer": "{result}", "requires_computation": True}
+PLAIN = {"id": "plain", "question": "Explain", "answer": "Because"}
+
+
+class SearchHandler(BaseQuestionHandler):
+    """Solver exploring `size` nodes."""
+
+    def generate_custom(self, variant, params):
+        for _ in range(params["size"]):
+            tick()
+        params["result"] = params["size"]
+        return self.generate_from_template(variant, params)
+
+
+def _handler(questions, sizes):
+    return SearchHandler({"questions": questions, "params": {"size": {"choices": sizes}}})
+
+
+def test_tick_outside_a_scope_does_nothing():
+    tick(10 ** 9)
+
+
+def test_node_limit_stops_the_solver():
+    with pytest.raises(BudgetExceeded):
+        with budget_scope(SolverBudget(max_nodes=10)):
+            for _ in range(11):
+                tick()
+
+
+def test_solved_within_budget():
+    question, answer, variant, params, fallback = _handler([SEARCH], [5]).generate_detailed(
+        budget=SolverBudget(max_nodes=10))
+    assert (question, answer, fallback) == ("Search 5", "5", "")
+
+
+def test_parameters_are_resampled():
+    handler = _handler([SEARCH], [1000, 5])
+    _, answer, _, params, fallback = handler.generate_detailed({"size": 1000}, budget=SolverBudget(max_nodes=10))
+    assert (answer, params["size"], fallback) == ("5", 5, "resampled")
+
+
+def test_variant_without_computation_is_used():
+    handler = _handler([SEARCH, PLAIN], [1000])
+    question, answer, variant, _, fallback = handler.generate_detailed(variant_index=0, budget=SolverBudget(max_nodes=10))
+    assert (question, variant["id"], fallback) == ("Explain", "plain", "variant")
+
+
+def test_fallback_never_runs_unbounded():
+    handler = _handler([SEARCH], [1000])
+    with pytest.raises(BudgetExceeded):
+        handler.generate_detailed(budget=SolverBudget(max_nodes=10))
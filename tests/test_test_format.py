@@ -0,0 +1,98 @@
+# tests/test_test_format.py
+
+import json
+
+import pytest
+
+from core import test_format
+from core.test_format import FORMAT_VERSION, is_test_file, load_test, save_test, submission_answer_keys
+
+# Imported under another name so pytest does not collect it as a test class
+SavedTest = test_format.TestFile
+
+
+@pytest.fixture(params=[True, False], ids=["zlib", "plain"])
+def saved(request, tmp_path, sample_test):
+    questions, answers = sample_test
+    path = str(tmp_path / "exam.smt")
+    save_test(path, questions, answers, seed=2024, compress=request.param)
+    return path, questions, answers
+
+
+def test_round_trip(saved):
+    path, questions, answers = saved
+    assert is_test_file(path)
+    loaded_questions, loaded_answers = load_test(path)
+    assert loaded_answers == answers
+    assert loaded_questions == questions
+
+
+def test_single_answer_key(saved):
+    path, questions, answers = saved
+    with SavedTest(path) as test:
+        assert len(test) == len(questions)
+        assert test.header["seed"] == 2024
+        assert test.answer_key(3) == {"topic": questions[3]["topic"], "answer": answers[3]}
+        assert test.changed_templates() == []
+
+
+def test_submission_answer_keys(saved):
+    path, questions, answers = saved
+    with SavedTest(path) as test:
+        _, correct, given = submission_answer_keys(test, {"2": "x", "5": "y"})
+        assert correct == [answers[1], answers[4]]
+        assert given == ["x", "y"]
+        with pytest.raises(ValueError):
+            submission_answer_keys(test, ["only one"])
+        with pytest.raises(ValueError):
+            submission_answer_keys(test, {str(len(questions) + 1): "x"})
+
+
+def test_regenerate_matches_stored_question(saved):
+    path, questions, answers = saved
+    with SavedTest(path) as test:
+        assert test.regenerate(0) == (questions[0]["question"], answers[0])
+
+
+@pytest.mark.parametrize("cut", [0.5, 0.95])
+def test_truncated_file(saved, tmp_path, cut):
+    path = saved[0]
+    with open(path, "rb") as f:
+        data = f.read()
+    truncated = str(tmp_path / "truncated.smt")
+    with open(truncated, "wb") as f:
+        f.write(data[:int(len(data) * cut)])
+    with pytest.raises(ValueError):
+        SavedTest(truncated)
+
+
+def test_corrupt_record(saved, tmp_path):
+    path = saved[0]
+    with open(path, "rb") as f:
+        data = bytearray(f.read())
+    start = data.index(b"\n") + 1
+    data[start:start + 8] = b"\x00" * 8
+    corrupt = str(tmp_path / "corrupt.smt")
+    with open(corrupt, "wb") as f:
+        f.write(bytes(data))
+    with SavedTest(corrupt) as test:
+        with pytest.raises(ValueError):
+            test.record(0)
+        test.record(1)
+
+
+def test_not_a_test_file_or_newer_version(tmp_path, saved):
+    other = tmp_path / "other.smt"
+    other.write_text("just some text\n", encoding="utf-8")
+    assert not is_test_file(str(other))
+    with pytest.raises(ValueError):
+        SavedTest(str(other))
+
+    with open(saved[0], "rb") as f:
+        header, rest = f.read().split(b"\n", 1)
+    newer = json.loads(header)
+    newer["version"] = FORMAT_VERSION + 1
+    path = tmp_path / "newer.smt"
+    path.write_bytes(json.dumps(newer).encode("utf-8") + b"\n" + rest)
+    with pytest.raises(ValueError):
+        SavedTest(str(path))
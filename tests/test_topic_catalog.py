@@ -0,0 +1,53 @@
+# tests/test_topic_catalog.py
+
+import os
+import random
+from collections import Counter
+
+import pytest
+
+from core.question_handlers.knights_tour_handler import KnightsTourHandler
+from core.topic_catalog import TOPICS, TopicCatalog, catalog
+
+
+@pytest.mark.parametrize("spelling", ["knights-tour", "knights_tour", " Knights-Tour "])
+def test_aliases_resolve_to_the_canonical_id(spelling):
+    assert catalog.resolve(spelling) == "knights-tour"
+    assert catalog.handler_path(spelling) == "knights_tour_handler.KnightsTourHandler"
+
+
+def test_unknown_topics():
+    assert catalog.resolve("sudoku") is None
+    assert catalog.resolve("") is None
+    assert catalog.spec("sudoku") is None
+    assert catalog.template_path("my-topic").endswith(os.path.join("templates", "my_topic.json"))
+
+
+def test_every_topic_has_a_template_and_variants():
+    assert catalog.ids() == [spec.id for spec in TOPICS]
+    for topic in catalog.ids():
+        assert os.path.exists(catalog.template_path(topic))
+        assert catalog.variants(topic)
+
+
+def test_invalid_parameter_combinations_are_dropped():
+    space = catalog.param_space("knights-tour")
+    assert all(KnightsTourHandler.is_valid_params(params) for params in space)
+    # start_pos [8, 8] only fits on the 8x8 board
+    assert {"board_size": 8, "start_pos": [8, 8]} in space
+    assert {"board_size": 5, "start_pos": [8, 8]} not in space
+    assert len(catalog.strata("knights-tour")) == len(space) * len(catalog.variants("knights-tour"))
+
+
+def test_stratified_sampling_covers_every_stratum_before_repeating():
+    strata = catalog.strata("n-queens")
+    samples = TopicCatalog().sample_stratified("n_queens", len(strata) * 2 + 1, random.Random(5))
+    keys = [(variant_index, tuple(sorted(params.items()))) for variant_index, params in samples]
+
+    assert len(set(keys[:len(strata)])) == len(strata)
+    counts = Counter(keys)
+    assert max(counts.values()) - min(counts.values()) <= 1
+
+    samples[0][1]["n"] = -1    # callers get fresh dicts
+    assert all(params.get("n") != -1 for _, params in catalog.strata("n-queens"))
+    assert catalog.sample_stratified("n-queens", 0) == []
@@ -0,0 +1,315 @@
+# tools/benchmarks.py
+
+"""
+Benchmark suite for the generation, evaluation and export hot paths.
+
+Cases:
+    gen/<topic>/<variant>    generate_question_and_answer for every topic and
+                             variant, with a cold solver memo (emptied before
+                             every call, outside the timing)
+    eval/<answer class>      evaluate_answer for structured, numeric,
+                             yes/no+number and keyword text answers
+    test/<size>              TestBuilder.generate_test at several sizes
+    pdf/<renderer>           PDFGenerator questions + answer key throughput
+
+Examples:
+    python -m tools.benchmarks --save bench_baseline.json
+    python -m tools.benchmarks --compare bench_baseline.json --threshold 15
+    python -m tools.benchmarks --filter eval/ --quick
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+DEFAULT_THRESHOLD_PERCENT = 10.0
+TEST_SIZES = (5, 50, 500)
+PDF_QUESTIONS = 100
+
+# (correct answer, user answer, topic) per evaluator answer class
+EVAL_SAMPLES = {
+    "structured": (
+        "One valid arrangement is: [0, 4, 7, 5, 2, 6, 1, 3]",
+        "[0, 4, 7, 5, 2, 6, 1, 3]",
+        "n-queens",
+    ),
+    "numeric": (
+        "There are 92 distinct solutions for the 8-Queens problem.",
+        "92 solutions",
+        "n-queens",
+    ),
+    "yes_no_number": (
+        "Nu. Graful necesită minim 4 culori (numărul cromatic).",
+        "Nu, are nevoie de 4 culori",
+        "graph-coloring",
+    ),
+    "keyword_text": (
+        "Cea mai potrivită strategie este Backtracking-ul cu euristici "
+        "(ex: MRV - Most Restricted Variable) sau algoritmi de forță brută optimizați.",
+        "As folosi backtracking cu euristica MRV pentru colorarea grafului",
+        "graph-coloring",
+    ),
+}
+
+
+# --- Case definitions ---
+
+def _generation_cases() -> List[tuple]:
+    from core.memo import configure_memo
+    from core.question_factory import generate_question_and_answer, get_handler
+    from core.test_builder import TestBuilder
+
+    # After the first call every memoized solver result would come from the
+    # memo; a memory-only memo (SMARTEST_MEMO_DB is not read) emptied before
+    # each call (setup, not timed) makes the cases time the solvers
+    memo = configure_memo()
+
+    cases = []
+    for topic in TestBuilder.AVAILABLE_TOPICS:
+        for index, variant in enumerate(get_handler(topic).questions):
+            name = f"gen/{topic}/{variant.get('id', index)}"
+            cases.append((name, lambda t=topic, i=index: generate_question_and_answer(t, variant_index=i), memo.clear))
+    return cases
+
+
+def _evaluation_cases() -> List[Tuple[str, Callable[[], Any]]]:
+    from core.evaluator import evaluate_answer, load_keywords_for_topic
+
+    cases = []
+    for answer_class, (correct, user, topic) in EVAL_SAMPLES.items():
+        keywords = load_keywords_for_topic(topic)
+        cases.append((
+            f"eval/{answer_class}",
+            lambda c=correct, u=user, k=keywords: evaluate_answer(c, u, k),
+        ))
+    return cases
+
+
+def _test_builder_cases() -> List[Tuple[str, Callable[[], Any]]]:
+    from core.test_builder import TestBuilder
+
+    return [
+        (f"test/{size}", lambda n=size: TestBuilder().generate_test(num_questions=n))
+        for size in TEST_SIZES
+    ]
+
+
+def _pdf_cases(workdir: str) -> List[Tuple[str, Callable[[], Any]]]:
+    from core.pdf_generator import PDFGenerator, RENDERERS, is_pdf_available
+    from core.test_builder import TestBuilder
+
+    if not is_pdf_available():
+        return []
+
+    random.seed(0)
+    questions, answers = TestBuilder().generate_test(num_questions=PDF_QUESTIONS)
+    questions_file = os.path.join(workdir, "questions.pdf")
+    answers_file = os.path.join(workdir, "answers.pdf")
+
+    def render(generator):
+        generator.generate_questions_pdf(questions, questions_file)
+        generator.generate_answers_pdf(answers, answers_file)
+
+    return [
+        (f"pdf/{renderer}", lambda g=PDFGenerator(renderer=renderer): render(g))
+        for renderer in RENDERERS
+    ]
+
+
+def collect_cases(workdir: str) -> List[tuple]:
+    """
+    All benchmark cases as (name, callable) pairs, or (name, callable, setup)
+    when something must run untimed before every call.
+    """
+    return (
+        _generation_cases()
+        + _evaluation_cases()
+        + _test_builder_cases()
+        + _pdf_cases(workdir)
+    )
+
+
+# --- Timing ---
+
+def _time_calls(func: Callable[[], Any], number: int, setup: Optional[Callable[[], Any]]) -> float:
+    """Seconds spent in `number` calls of func (setup, when given, runs untimed before each)."""
+    if setup is None:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        return time.perf_counter() - start
+
+    elapsed = 0.0
+    for _ in range(number):
+        setup()
+        start = time.perf_counter()
+        func()
+        elapsed += time.perf_counter() - start
+    return elapsed
+
+
+def time_case(
+    func: Callable[[], Any],
+    repeat: int = 5,
+    min_time: float = 0.2,
+    setup: Optional[Callable[[], Any]] = None
+) -> Dict[str, float]:
+    """
+    Time a callable, timeit-style.
+
+    The number of calls per round is calibrated so one round takes at least
+    min_time seconds; the result reports per-call times over `repeat` rounds.
+    When setup is given it runs before every call, outside the timing (calls
+    are then timed one by one).
+    """
+    random.seed(0)
+    if setup is not None:
+        setup()
+    func()  # warm-up (imports, caches)
+
+    number = 1
+    while True:
+        elapsed = _time_calls(func, number, setup)
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    rounds = [elapsed / number]
+    for _ in range(repeat - 1):
+        rounds.append(_time_calls(func, number, setup) / number)
+
+    return {
+        "median_us": statistics.median(rounds) * 1e6,
+        "min_us": min(rounds) * 1e6,
+        "calls": number * repeat,
+    }
+
+
+def run_benchmarks(name_filter: str = None, quick: bool = False) -> Dict[str, Any]:
+    """
+    Run every (matching) benchmark case.
+
+    Args:
+        name_filter: Only run cases whose name contains this substring
+        quick: Fewer, shorter rounds (noisier, for smoke runs)
+
+    Returns:
+        Results document with metadata and per-case timings
+    """
+    repeat, min_time = (3, 0.05) if quick else (5, 0.2)
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, func, *setup in collect_cases(workdir):
+            if name_filter and name_filter not in name:
+                continue
+            results[name] = time_case(func, repeat=repeat, min_time=min_time, setup=setup[0] if setup else None)
+            print(f"{name:<48} {results[name]['median_us']:>12.1f} us", file=sys.stderr)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """
+    Compare median timings against a baseline.
+
+    Returns:
+        One row per case present in both runs, with change in percent and a
+        regression flag when slower than baseline by more than threshold
+    """
+    rows = []
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        change = (result["median_us"] / base["median_us"] - 1.0) * 100 if base["median_us"] else 0.0
+        rows.append({
+            "case": name,
+            "baseline_us": base["median_us"],
+            "current_us": result["median_us"],
+            "change_percent": change,
+            "regression": change > threshold,
+        })
+    return rows
+
+
+def format_results(document: Dict[str, Any]) -> str:
+    """Render results as a text table."""
+    lines = [f"{'case':<48} {'median us':>12} {'min us':>12} {'calls':>8}", "-" * 83]
+    for name, r in document["results"].items():
+        lines.append(f"{name:<48} {r['median_us']:>12.1f} {r['min_us']:>12.1f} {r['calls']:>8}")
+    return "\n".join(lines)
+
+
+def format_comparison(rows: List[Dict[str, Any]], threshold: float) -> str:
+    """Render a baseline comparison as a text table."""
+    lines = [f"{'case':<48} {'baseline us':>12} {'current us':>12} {'change':>9}", "-" * 84]
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        lines.append(f"{row['case']:<48} {row['baseline_us']:>12.1f} {row['current_us']:>12.1f} "
+                     f"{row['change_percent']:>+8.1f}%{flag}")
+    regressions = sum(1 for row in rows if row["regression"])
+    lines.append(f"\n{regressions} regression(s) above {threshold:.0f}%")
+    return "\n".join(lines)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="SmarTest benchmark suite")
+    parser.add_argument("--filter", default=None, help="only run cases whose name contains this text")
+    parser.add_argument("--quick", action="store_true", help="shorter, noisier runs")
+    parser.add_argument("--save", default=None, help="write results to this baseline file")
+    parser.add_argument("--compare", default=None, help="compare against this baseline file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD_PERCENT,
+                        help="regression threshold in percent (default: %(default)s)")
+    parser.add_argument("--stages", action="store_true",
+                        help="record per-stage timings (adds overhead) and print them")
+    parser.add_argument("--metrics", default=None, help="write per-stage metrics in Prometheus format")
+    args = parser.parse_args(argv)
+
+    from core import instrumentation
+    if args.stages or args.metrics:
+        instrumentation.enable()
+
+    document = run_benchmarks(args.filter, args.quick)
+    print(format_results(document))
+
+    if args.stages:
+        print()
+        print(instrumentation.summary_table())
+    if args.metrics:
+        instrumentation.write_prometheus(args.metrics)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare(document, baseline, args.threshold)
+        print()
+        print(format_comparison(rows, args.threshold))
+        if any(row["regression"] for row in rows):
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
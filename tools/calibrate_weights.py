@@ -0,0 +1,470 @@
+# tools/calibrate_weights.py
+
+"""
+Calibrate the evaluator's scoring weights against human grades.
+
+The component scores of every answer in a labelled corpus (keyword counts,
+key-element and text similarity scores, see evaluator.score_components) are
+computed once. Each weight setting is then applied to all answers at once as
+NumPy array operations, so sweeping thousands of settings takes seconds
+instead of a full re-grade per setting.
+
+Every answer follows exactly one scoring path, so each path's weights are
+tuned independently (the selection metrics are sums over answers):
+
+    text_keywords  KEYWORD_MATCH_WEIGHT (text weight = 1 - w), the
+    and text       KEYWORD_MISS/WRONG penalties and the TF-IDF weight
+                   (shared by both text paths)
+    structured,    key_element (text weight = 1 - w)
+    numeric
+    yes_no_number  yes_no and yes_no_number (text weight = the rest)
+
+Corpus format (JSONL, one graded answer per line):
+    {"correct_answer": "...", "user_answer": "...", "topic": "n-queens", "grade": 85}
+
+Requires NumPy (pip install numpy).
+
+Examples:
+    python -m tools.calibrate_weights --corpus graded.jsonl
+    python -m tools.calibrate_weights --corpus graded.jsonl --metric rmse --keyword-weights 0.5:0.8:0.01
+    python -m tools.calibrate_weights --corpus graded.jsonl --grade-max 10 --save best_weights.json
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+METRICS = ("mae", "rmse", "within")
+DEFAULT_TOLERANCE = 10.0
+DEFAULT_PASS_MARK = 50.0
+
+# Default grids ("start:stop:step", stop included, or comma-separated values)
+DEFAULT_GRIDS = {
+    "keyword_weights": "0.3:0.9:0.05",
+    "key_weights": "0.5:1.0:0.05",
+    "yes_no_weights": "0.2:0.8:0.05",
+    "number_weights": "0.1:0.7:0.05",
+    "miss_penalties": "0:50:5",
+    "wrong_penalties": "0:20:2.5",
+    "wrong_maxima": "0:50:10",
+    "tfidf_weights": "0:0.5:0.1",
+}
+
+# Weighted paths; "empty" scores do not depend on weights
+TUNED_PATHS = ("text_keywords", "text", "key_element", "yes_no_number")
+
+
+def parse_grid(spec: str) -> List[float]:
+    """Parse "start:stop:step" (stop included) or "a,b,c" into a list of values."""
+    if ":" in spec:
+        start, stop, step = (float(part) for part in spec.split(":"))
+        if step <= 0:
+            raise ValueError(f"grid step must be positive: {spec!r}")
+        count = int(round((stop - start) / step)) + 1
+        values = [start + i * step for i in range(count)]
+    else:
+        values = [float(part) for part in spec.split(",") if part.strip()]
+    # Rounded so e.g. 0.65 is the same float as the literal in evaluator.py
+    return sorted(set(round(value, 10) for value in values))
+
+
+# --- Corpus ---
+
+def load_corpus(path: str, grade_max: float = 100.0) -> List[Dict[str, Any]]:
+    """
+    Read a labelled corpus.
+
+    Returns:
+        One dict per answer with the grade rescaled to 0-100
+    """
+    samples = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+                grade = float(item["grade"])
+            except (ValueError, KeyError, TypeError) as e:
+                raise ValueError(f"{path}:{line_number}: invalid corpus entry ({e})")
+            samples.append({
+                "correct_answer": item.get("correct_answer", ""),
+                "user_answer": item.get("user_answer", ""),
+                "topic": item.get("topic", ""),
+                "grade": grade * 100.0 / grade_max,
+            })
+    return samples
+
+
+class ComponentTable:
+    """Component scores of a corpus, one NumPy array per path and component."""
+
+    def __init__(self, samples: Sequence[Dict[str, Any]]):
+        """Compute the components of every sample (the only evaluator calls)."""
+        import numpy as np
+        from core.evaluator import keyword_match_counts, load_keywords_for_topic, normalize_answer, score_components
+        from core.tfidf import tfidf_for_topic
+
+        keywords_by_topic = {}
+        rows = {path: [] for path in TUNED_PATHS}
+        fixed_scores, fixed_grades = [], []
+        self.path_counts: Dict[str, int] = {}
+
+        for sample in samples:
+            topic = sample["topic"]
+            if topic not in keywords_by_topic:
+                keywords_by_topic[topic] = load_keywords_for_topic(topic)
+            keywords = keywords_by_topic[topic]
+
+            correct, user = sample["correct_answer"], sample["user_answer"]
+            path, components, _ = score_components(correct, user, keywords)
+            self.path_counts[path] = self.path_counts.get(path, 0) + 1
+            grade = sample["grade"]
+
+            if path in ("text_keywords", "text"):
+                clean_correct, clean_user = normalize_answer(correct), normalize_answer(user)
+                # TF-IDF is only computed by the evaluator when its weight is not 0
+                tfidf = components.get("tfidf")
+                if tfidf is None:
+                    tfidf = tfidf_for_topic(topic).similarity(clean_correct, clean_user)
+                if path == "text":
+                    rows[path].append((components["text"], tfidf, grade))
+                else:
+                    counts = keyword_match_counts(clean_correct, clean_user, keywords)
+                    rows[path].append(counts + (components["text"], tfidf, grade))
+            elif path in ("structured", "numeric"):
+                rows["key_element"].append((components["key"], components["text"], grade))
+            elif path == "yes_no_number":
+                rows[path].append((components["yes_no"], components["number"], components["text"], grade))
+            else:
+                fixed_scores.append(0)
+                fixed_grades.append(grade)
+
+        widths = {"text_keywords": 7, "text": 3, "key_element": 3, "yes_no_number": 4}
+        self.columns = {
+            path: np.array(rows[path], dtype=np.float64).reshape(-1, widths[path]).T
+            for path in TUNED_PATHS
+        }
+        self.fixed_scores = np.array(fixed_scores, dtype=np.float64)
+        self.fixed_grades = np.array(fixed_grades, dtype=np.float64)
+        self.size = len(samples)
+
+
+# --- Vectorized scoring (mirrors evaluator.combine_components) ---
+
+def keyword_scores(columns, miss: Sequence[float], wrong_each: Sequence[float], wrong_max: Sequence[float]):
+    """
+    Keyword component for every penalty setting.
+
+    Returns:
+        (settings, penalty_grid) with settings of shape (P, N) and
+        penalty_grid the list of P (miss, wrong_each, wrong_max) tuples
+    """
+    import numpy as np
+
+    total, matched, missed, wrong = columns[:4]
+    grid = list(itertools.product(miss, wrong_each, wrong_max))
+    penalties = np.array(grid, dtype=np.float64).reshape(-1, 3)
+    safe_total = np.where(total > 0, total, 1.0)
+
+    match_score = matched / safe_total * 100
+    miss_penalty = (missed / safe_total)[None, :] * penalties[:, 0:1]
+    wrong_penalty = np.minimum(wrong[None, :] * penalties[:, 1:2], penalties[:, 2:3])
+    scores = np.floor(np.clip(match_score[None, :] - miss_penalty - wrong_penalty, 0, 100))
+    scores[:, total == 0] = 0
+    return scores, grid
+
+
+def _with_tfidf(text_score, tfidf, weight: float):
+    """Final text-path score, as in evaluator.combine_components."""
+    import numpy as np
+
+    if weight:
+        text_score = text_score * (1 - weight) + tfidf * weight
+    return np.minimum(np.floor(text_score), 100)
+
+
+def _errors(predicted, grades, tolerance: float):
+    """Per-setting sums used by the metrics: (absolute, squared, within tolerance)."""
+    import numpy as np
+
+    diff = predicted - grades
+    return (
+        np.abs(diff).sum(axis=-1),
+        (diff * diff).sum(axis=-1),
+        (np.abs(diff) <= tolerance).sum(axis=-1),
+    )
+
+
+def _loss(sums, metric: str):
+    """Value to minimize for each setting."""
+    absolute, squared, within = sums
+    if metric == "mae":
+        return absolute
+    if metric == "rmse":
+        return squared
+    return -within
+
+
+def sweep(
+    table: ComponentTable,
+    grids: Dict[str, List[float]],
+    metric: str,
+    tolerance: float,
+    weights: Dict[str, float],
+    penalties: Dict[str, float]
+) -> Dict[str, Any]:
+    """
+    Find the best weights of every path.
+
+    The current setting (weights, penalties) is kept for a path unless some
+    grid setting is strictly better on that path.
+
+    Returns:
+        {"weights": {...}, "penalties": {...}, "settings": number of settings evaluated}
+    """
+    import numpy as np
+
+    best_weights: Dict[str, float] = {}
+    best_penalties: Dict[str, float] = {}
+    settings = 0
+
+    # Text answers: (TF-IDF weight) x (keyword weight) x (penalty grid)
+    columns, plain = table.columns["text_keywords"], table.columns["text"]
+    if columns.shape[1] or plain.shape[1]:
+        keyword, penalty_grid = keyword_scores(
+            columns, grids["miss_penalties"], grids["wrong_penalties"], grids["wrong_maxima"])
+        text, tfidf, grades = columns[4:7]
+
+        def plain_loss(w_tfidf):
+            # Answers of topics without keywords only depend on the TF-IDF weight
+            predicted = _with_tfidf(plain[0], plain[1], w_tfidf)
+            return _loss(_errors(predicted, plain[2], tolerance), metric)
+
+        current, _ = keyword_scores(
+            columns, [penalties["miss_percent"]], [penalties["wrong_each"]], [penalties["wrong_max"]])
+        w_tfidf = weights.get("tfidf", 0.0)
+        predicted = _with_tfidf(current * weights["keyword"] + text * weights["keyword_text"], tfidf, w_tfidf)
+        loss = _loss(_errors(predicted, grades, tolerance), metric)
+        best = (loss[0] + plain_loss(w_tfidf), weights["keyword"], weights["keyword_text"], w_tfidf,
+                (penalties["miss_percent"], penalties["wrong_each"], penalties["wrong_max"]))
+
+        for w_tfidf in grids["tfidf_weights"]:
+            extra = plain_loss(w_tfidf)
+            for w in grids["keyword_weights"]:
+                w_text = round(1.0 - w, 10)
+                predicted = _with_tfidf(keyword * w + text * w_text, tfidf, w_tfidf)
+                loss = _loss(_errors(predicted, grades, tolerance), metric) + extra
+                index = int(np.argmin(loss))
+                if loss[index] < best[0]:
+                    best = (loss[index], w, w_text, w_tfidf, penalty_grid[index])
+                settings += len(penalty_grid)
+        _, w, w_text, w_tfidf, (miss, wrong_each, wrong_max) = best
+        best_weights.update(keyword=w, keyword_text=w_text, tfidf=w_tfidf)
+        best_penalties.update(miss_percent=miss, wrong_each=wrong_each, wrong_max=wrong_max)
+
+    # Structured and numeric answers: key element weight
+    columns = table.columns["key_element"]
+    if columns.shape[1]:
+        key, text, grades = columns
+        w = np.array([weights["key_element"]] + grids["key_weights"])[:, None]
+        w_text = np.round(1.0 - w, 10)
+        w_text[0, 0] = weights["key_text"]
+        predicted = np.minimum(np.floor(key * w + text * w_text), 100)
+        index = int(np.argmin(_loss(_errors(predicted, grades, tolerance), metric)))
+        best_weights.update(key_element=float(w[index, 0]), key_text=float(w_text[index, 0]))
+        settings += len(grids["key_weights"])
+
+    # Yes/no + number answers: every (yes_no, number) pair summing to at most 1
+    columns = table.columns["yes_no_number"]
+    if columns.shape[1]:
+        yes_no, number, text, grades = columns
+        pairs = [(weights["yes_no"], weights["yes_no_number"], weights["yes_no_text"])]
+        pairs += [(a, b, round(1.0 - a - b, 10)) for a in grids["yes_no_weights"] for b in grids["number_weights"]
+                  if a + b <= 1.0 + 1e-9]
+        pairs = np.array(pairs, dtype=np.float64)
+        a, b, c = pairs[:, 0:1], pairs[:, 1:2], pairs[:, 2:3]
+        predicted = np.minimum(np.floor(yes_no * a + number * b + text * c), 100)
+        index = int(np.argmin(_loss(_errors(predicted, grades, tolerance), metric)))
+        best_weights.update(yes_no=float(a[index, 0]), yes_no_number=float(b[index, 0]),
+                            yes_no_text=float(c[index, 0]))
+        settings += len(pairs) - 1
+
+    return {"weights": best_weights, "penalties": best_penalties, "settings": settings}
+
+
+def predict(table: ComponentTable, weights: Dict[str, float], penalties: Dict[str, float]):
+    """Scores of the whole corpus under one setting, with the matching grades."""
+    import numpy as np
+
+    predicted, grades = [table.fixed_scores], [table.fixed_grades]
+
+    w_tfidf = weights.get("tfidf", 0.0)
+    columns = table.columns["text_keywords"]
+    keyword, _ = keyword_scores(
+        columns, [penalties["miss_percent"]], [penalties["wrong_each"]], [penalties["wrong_max"]])
+    predicted.append(_with_tfidf(keyword[0] * weights["keyword"] + columns[4] * weights["keyword_text"],
+                                 columns[5], w_tfidf))
+    grades.append(columns[6])
+
+    text, tfidf, text_grades = table.columns["text"]
+    predicted.append(_with_tfidf(text, tfidf, w_tfidf))
+    grades.append(text_grades)
+
+    key, text, key_grades = table.columns["key_element"]
+    predicted.append(np.minimum(np.floor(key * weights["key_element"] + text * weights["key_text"]), 100))
+    grades.append(key_grades)
+
+    yes_no, number, text, yn_grades = table.columns["yes_no_number"]
+    predicted.append(np.minimum(np.floor(
+        yes_no * weights["yes_no"] + number * weights["yes_no_number"] + text * weights["yes_no_text"]), 100))
+    grades.append(yn_grades)
+
+    return np.concatenate(predicted), np.concatenate(grades)
+
+
+def agreement(predicted, grades, tolerance: float = DEFAULT_TOLERANCE,
+              pass_mark: float = DEFAULT_PASS_MARK) -> Dict[str, float]:
+    """Agreement between evaluator scores and human grades."""
+    import numpy as np
+
+    if not len(grades):
+        return {"mae": 0.0, "rmse": 0.0, "within": 0.0, "pearson": 0.0, "pass_agreement": 0.0}
+    diff = predicted - grades
+    if predicted.std() > 0 and grades.std() > 0:
+        pearson = float(np.corrcoef(predicted, grades)[0, 1])
+    else:
+        pearson = 0.0
+    return {
+        "mae": float(np.abs(diff).mean()),
+        "rmse": float(np.sqrt((diff * diff).mean())),
+        "within": float((np.abs(diff) <= tolerance).mean() * 100),
+        "pearson": pearson,
+        "pass_agreement": float(((predicted >= pass_mark) == (grades >= pass_mark)).mean() * 100),
+    }
+
+
+def current_settings() -> Tuple[Dict[str, float], Dict[str, float]]:
+    """Weights and penalties currently used by the evaluator."""
+    from core import evaluator
+
+    penalties = {
+        "miss_percent": float(evaluator.KEYWORD_MISS_PENALTY_PERCENT),
+        "wrong_each": float(evaluator.KEYWORD_WRONG_PENALTY_EACH),
+        "wrong_max": float(evaluator.KEYWORD_WRONG_PENALTY_MAX),
+    }
+    return dict(evaluator.SCORING_WEIGHTS), penalties
+
+
+# --- Output ---
+
+def format_report(table: ComponentTable, rows: Iterable[Tuple[str, Dict[str, float]]],
+                  tolerance: float, pass_mark: float) -> str:
+    """Render agreement metrics per setting as a text table."""
+    lines = [
+        "answers per path: " + ", ".join(f"{path}={count}" for path, count in sorted(table.path_counts.items())),
+        "",
+        f"{'setting':<10} {'MAE':>8} {'RMSE':>8} {f'<={tolerance:g} pts':>11} {'Pearson r':>10} "
+        f"{f'pass@{pass_mark:g}':>9}",
+        "-" * 61,
+    ]
+    for name, m in rows:
+        lines.append(f"{name:<10} {m['mae']:>8.2f} {m['rmse']:>8.2f} {m['within']:>10.1f}% "
+                     f"{m['pearson']:>10.3f} {m['pass_agreement']:>8.1f}%")
+    return "\n".join(lines)
+
+
+def format_settings(weights: Dict[str, float], penalties: Dict[str, float]) -> str:
+    """Render a setting the way it is written in core/evaluator.py."""
+    lines = ["SCORING_WEIGHTS = {"]
+    lines += [f'    "{key}": {value:g},' for key, value in weights.items()]
+    lines.append("}")
+    if penalties:
+        lines += [
+            f"KEYWORD_MISS_PENALTY_PERCENT = {penalties['miss_percent']:g}",
+            f"KEYWORD_WRONG_PENALTY_EACH = {penalties['wrong_each']:g}",
+            f"KEYWORD_WRONG_PENALTY_MAX = {penalties['wrong_max']:g}",
+        ]
+    return "\n".join(lines)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Calibrate evaluator weights against human grades")
+    parser.add_argument("--corpus", required=True, help="JSONL file of graded answers")
+    parser.add_argument("--grade-max", type=float, default=100.0,
+                        help="maximum human grade, rescaled to 100 (default: %(default)s)")
+    parser.add_argument("--metric", choices=METRICS, default="mae",
+                        help="what the best setting optimizes (default: %(default)s)")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="points of difference counted as agreement (default: %(default)s)")
+    parser.add_argument("--pass-mark", type=float, default=DEFAULT_PASS_MARK,
+                        help="pass/fail threshold for pass agreement (default: %(default)s)")
+    for name, default in DEFAULT_GRIDS.items():
+        parser.add_argument("--" + name.replace("_", "-"), default=default,
+                            help="grid as start:stop:step or a,b,c (default: %(default)s)")
+    parser.add_argument("--save", default=None, help="write the best setting and metrics as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        print("error: calibration needs NumPy (pip install numpy)", file=sys.stderr)
+        return 2
+
+    try:
+        grids = {name: parse_grid(getattr(args, name)) for name in DEFAULT_GRIDS}
+        samples = load_corpus(args.corpus, args.grade_max)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    if not samples:
+        print("error: empty corpus", file=sys.stderr)
+        return 2
+
+    start = time.perf_counter()
+    table = ComponentTable(samples)
+    components_time = time.perf_counter() - start
+
+    weights, penalties = current_settings()
+    start = time.perf_counter()
+    result = sweep(table, grids, args.metric, args.tolerance, weights, penalties)
+    sweep_time = time.perf_counter() - start
+
+    best_weights = dict(weights, **result["weights"])
+    best_penalties = dict(penalties, **result["penalties"])
+
+    metrics = {
+        "current": agreement(*predict(table, weights, penalties), args.tolerance, args.pass_mark),
+        "best": agreement(*predict(table, best_weights, best_penalties), args.tolerance, args.pass_mark),
+    }
+
+    print(format_report(table, metrics.items(), args.tolerance, args.pass_mark))
+    print()
+    print(f"best setting by {args.metric}:")
+    print(format_settings(best_weights, best_penalties))
+    print(f"\n{len(samples)} answers: components in {components_time:.2f}s, "
+          f"{result['settings']} settings swept in {sweep_time:.2f}s", file=sys.stderr)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({
+                "metric": args.metric,
+                "weights": best_weights,
+                "penalties": best_penalties,
+                "metrics": metrics,
+                "answers": len(samples),
+            }, f, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,387 @@
+# tools/load_test.py
+
+"""
+Load generator that simulates concurrent students.
+
+Each virtual student generates a test, answers it with synthetic answers and
+submits it for grading. Students run either in-process (TestBuilder and
+evaluate_batch called directly from a process pool) or against a running
+HTTP API (ui/api_server.py).
+
+For every scenario the report shows throughput, p50/p95/p99 latency per
+operation and peak RSS. In-process scenarios each run in a fresh process;
+their peak RSS is the highest sum over that process and its live workers,
+sampled from /proc every RSS_SAMPLE_INTERVAL seconds (pages shared after
+fork count once per process). Without /proc it falls back to getrusage:
+the process plus its largest worker, marked "*" in the report. Against a
+server it is "n/a" (the load generator's memory says nothing about the
+server's).
+
+Examples:
+    python -m tools.load_test --students 40 --concurrency 8
+    python -m tools.load_test --students 40,200 --concurrency 8,40 --questions 10
+    python -m tools.load_test --url http://127.0.0.1:8000 --students 100 --concurrency 20
+"""
+
+import argparse
+import contextlib
+import json
+import math
+import multiprocessing
+import os
+import random
+import re
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+OPERATIONS = ("generate", "grade", "session")
+
+# Seconds between two RSS samples of a scenario's processes
+RSS_SAMPLE_INTERVAL = 0.05
+
+
+# --- Synthetic answers ---
+
+def synthetic_answer(correct_answer: str, rng: random.Random) -> str:
+    """
+    Produce a plausible student answer for a correct answer.
+
+    The mix covers the evaluator's paths: exact copies, partial answers,
+    wrong numbers, bare numbers and blanks.
+    """
+    roll = rng.random()
+    if roll < 0.35:
+        return correct_answer
+    if roll < 0.60:
+        words = correct_answer.split()
+        keep = max(1, len(words) // 2)
+        return " ".join(words[:keep])
+    if roll < 0.75:
+        return re.sub(r"\d+", lambda m: str(int(m.group(0)) + rng.randint(1, 3)), correct_answer)
+    if roll < 0.90:
+        numbers = re.findall(r"-?\d+", correct_answer)
+        return numbers[0] if numbers else "Nu știu"
+    return ""
+
+
+# --- Student sessions ---
+
+def run_student_inprocess(student_id: int, topics: Optional[List[str]], num_questions: int) -> Dict[str, float]:
+    """Simulate one student by calling the core modules directly."""
+    from core.test_builder import TestBuilder
+    from core.evaluator import evaluate_batch
+
+    rng = random.Random(student_id)
+    start = time.perf_counter()
+    builder = TestBuilder()
+    _, answer_keys = builder.build_records(topics, num_questions)
+    generated = time.perf_counter()
+
+    answers = [key.answer for key in answer_keys]
+    user_answers = [synthetic_answer(a, rng) for a in answers]
+    evaluate_batch(answers, user_answers, [key.topic for key in answer_keys])
+    graded = time.perf_counter()
+
+    return {
+        "generate": generated - start,
+        "grade": graded - generated,
+        "session": graded - start,
+    }
+
+
+def _post_json(url: str, payload: Dict[str, Any], retries: int = 50) -> Dict[str, Any]:
+    """POST JSON, retrying politely when the server signals back-pressure."""
+    data = json.dumps(payload).encode("utf-8")
+    for _ in range(retries):
+        request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            if e.code != 503:
+                raise
+            time.sleep(float(e.headers.get("Retry-After", "1")) * random.uniform(0.5, 1.0))
+    raise RuntimeError(f"Server still busy after {retries} retries")
+
+
+def run_student_http(base_url: str, student_id: int, topics: Optional[List[str]], num_questions: int) -> Dict[str, float]:
+    """Simulate one student against the HTTP API."""
+    rng = random.Random(student_id)
+    start = time.perf_counter()
+    test = _post_json(f"{base_url}/generate-test", {"topics": topics, "num_questions": num_questions})
+    generated = time.perf_counter()
+
+    items = [
+        {
+            "correct_answer": answer,
+            "user_answer": synthetic_answer(answer, rng),
+            "topic": question["topic"],
+        }
+        for question, answer in zip(test["questions"], test["answers"])
+    ]
+    _post_json(f"{base_url}/grade-batch", {"items": items})
+    graded = time.perf_counter()
+
+    return {
+        "generate": generated - start,
+        "grade": graded - generated,
+        "session": graded - start,
+    }
+
+
+# --- Measurements ---
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def peak_rss_kb() -> Optional[int]:
+    """
+    Peak resident set size in KiB: this process plus its largest finished child.
+
+    The value is a high-water mark over the life of the process; children
+    that ran at the same time are not added up (see RssSampler).
+    """
+    if resource is None:
+        return None
+    scale = 1024 if sys.platform == "darwin" else 1  # macOS reports bytes
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss // scale
+    return own + children
+
+
+def _rss_kb(pid: int) -> int:
+    """Current RSS of a process in KiB (0 if it has exited)."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return 0
+    return pages * (os.sysconf("SC_PAGE_SIZE") // 1024)
+
+
+def _child_pids(pid: int) -> List[int]:
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # pid (comm) state ppid ...; comm may contain spaces
+                fields = f.read().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(entry))
+    return children
+
+
+class RssSampler:
+    """Peak of the summed RSS of this process and its live children, sampled from /proc."""
+
+    def __init__(self, interval: float = RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.peak_kb = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    @staticmethod
+    def available() -> bool:
+        return os.path.exists(f"/proc/{os.getpid()}/statm")
+
+    def sample(self) -> int:
+        pid = os.getpid()
+        total = _rss_kb(pid) + sum(_rss_kb(child) for child in _child_pids(pid))
+        self.peak_kb = max(self.peak_kb, total)
+        return total
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def __enter__(self) -> "RssSampler":
+        self.sample()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+
+
+def run_scenario(
+    students: int,
+    concurrency: int,
+    num_questions: int,
+    topics: Optional[List[str]] = None,
+    url: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Run one scenario and collect latency statistics.
+
+    Args:
+        students: Number of virtual students
+        concurrency: Students running at the same time
+        num_questions: Questions per test
+        topics: Topics to draw from (None = all)
+        url: Base URL of a running API server; in-process when None
+
+    Returns:
+        Dictionary with throughput, per-operation percentiles and peak RSS
+        (None against a server)
+    """
+    if url:
+        return _measure_scenario(students, concurrency, num_questions, topics, url)
+
+    # peak_rss_kb is a high-water mark: a fresh process per scenario keeps
+    # earlier (larger) scenarios out of this one's figure
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(
+        target=_scenario_process, args=(sender, students, concurrency, num_questions, topics))
+    process.start()
+    sender.close()
+    try:
+        report = receiver.recv()
+    except EOFError:
+        raise RuntimeError(f"scenario process exited with code {process.exitcode}")
+    finally:
+        process.join()
+    return report
+
+
+def _scenario_process(connection, students: int, concurrency: int, num_questions: int, topics: Optional[List[str]]):
+    connection.send(_measure_scenario(students, concurrency, num_questions, topics))
+    connection.close()
+
+
+def _measure_scenario(
+    students: int,
+    concurrency: int,
+    num_questions: int,
+    topics: Optional[List[str]] = None,
+    url: Optional[str] = None,
+) -> Dict[str, Any]:
+    timings = {op: [] for op in OPERATIONS}
+    errors = 0
+
+    if url:
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        submit = lambda i: executor.submit(run_student_http, url.rstrip("/"), i, topics, num_questions)
+    else:
+        executor = ProcessPoolExecutor(max_workers=concurrency)
+        submit = lambda i: executor.submit(run_student_inprocess, i, topics, num_questions)
+
+    sampler = RssSampler() if not url and RssSampler.available() else None
+    start = time.perf_counter()
+    # The sampler stops before the pool shuts down, while its workers are alive
+    with executor, sampler or contextlib.nullcontext():
+        futures = [submit(i) for i in range(students)]
+        for future in futures:
+            try:
+                result = future.result()
+            except Exception:
+                errors += 1
+                continue
+            for op in OPERATIONS:
+                timings[op].append(result[op])
+    elapsed = time.perf_counter() - start
+
+    completed = students - errors
+    report = {
+        "mode": "http" if url else "inprocess",
+        "students": students,
+        "concurrency": concurrency,
+        "questions": num_questions,
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "students_per_s": completed / elapsed if elapsed else 0.0,
+        "questions_per_s": completed * num_questions / elapsed if elapsed else 0.0,
+        "peak_rss_kb": None,
+        # "sampled": all live processes added up; "largest_worker": getrusage fallback
+        "peak_rss_source": None,
+    }
+    if sampler is not None:
+        report["peak_rss_kb"], report["peak_rss_source"] = sampler.peak_kb, "sampled"
+    elif not url:
+        report["peak_rss_kb"], report["peak_rss_source"] = peak_rss_kb(), "largest_worker"
+    for op in OPERATIONS:
+        values = sorted(timings[op])
+        for pct in (50, 95, 99):
+            report[f"{op}_p{pct}_ms"] = percentile(values, pct) * 1000
+    return report
+
+
+def format_report(reports: List[Dict[str, Any]]) -> str:
+    """Render scenario reports as a text table."""
+    lines = []
+    header = (f"{'students':>8} {'conc':>5} {'q':>4} {'err':>4} {'stud/s':>8} {'q/s':>8}  "
+              f"{'op':<8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'peak RSS':>10}")
+    lines.append(header)
+    lines.append("-" * len(header))
+    for r in reports:
+        rss = f"{r['peak_rss_kb'] / 1024:.1f} MiB" if r["peak_rss_kb"] is not None else "n/a"
+        if r.get("peak_rss_source") == "largest_worker":
+            rss += "*"
+        for i, op in enumerate(OPERATIONS):
+            prefix = (f"{r['students']:>8} {r['concurrency']:>5} {r['questions']:>4} {r['errors']:>4} "
+                      f"{r['students_per_s']:>8.1f} {r['questions_per_s']:>8.1f}") if i == 0 else " " * 42
+            lines.append(f"{prefix}  {op:<8} {r[op + '_p50_ms']:>9.1f} {r[op + '_p95_ms']:>9.1f} "
+                         f"{r[op + '_p99_ms']:>9.1f} {rss if i == 0 else '':>10}")
+    if any(r.get("peak_rss_source") == "largest_worker" for r in reports):
+        lines.append("* peak RSS of the load generator plus its largest worker (no /proc to sample)")
+    return "\n".join(lines)
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(x) for x in value.split(",") if x.strip()]
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Simulate concurrent students generating and submitting tests")
+    parser.add_argument("--students", type=_int_list, default=[40], help="comma-separated student counts")
+    parser.add_argument("--concurrency", type=_int_list, default=[8], help="comma-separated concurrency levels")
+    parser.add_argument("--questions", type=int, default=5, help="questions per test")
+    parser.add_argument("--topics", default=None, help="comma-separated topic IDs (default: all)")
+    parser.add_argument("--url", default=None, help="base URL of a running API server (default: in-process)")
+    parser.add_argument("--json", dest="json_path", default=None, help="also write the reports to this JSON file")
+    args = parser.parse_args(argv)
+
+    topics = [t.strip() for t in args.topics.split(",")] if args.topics else None
+
+    reports = []
+    for students in args.students:
+        for concurrency in args.concurrency:
+            report = run_scenario(students, concurrency, args.questions, topics, args.url)
+            reports.append(report)
+            print(f"scenario students={students} concurrency={concurrency}: "
+                  f"{report['elapsed_s']:.1f}s, {report['errors']} errors", file=sys.stderr)
+
+    print(format_report(reports))
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
+
+    return 1 if any(r["errors"] for r in reports) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
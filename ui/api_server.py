@@ -0,0 +1,347 @@
+# ui/api_server.py
+
+"""
+Local HTTP API for SmarTest.
+
+A small asyncio HTTP/1.1 server that other systems (e.g. an LMS) can call
+concurrently. CPU-heavy work runs on a bounded process pool; requests beyond
+the pool size wait in a bounded queue and anything past that is rejected
+with 503 so callers can back off.
+
+Endpoints:
+    GET  /health
+    POST /generate-test      {"topics": [...], "num_questions": 5, "params": {}}
+    POST /generate-question  {"topic": "n-queens", "params": {}}
+    POST /grade-batch        {"items": [{"correct_answer": "...", "user_answer": "...", "topic": "..."}]}
+
+Run with: python -m ui.api_server --port 8000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+MAX_BODY_BYTES = 1024 * 1024
+MAX_QUESTIONS_PER_REQUEST = 500
+MAX_GRADE_ITEMS_PER_REQUEST = 5000
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class RequestError(Exception):
+    """Error that maps directly to an HTTP status code."""
+
+    def __init__(self, status: int, message: str):
+        # Both values go to args so the error survives pickling from a worker
+        super().__init__(status, message)
+        self.status = status
+        self.message = message
+
+
+# --- Worker jobs (run in the process pool, must be importable top-level functions) ---
+
+def _init_worker():
+    """Prepare a pool process: fresh RNG state and warm handler caches."""
+    # Forked workers inherit the parent's RNG state; reseed so they differ
+    random.seed()
+    from core.question_factory import preload_handlers
+    preload_handlers()
+
+
+def _ready_job() -> int:
+    return os.getpid()
+
+
+def _generate_test_job(topics: List[str], num_questions: int, params: Dict[str, Any]) -> Dict[str, Any]:
+    from core.test_builder import TestBuilder
+    builder = TestBuilder()
+    questions, answers = builder.generate_test(topics, num_questions, params)
+    return {"questions": questions, "answers": answers}
+
+
+def _generate_question_job(topic: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    from core.question_factory import generate_question_and_answer
+    question, answer = generate_question_and_answer(topic, params)
+    if question is None:
+        raise RequestError(400, f"Unknown topic: {topic}")
+    return {"topic": topic, "question": question, "answer": answer}
+
+
+def _grade_batch_job(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    from core.evaluator import evaluate_batch
+    scores = evaluate_batch(
+        [item.get("correct_answer", "") for item in items],
+        [item.get("user_answer", "") for item in items],
+        [item.get("topic", "") for item in items],
+    )
+    return {"scores": scores}
+
+
+# --- Request validation ---
+
+def _parse_generate_test(body: Dict[str, Any]) -> Tuple:
+    topics = body.get("topics")
+    if topics is not None and (not isinstance(topics, list) or not all(isinstance(t, str) for t in topics)):
+        raise RequestError(400, "'topics' must be a list of strings")
+    num_questions = body.get("num_questions", 5)
+    # bool is a subclass of int; "num_questions": true is not a count
+    if isinstance(num_questions, bool) or not isinstance(num_questions, int) or not 1 <= num_questions <= MAX_QUESTIONS_PER_REQUEST:
+        raise RequestError(400, f"'num_questions' must be an integer between 1 and {MAX_QUESTIONS_PER_REQUEST}")
+    return topics, num_questions, _parse_params(body)
+
+
+def _parse_generate_question(body: Dict[str, Any]) -> Tuple:
+    topic = body.get("topic")
+    if not isinstance(topic, str) or not topic:
+        raise RequestError(400, "'topic' is required")
+    return topic, _parse_params(body)
+
+
+def _parse_grade_batch(body: Dict[str, Any]) -> Tuple:
+    items = body.get("items")
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        raise RequestError(400, "'items' must be a list of objects")
+    if len(items) > MAX_GRADE_ITEMS_PER_REQUEST:
+        raise RequestError(413, f"At most {MAX_GRADE_ITEMS_PER_REQUEST} items per request")
+    for number, item in enumerate(items, 1):
+        for field in ("correct_answer", "user_answer", "topic"):
+            if not isinstance(item.get(field, ""), str):
+                raise RequestError(400, f"items[{number}]: '{field}' must be a string")
+    return (items,)
+
+
+def _parse_params(body: Dict[str, Any]) -> Dict[str, Any]:
+    params = body.get("params") or {}
+    if not isinstance(params, dict):
+        raise RequestError(400, "'params' must be an object")
+    return params
+
+
+# path -> (request parser, pool job)
+ROUTES = {
+    "/generate-test": (_parse_generate_test, _generate_test_job),
+    "/generate-question": (_parse_generate_question, _generate_question_job),
+    "/grade-batch": (_parse_grade_batch, _grade_batch_job),
+}
+
+
+class APIServer:
+    """Asyncio HTTP front-end over a bounded process pool."""
+
+    def __init__(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        workers: int = None,
+        max_queue: int = None
+    ):
+        """
+        Configure the server.
+
+        Args:
+            host: Interface to bind
+            port: TCP port
+            workers: Number of worker processes (default: CPU count)
+            max_queue: Requests allowed to wait for a worker before new ones
+                are rejected with 503 (default: 4 per worker)
+        """
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = self.workers * 4 if max_queue is None else max_queue
+        self.in_flight = 0
+        self.rejected = 0
+        self.completed = 0
+        self._pool = None
+        self._server = None
+
+    async def start(self):
+        """Start the worker pool and begin accepting connections."""
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        # Fork every worker now: a worker forked while a connection is open
+        # inherits its socket and keeps it open after the response
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._pool, _ready_job) for _ in range(self.workers)))
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        # Port 0 binds an ephemeral port; report the real one
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """Stop accepting connections and shut down the pool."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+
+    async def serve_forever(self):
+        """Run until cancelled."""
+        await self.start()
+        print(f"SmarTest API listening on http://{self.host}:{self.port} "
+              f"({self.workers} workers, queue {self.max_queue})")
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        """Current load counters."""
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": max(0, self.in_flight - self.workers),
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except RequestError as e:
+                    await self._respond(writer, e.status, {"error": e.message}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                status, payload, extra_headers = await self._dispatch(method, path, body)
+                await self._respond(writer, status, payload, keep_alive, extra_headers)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        """Parse one HTTP/1.1 request; returns None when the client hung up."""
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise RequestError(400, "Malformed request line")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise RequestError(400, "Invalid Content-Length")
+        if length < 0:
+            raise RequestError(400, "Invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise RequestError(413, "Request body too large")
+
+        body = await reader.readexactly(length) if length else b""
+        path = target.split("?", 1)[0]
+        return method.upper(), path, headers, body
+
+    async def _dispatch(self, method: str, path: str, body: bytes):
+        """Route a request; returns (status, payload, extra_headers)."""
+        if path == "/health":
+            if method != "GET":
+                return 405, {"error": "Use GET"}, {}
+            return 200, dict(self.stats(), status="ok"), {}
+
+        route = ROUTES.get(path)
+        if route is None:
+            return 404, {"error": f"Unknown endpoint: {path}"}, {}
+        if method != "POST":
+            return 405, {"error": "Use POST"}, {}
+
+        parse, job = route
+        try:
+            data = json.loads(body.decode("utf-8") or "{}")
+            if not isinstance(data, dict):
+                raise RequestError(400, "Request body must be a JSON object")
+            args = parse(data)
+        except (ValueError, UnicodeDecodeError):
+            return 400, {"error": "Invalid JSON"}, {}
+        except RequestError as e:
+            return e.status, {"error": e.message}, {}
+
+        # Back-pressure: only workers + max_queue requests may be pending
+        if self.in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            return 503, {"error": "Server busy, retry later"}, {"Retry-After": "1"}
+
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._pool, job, *args)
+            self.completed += 1
+            return 200, result, {}
+        except RequestError as e:
+            return e.status, {"error": e.message}, {}
+        except ValueError as e:
+            return 400, {"error": str(e)}, {}
+        except Exception as e:
+            return 500, {"error": f"{type(e).__name__}: {e}"}, {}
+        finally:
+            self.in_flight -= 1
+
+    async def _respond(self, writer, status: int, payload, keep_alive: bool = True, extra_headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        headers = [
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}",
+            "Content-Type: application/json; charset=utf-8",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        for name, value in (extra_headers or {}).items():
+            headers.append(f"{name}: {value}")
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+
+def run_server(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, workers: int = None, max_queue: int = None):
+    """Run the API server until interrupted (Ctrl+C)."""
+    server = APIServer(host, port, workers, max_queue)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("\nServer stopped.")
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="SmarTest local HTTP API")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--max-queue", type=int, default=None, help="queued requests before returning 503")
+    args = parser.parse_args(argv)
+    run_server(args.host, args.port, args.workers, args.max_queue)
+
+
+if __name__ == "__main__":
+    main()
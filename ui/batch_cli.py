@@ -0,0 +1,575 @@
+# ui/batch_cli.py
+
+"""
+Non-interactive command line for unattended jobs (e.g. nightly exam preparation).
+
+Subcommands:
+    generate   Generate one test per student and export it (jsonl, txt, pdf or smt)
+    grade      Grade a JSONL file of submissions (incrementally with --previous)
+    collusion  Report suspiciously similar free-text answers between students
+    item-stats Difficulty and discrimination of each question variant
+    bench      Run the benchmark suite (tools/benchmarks.py)
+    serve      Run the HTTP API (ui/api_server.py)
+
+Results are streamed as they are produced (in student order). Exit status:
+0 on success, 1 if some students/submissions failed, 2 on usage errors,
+130 when interrupted.
+
+Examples:
+    python main.py generate --topics n-queens,minimax --count 10 --students 200 --workers 4 > tests.jsonl
+    python main.py generate --students 30 --format pdf --output exams/ --seed 2024
+    python main.py grade --submissions submissions.jsonl --workers 4 > grades.jsonl
+    python main.py grade --submissions submissions.jsonl --previous grades.jsonl --output regraded.jsonl
+    python main.py grade --submissions submissions.jsonl --db results.db > grades.jsonl
+    python main.py generate --students 30 --format smt --output exams/
+    python main.py collusion --submissions submissions.jsonl --threshold 90 > suspicious.jsonl
+    python main.py bench --quick
+    python main.py serve --port 8000 --workers 4
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+EXIT_OK = 0
+EXIT_PARTIAL_FAILURE = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+
+FORMATS = ("jsonl", "txt", "pdf", "smt")
+
+
+# --- Worker jobs (top-level so they can run in a process pool) ---
+
+def _generate_student(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Generate (and, for txt/pdf/smt, write) the test of one student."""
+    from core.test_builder import TestBuilder
+
+    student = job["student"]
+    try:
+        builder = TestBuilder()
+        builder.generate_test(job["topics"], job["count"], seed=job["seed"])
+    except Exception as e:
+        return {"student": student, "error": f"{type(e).__name__}: {e}"}
+
+    result = {"student": student, "seed": job["seed"]}
+    if job["format"] == "jsonl":
+        result["questions"] = builder.questions
+        result["answers"] = builder.answers
+        return result
+    if job.get("record"):
+        result["_record"] = {"questions": builder.questions, "answers": builder.answers}
+
+    prefix = os.path.join(job["output"], f"student_{student:04d}")
+    try:
+        if job["format"] == "smt":
+            from core.test_format import save_test
+            files = [f"{prefix}.smt"]
+            save_test(files[0], builder.questions, builder.answers, seed=job["seed"])
+        elif job["format"] == "txt":
+            files = [f"{prefix}_questions.txt", f"{prefix}_answers.txt"]
+            with open(files[0], "w", encoding="utf-8") as f:
+                f.write(builder.get_questions_text())
+            with open(files[1], "w", encoding="utf-8") as f:
+                f.write(builder.get_answers_text())
+        else:
+            from core.pdf_generator import PDFGenerator
+            files = [f"{prefix}_questions.pdf", f"{prefix}_answers.pdf"]
+            generator = PDFGenerator(renderer="canvas")
+            generator.generate_questions_pdf(builder.questions, files[0], title=f"Test - Student {student}")
+            generator.generate_answers_pdf(builder.answers, files[1])
+    except Exception as e:
+        return {"student": student, "error": f"{type(e).__name__}: {e}"}
+
+    result["files"] = files
+    return result
+
+
+# Saved tests opened by this process (a worker grades many submissions of one exam)
+_test_files: Dict[str, Any] = {}
+
+
+def _test_answer_keys(path: str, user_answers) -> tuple:
+    """
+    Questions, answer keys and answers of a submission to a saved test
+    (core.test_format.submission_answer_keys; the file stays open for the
+    next submission).
+    """
+    from core.test_format import TestFile, submission_answer_keys
+
+    test = _test_files.get(path)
+    if test is None:
+        test = _test_files[path] = TestFile(path)
+        changed = test.changed_templates()
+        if changed:
+            print(f"warning: {path}: templates changed since the test was saved: {', '.join(changed)}; "
+                  "answer keys are graded as stored", file=sys.stderr)
+    return submission_answer_keys(test, user_answers)
+
+
+def _grade_submission(submission: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Grade one submission.
+
+    Accepted shapes:
+        {"items": [{"correct_answer", "user_answer", "topic"}, ...]}
+        {"questions": [...], "answers": [...], "user_answers": [...]}
+          (a line of `generate --format jsonl` plus the student's answers)
+        {"test": "exam.smt", "user_answers": [...] or {"3": ..., ...}}
+          (a test saved with core.test_format; answer keys are read lazily)
+
+    With "_components" set, the result keeps each answer's component scores
+    and fingerprints ("graded"); "_previous" holds those of a previous
+    grading, which are reused for unchanged answers. With "_record" set, the
+    result carries what the results store needs ("_record").
+    """
+    from core.regrade import RegradeStats, grade_answers, weights_fingerprint
+
+    result = {key: submission[key] for key in ("student", "id") if key in submission}
+    try:
+        if "invalid" in submission:
+            raise ValueError(submission["invalid"])
+        if "items" in submission:
+            items = submission["items"]
+            questions = [
+                {key: item[key] for key in ("question", "topic", "variant", "params") if key in item}
+                for item in items
+            ]
+            correct = [item.get("correct_answer", "") for item in items]
+            given = [item.get("user_answer", "") for item in items]
+        elif "test" in submission:
+            questions, correct, given = _test_answer_keys(submission["test"], submission["user_answers"])
+        else:
+            questions = submission["questions"]
+            correct = submission["answers"]
+            given = submission["user_answers"]
+            if len(given) != len(correct):
+                raise ValueError(f"expected {len(correct)} answers, got {len(given)}")
+        topics = [q.get("topic", "") for q in questions]
+        stats = RegradeStats()
+        graded = grade_answers(correct, given, topics, submission.get("_previous"), stats)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        return result
+
+    scores = [answer["score"] for answer in graded]
+    result["scores"] = scores
+    result["average"] = sum(scores) / len(scores) if scores else 0.0
+    if submission.get("_components"):
+        result["weights"] = weights_fingerprint()
+        result["graded"] = graded
+    result["_stats"] = stats.to_dict()
+    if submission.get("_record"):
+        result["_record"] = {
+            "questions": questions,
+            "answers": correct,
+            "user_answers": given,
+            "graded": graded,
+            # Tests graded question by question are not recorded as whole tests
+            "generated": "items" not in submission and not isinstance(submission.get("user_answers"), dict),
+            "seed": submission.get("seed"),
+        }
+    return result
+
+
+# --- Streaming helpers ---
+
+# Jobs in flight per worker process: enough to keep the pool busy while
+# results are written, without reading the whole input up front
+JOBS_PER_WORKER = 4
+
+
+def _run_jobs(func: Callable, jobs: Iterable, workers: int) -> Iterator[Any]:
+    """
+    Run jobs in order, in-process for one worker, else on a process pool.
+
+    The jobs iterator is consumed lazily: at most JOBS_PER_WORKER * workers
+    jobs are submitted ahead of the result being yielded (executor.map would
+    submit them all at once).
+    """
+    if workers <= 1:
+        for job in jobs:
+            yield func(job)
+        return
+
+    window = JOBS_PER_WORKER * workers
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        try:
+            for job in jobs:
+                pending.append(executor.submit(func, job))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # Interrupted or closed early: drop what has not started yet
+            for future in pending:
+                future.cancel()
+
+
+def _open_output(path: Optional[str]):
+    if not path or path == "-":
+        return sys.stdout
+    return open(path, "w", encoding="utf-8")
+
+
+def _read_submissions(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield submissions from a JSONL file ('-' = stdin); bad lines become error entries."""
+    stream = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    try:
+        for line_number, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                submission = json.loads(line)
+                if not isinstance(submission, dict):
+                    raise ValueError("not a JSON object")
+            except ValueError as e:
+                submission = {"id": line_number, "invalid": f"line {line_number}: {e}"}
+            yield submission
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def _submission_key(submission: Dict[str, Any], position: int):
+    """Key matching a submission with its previous grading: student, else id, else position."""
+    for key in ("student", "id"):
+        if key in submission:
+            return key, submission[key]
+    return "position", position
+
+
+def _read_previous(path: str) -> Dict[Any, List[Dict[str, Any]]]:
+    """Stored answers of a previous `grade --components` output, by submission key."""
+    previous = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for position, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(result, dict) and "graded" in result:
+                previous[_submission_key(result, position)] = result["graded"]
+    return previous
+
+
+def _with_previous(
+    submissions: Iterable[Dict[str, Any]],
+    previous: Dict[Any, List[Dict[str, Any]]],
+    components: bool,
+    record: bool = False
+) -> Iterator[Dict[str, Any]]:
+    for position, submission in enumerate(submissions, 1):
+        if components:
+            submission["_components"] = True
+            submission["_previous"] = previous.get(_submission_key(submission, position))
+        if record:
+            submission["_record"] = True
+        yield submission
+
+
+def _open_store(path: Optional[str]):
+    """Results store for --db (default: SMARTEST_RESULTS_DB), or None."""
+    from core.results_store import ResultsStore, get_default_store
+    return ResultsStore(path) if path else get_default_store()
+
+
+def _record_graded(store, result: Dict[str, Any], position: int):
+    record = result.pop("_record", None)
+    if store is None or record is None:
+        return
+    student = result.get("student", result.get("id", position))
+    test_id = None
+    if record["generated"]:
+        # A `generate` line: keep the test and its answer key too
+        test_id = store.record_test(record["questions"], record["answers"], seed=record["seed"], student=student)
+    store.record_submission(student, record["questions"], record["answers"], record["user_answers"],
+                            result["scores"], graded=record["graded"], test_id=test_id)
+
+
+# --- Subcommands ---
+
+def cmd_generate(args) -> int:
+    from core.test_builder import TestBuilder
+
+    topics = [t.strip() for t in args.topics.split(",") if t.strip()] if args.topics else None
+    try:
+        TestBuilder()._validate_topics(topics)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return EXIT_USAGE
+
+    if args.format == "pdf":
+        from core.pdf_generator import is_pdf_available
+        if not is_pdf_available():
+            print("error: PDF export needs ReportLab (pip install reportlab)", file=sys.stderr)
+            return EXIT_USAGE
+    if args.format != "jsonl":
+        os.makedirs(args.output, exist_ok=True)
+
+    # Always record seeds so any student's test can be regenerated
+    base_seed = args.seed if args.seed is not None else random.SystemRandom().getrandbits(31)
+    print(f"base seed: {base_seed}", file=sys.stderr)
+
+    store = _open_store(args.db)
+    jobs = (
+        {
+            "student": student,
+            "topics": topics,
+            "count": args.count,
+            "seed": base_seed + student,
+            "format": args.format,
+            "output": args.output,
+            "record": store is not None,
+        }
+        for student in range(1, args.students + 1)
+    )
+
+    failures = 0
+    out = _open_output(args.output) if args.format == "jsonl" else None
+    try:
+        for result in _run_jobs(_generate_student, jobs, args.workers):
+            if "error" in result:
+                failures += 1
+                print(f"student {result['student']}: FAILED {result['error']}", file=sys.stderr)
+                continue
+            if store is not None:
+                record = result.pop("_record", result)
+                store.record_test(record["questions"], record["answers"], seed=result["seed"], student=result["student"])
+            if out is not None:
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                out.flush()
+            else:
+                print(f"student {result['student']}: " + ", ".join(result["files"]), flush=True)
+    finally:
+        if out is not None and out is not sys.stdout:
+            out.close()
+        if store is not None:
+            store.close()
+
+    print(f"generated {args.students - failures}/{args.students} tests", file=sys.stderr)
+    return EXIT_PARTIAL_FAILURE if failures else EXIT_OK
+
+
+def cmd_grade(args) -> int:
+    if args.submissions != "-" and not os.path.exists(args.submissions):
+        print(f"error: no such file: {args.submissions}", file=sys.stderr)
+        return EXIT_USAGE
+
+    previous = {}
+    if args.previous:
+        try:
+            previous = _read_previous(args.previous)
+        except OSError as e:
+            print(f"error: {e}", file=sys.stderr)
+            return EXIT_USAGE
+    # Re-grading keeps the components too, so it can be repeated
+    components = args.components or bool(args.previous)
+    store = _open_store(args.db)
+    submissions = _with_previous(_read_submissions(args.submissions), previous, components, store is not None)
+
+    total = 0
+    failures = 0
+    reused = 0
+    recomputed = 0
+    out = _open_output(args.output)
+    try:
+        for result in _run_jobs(_grade_submission, submissions, args.workers):
+            total += 1
+            if "error" in result:
+                failures += 1
+            stats = result.pop("_stats", None)
+            if stats:
+                reused += stats["reused"]
+                recomputed += stats["new"] + stats["key_changed"] + stats["config_changed"]
+            _record_graded(store, result, total)
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if store is not None:
+            # Commits whatever is still queued
+            store.close()
+
+    print(f"graded {total - failures}/{total} submissions", file=sys.stderr)
+    if args.previous:
+        print(f"recomputed {recomputed} answers, reused {reused} stored components", file=sys.stderr)
+    return EXIT_PARTIAL_FAILURE if failures else EXIT_OK
+
+
+def cmd_collusion(args) -> int:
+    from core.collusion import collusion_report
+
+    if args.submissions != "-" and not os.path.exists(args.submissions):
+        print(f"error: no such file: {args.submissions}", file=sys.stderr)
+        return EXIT_USAGE
+
+    submissions = [s for s in _read_submissions(args.submissions) if "invalid" not in s]
+    options = {name: getattr(args, name) for name in ("threshold", "min_chars") if getattr(args, name) is not None}
+    try:
+        report = collusion_report(submissions, **options)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return EXIT_USAGE
+
+    out = _open_output(args.output)
+    try:
+        for row in report:
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"{len(report)} suspicious pair(s) in {len(submissions)} submissions", file=sys.stderr)
+    return EXIT_OK
+
+
+def cmd_item_stats(args) -> int:
+    from core.results_store import RESULTS_DB_ENV
+
+    path = args.db or os.environ.get(RESULTS_DB_ENV)
+    if not path or not os.path.exists(path):
+        print(f"error: no results database (use --db or set {RESULTS_DB_ENV})", file=sys.stderr)
+        return EXIT_USAGE
+
+    store = _open_store(path)
+    try:
+        if args.by_topic:
+            report = store.topic_statistics(args.min_count)
+        else:
+            report = store.item_statistics(args.topic, args.min_count)
+    finally:
+        store.close()
+
+    out = _open_output(args.output)
+    try:
+        for row in report:
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    flagged = sum(1 for row in report if row["flags"])
+    print(f"{flagged}/{len(report)} {'topics' if args.by_topic else 'items'} flagged", file=sys.stderr)
+    return EXIT_OK
+
+
+def cmd_bench(args) -> int:
+    from tools.benchmarks import main as benchmarks_main
+    return benchmarks_main(args.passthrough)
+
+
+def cmd_serve(args) -> int:
+    from ui.api_server import main as api_main
+    api_main(args.passthrough)
+    return EXIT_OK
+
+
+# Subcommands whose remaining arguments go to another module's main()
+PASSTHROUGH_COMMANDS = ("bench", "serve")
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("must be at least 1")
+    return number
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="main.py", description="SmarTest batch commands")
+    subparsers = parser.add_subparsers(dest="command", metavar="command")
+    subparsers.required = True
+
+    generate = subparsers.add_parser("generate", help="generate one test per student")
+    generate.add_argument("--topics", default=None, help="comma-separated topic IDs (default: all)")
+    generate.add_argument("--count", type=_positive_int, default=5, help="questions per test")
+    generate.add_argument("--students", type=_positive_int, default=1, help="number of tests to generate")
+    generate.add_argument("--workers", type=_positive_int, default=1, help="worker processes")
+    generate.add_argument("--format", choices=FORMATS, default="jsonl", help="output format (default: jsonl)")
+    generate.add_argument("--output", default=None,
+                          help="jsonl: output file (default: stdout); txt/pdf/smt: output directory (default: .)")
+    generate.add_argument("--seed", type=int, default=None,
+                          help="base seed; student i gets seed+i (reproducible exams)")
+    generate.add_argument("--db", default=None,
+                          help="also record the tests in this results database (default: $SMARTEST_RESULTS_DB)")
+    generate.set_defaults(func=cmd_generate)
+
+    grade = subparsers.add_parser("grade", help="grade a JSONL file of submissions")
+    grade.add_argument("--submissions", required=True, help="JSONL file, one submission per line ('-' = stdin)")
+    grade.add_argument("--workers", type=_positive_int, default=1, help="worker processes")
+    grade.add_argument("--output", default=None, help="JSONL output file (default: stdout)")
+    grade.add_argument("--components", action="store_true",
+                       help="keep per-answer component scores and fingerprints for later re-grades")
+    grade.add_argument("--previous", default=None,
+                       help="output of an earlier grade run with components; only answers whose "
+                            "key or scoring components changed are recomputed")
+    grade.add_argument("--db", default=None,
+                       help="record submissions and scores in this results database (default: $SMARTEST_RESULTS_DB)")
+    grade.set_defaults(func=cmd_grade)
+
+    collusion = subparsers.add_parser("collusion", help="report suspiciously similar answers between students")
+    collusion.add_argument("--submissions", required=True, help="JSONL file, one submission per line ('-' = stdin)")
+    collusion.add_argument("--threshold", type=int, default=None,
+                           help="fuzzy score (0-100) confirming a pair (default: 85)")
+    collusion.add_argument("--min-chars", type=int, default=None,
+                           help="ignore shorter answers (default: 20)")
+    collusion.add_argument("--output", default=None, help="JSONL output file (default: stdout)")
+    collusion.set_defaults(func=cmd_collusion)
+
+    item_stats = subparsers.add_parser("item-stats", help="difficulty and discrimination of each question variant")
+    item_stats.add_argument("--db", default=None, help="results database (default: $SMARTEST_RESULTS_DB)")
+    item_stats.add_argument("--topic", default=None, help="only this topic")
+    item_stats.add_argument("--by-topic", action="store_true", help="one line per topic, all variants merged")
+    item_stats.add_argument("--min-count", type=_positive_int, default=30,
+                            help="items with fewer answers are not flagged (default: 30)")
+    item_stats.add_argument("--output", default=None, help="JSONL output file (default: stdout)")
+    item_stats.set_defaults(func=cmd_item_stats)
+
+    # Options of bench and serve are left to their own parsers (see main); no
+    # -h here so `bench --help` shows the benchmark options
+    bench = subparsers.add_parser("bench", add_help=False, help="run the benchmark suite (options are passed through)")
+    bench.set_defaults(func=cmd_bench)
+
+    serve = subparsers.add_parser("serve", add_help=False, help="run the HTTP API (options are passed through)")
+    serve.set_defaults(func=cmd_serve)
+
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if args.command in PASSTHROUGH_COMMANDS:
+        args.passthrough = extra
+    elif extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    if args.command == "generate" and args.format != "jsonl" and not args.output:
+        args.output = "."
+    try:
+        return args.func(args)
+    except KeyboardInterrupt:
+        print("interrupted", file=sys.stderr)
+        return EXIT_INTERRUPTED
+    except BrokenPipeError:
+        # Output closed early (e.g. piped into head)
+        return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
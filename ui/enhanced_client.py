@@ -9,7 +9,9 @@ import os
 from typing import List
 from core.test_builder import TestBuilder
 from core.evaluator import evaluate_answer
-from core.pdf_generator import PDFGenerator, is_pdf_available
+from core.render_cache import get_default_cache
+from core.results_store import get_default_store
+from core.test_format import TestFile, is_test_file
 
 
 def display_menu():
@@ -112,7 +114,7 @@ def generate_single_question():
 
 def generate_test():
     """Generate a test with multiple questions."""
-    builder = TestBuilder()
+    builder = TestBuilder(cache=get_default_cache())
     
     # Get number of questions
     try:
@@ -146,6 +148,9 @@ def generate_test():
     # Ask if user wants to save
     save = input("\nSave questions to file? (y/n): ").strip().lower()
     if save == 'y':
+        # ReportLab is only imported when the user actually saves
+        from core.pdf_generator import PDFGenerator, is_pdf_available
+        
         # Ask for format
         if is_pdf_available():
             file_format = input("Format (txt/pdf, default: txt): ").strip().lower() or "txt"
@@ -158,7 +163,6 @@ def generate_test():
             answers_file = input("Answers filename (default: answers.pdf): ").strip() or "answers.pdf"
             
             # Sanitize filenames
-            import os
             questions_file = os.path.basename(questions_file)
             answers_file = os.path.basename(answers_file)
             if not questions_file.endswith('.pdf'):
@@ -167,7 +171,7 @@ def generate_test():
                 answers_file += '.pdf'
             
             try:
-                pdf_gen = PDFGenerator()
+                pdf_gen = PDFGenerator(cache=get_default_cache())
                 pdf_gen.generate_questions_pdf(questions, questions_file)
                 pdf_gen.generate_answers_pdf(answers, answers_file)
                 print(f"\n✓ Questions saved to: {questions_file}")
@@ -185,6 +189,14 @@ def generate_test():
                 print(f"✓ Answers saved to: {answers_file}")
             except Exception as e:
                 print(f"Error saving files: {e}")
+        
+        # Structured copy that option 3 can grade later
+        try:
+            base = os.path.splitext(os.path.basename(questions_file))[0]
+            test_file = builder.save_test_to_file(base)
+            print(f"✓ Gradable test saved to: {test_file}")
+        except Exception as e:
+            print(f"Error saving test file: {e}")
     
     # Ask if user wants to answer now
     answer_now = input("\nDo you want to answer the questions now? (y/n): ").strip().lower()
@@ -204,21 +216,38 @@ def answer_test(questions: List = None, correct_answers: List = None):
     
     if questions is None:
         # Load from file
-        import os
-        filename = input("\nEnter questions filename: ").strip()
+        filename = input("\nEnter test filename (.smt, or a questions .txt): ").strip()
         # Sanitize filename
         filename = os.path.basename(filename)
         if not os.path.exists(filename):
             print(f"File not found: {filename}")
             return
         
-        with open(filename, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        print("\n" + content)
-        print("\nNote: Automatic evaluation is only available for newly generated tests.")
-        print("Please check your answers manually against the answer key.")
-        return
+        if is_test_file(filename):
+            try:
+                with TestFile(filename) as test:
+                    changed = test.changed_templates()
+                    questions, correct_answers = test.load()
+            except (OSError, ValueError) as e:
+                print(f"Error loading test: {e}")
+                return
+            if changed:
+                print(f"Note: templates changed since the test was saved: {', '.join(changed)}")
+            print(f"\nLoaded {len(questions)} questions from {filename}")
+        else:
+            with open(filename, 'r', encoding='utf-8') as f:
+                content = f.read()
+            
+            print("\n" + content)
+            print("\nNote: Automatic evaluation needs a test saved in the .smt format.")
+            print("Please check your answers manually against the answer key.")
+            return
+    
+    # Results are kept when SMARTEST_RESULTS_DB is set
+    store = get_default_store() if correct_answers else None
+    student = None
+    if store is not None:
+        student = input("\nYour name (for the results database): ").strip() or None
     
     # Answer each question
     user_answers = []
@@ -258,6 +287,11 @@ def answer_test(questions: List = None, correct_answers: List = None):
         avg_score = sum(scores) / len(scores)
         print(f"\nAverage Score: {avg_score:.1f}%")
         print("=" * 60)
+        
+        if store is not None:
+            store.record_submission(student, questions, correct_answers, user_answers, scores)
+            store.flush()
+            print(f"Results saved to {store.path}")
 
 
 def run_enhanced_cli():
@@ -1,29 +1,163 @@
 import streamlit as st
 import sys
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 # Adăugăm folderul rădăcină la calea Python pentru a putea importa modulele din 'core'
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from core.test_builder import TestBuilder
-from core.evaluator import evaluate_answer, load_keywords_for_topic
+from core.question_factory import preload_handlers
+from core.evaluator import evaluate_answer, evaluate_batch, load_keywords_for_topic, extract_keywords_from_text
+from core.results_store import get_default_store
+from core.adaptive import AdaptiveSession, DEFAULT_MIN_QUESTIONS, get_default_index
 
 # Configurare pagină
 st.set_page_config(page_title="SmarTest AI", page_icon="🎓", layout="wide")
 
 
+@st.cache_resource
+def load_resources():
+    """
+    Resurse partajate de toate sesiunile din proces (încărcate o singură dată):
+    template-uri, handlere, keywords și regex-urile compilate pentru ele.
+    """
+    preload_handlers()
+    topics_map = TestBuilder.AVAILABLE_TOPICS.copy()
+    keywords = {}
+    for topic in topics_map:
+        keywords[topic] = load_keywords_for_topic(topic)
+        # Compilează regex-urile keyword-urilor înainte de prima evaluare
+        extract_keywords_from_text("", keywords[topic])
+    return topics_map, keywords
+
+
+@st.cache_resource
+def get_executor():
+    """Pool de fire comun pentru generarea testelor în fundal."""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="smartest-gen")
+
+
+class GenerationJob:
+    """
+    Generare de test care rulează în fundal.
+    Întrebările sunt adăugate pe măsură ce sunt gata, ca interfața să le poată afișa imediat.
+    """
+
+    def __init__(self, topics, num_questions):
+        self.topics = topics
+        self.total = num_questions
+        self.questions = []
+        self.answers = []
+        self.error = None
+        self.finished = False
+        self._lock = threading.Lock()
+
+    def run(self):
+        try:
+            builder = TestBuilder()
+            for question, answer in builder.iter_test(self.topics, self.total):
+                with self._lock:
+                    self.questions.append(question)
+                    self.answers.append(answer)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished = True
+
+    def snapshot(self):
+        """Copie consistentă a întrebărilor și răspunsurilor generate până acum."""
+        with self._lock:
+            return list(self.questions), list(self.answers)
+
+
+def sync_generation_job():
+    """
+    Copiază în sesiune întrebările terminate de job-ul din fundal.
+
+    Returns:
+        True dacă generarea încă rulează
+    """
+    job = st.session_state.get('generation_job')
+    if job is None:
+        return False
+
+    questions, answers = job.snapshot()
+    st.session_state['questions'] = questions
+    st.session_state['correct_answers'] = answers
+    scores = st.session_state.setdefault('scores', [])
+    scores.extend([None] * (len(questions) - len(scores)))  # None = neevaluat
+
+    if not job.finished:
+        st.progress(len(questions) / job.total, text=f"🤖 Se generează întrebările... {len(questions)}/{job.total}")
+        return True
+
+    del st.session_state['generation_job']
+    if job.error is not None:
+        st.error(f"Eroare la generare: {job.error}")
+    else:
+        st.success("Test generat cu succes!")
+    return False
+
+
+def show_adaptive_test(session, keywords_map, store, student_name):
+    """
+    Test adaptiv: o singură întrebare pe ecran; după fiecare răspuns evaluat
+    se actualizează nivelul estimat și se alege următoarea întrebare.
+    """
+    # Întrebările la care s-a răspuns deja
+    for i, (q, score) in enumerate(zip(session.questions, session.scores)):
+        with st.expander(f"Întrebarea {i + 1} ({q['topic_name']}) - Scor: {score}%"):
+            st.markdown(q['question'])
+            st.markdown(f"**Răspunsul așteptat:**\n\n{session.answers[i]}")
+
+    next_question = session.next_question()
+    if next_question is None:
+        summary = session.summary()
+        st.success(
+            f"Test încheiat după {summary['questions']} întrebări. "
+            f"Nivel estimat: {summary['ability']:+.2f} (eroare standard {summary['standard_error']:.2f})"
+        )
+        if summary['average'] is not None:
+            st.info(f"Scor mediu: {summary['average']:.1f}%")
+
+        # Rezultatele se salvează o singură dată per test
+        if store is not None and session.scores and not st.session_state.get('adaptive_recorded'):
+            # Răspunsurile se iau din sesiune: cheile widget-urilor nu mai există după ce nu mai sunt afișate
+            store.record_submission(
+                student_name.strip() or None, session.questions, session.answers, session.user_answers, session.scores
+            )
+            st.session_state['adaptive_recorded'] = True
+        return
+
+    q, correct_ans = next_question
+    i = len(session.scores)
+    st.subheader(f"Întrebarea {i + 1}")
+    st.caption(f"Topic: {q['topic_name']} · Nivel estimat: {session.ability:+.2f} ± {session.standard_error:.2f}")
+    st.info(q['question'])
+
+    user_ans = st.text_area("Răspunsul tău:", key=f"adaptive_ans_{i}", height=100, placeholder="Scrie rezolvarea aici...")
+    if st.button("➡️ Trimite răspunsul", key=f"adaptive_btn_{i}"):
+        if not user_ans.strip():
+            st.warning("Te rugăm să scrii un răspuns înainte de a continua.")
+        else:
+            keywords = keywords_map.get(q['topic']) or load_keywords_for_topic(q['topic'])
+            session.record(evaluate_answer(correct_ans, user_ans, keywords, q['topic']), user_ans)
+            st.rerun()
+
+
 def main():
     st.title("🎓 SmarTest - Generator de Teste AI")
     st.markdown("Această aplicație generează întrebări de examen și îți evaluează automat răspunsurile.")
 
-    # --- Initializare Builder ---
-    builder = TestBuilder()
+    topics_map, keywords_map = load_resources()
 
     # --- SIDEBAR: Configurare ---
     st.sidebar.header("🛠️ Configurare Test")
 
     # 1. Selectare Subiecte
-    topics_map = builder.get_available_topics()
     selected_topic_names = st.sidebar.multiselect(
         "Selectează Capitolele:",
         options=list(topics_map.values()),
@@ -33,32 +167,86 @@ def main():
     # Convertim numele înapoi în ID-uri pentru backend
     selected_topic_ids = [tid for tid, name in topics_map.items() if name in selected_topic_names]
 
-    # 2. Selectare Număr Întrebări
-    num_questions = st.sidebar.number_input("Număr de întrebări:", min_value=1, max_value=20, value=3)
+    # 2. Mod test: clasic (toate întrebările odată) sau adaptiv (întrebările se aleg după răspunsuri)
+    adaptive = st.sidebar.radio("Mod test:", ["Clasic", "Adaptiv"], horizontal=True) == "Adaptiv"
+
+    # 3. Selectare Număr Întrebări
+    num_questions = st.sidebar.number_input(
+        "Număr maxim de întrebări:" if adaptive else "Număr de întrebări:",
+        min_value=1, value=10 if adaptive else 3
+    )
+
+    # Numele studentului (doar când rezultatele se salvează în SMARTEST_RESULTS_DB)
+    store = get_default_store()
+    student_name = st.sidebar.text_input("Nume student:") if store is not None else ""
+
+    # 4. Buton Generare
+    if adaptive:
+        if st.sidebar.button("🚀 Începe Test Adaptiv", type="primary"):
+            if not selected_topic_ids:
+                st.sidebar.error("Selectează cel puțin un capitol!")
+            else:
+                previous = st.session_state.get('adaptive_session')
+                for i in range(len(previous.questions) if previous is not None else 0):
+                    st.session_state.pop(f"adaptive_ans_{i}", None)
+                st.session_state['adaptive_session'] = AdaptiveSession(
+                    # Indexul se reconstruiește când în baza de rezultate apar răspunsuri noi
+                    get_default_index(),
+                    selected_topic_ids,
+                    min_questions=min(DEFAULT_MIN_QUESTIONS, int(num_questions)),
+                    max_questions=int(num_questions),
+                )
+                st.session_state['adaptive_recorded'] = False
+
+        if 'adaptive_session' in st.session_state:
+            st.divider()
+            show_adaptive_test(st.session_state['adaptive_session'], keywords_map, store, student_name)
+        else:
+            st.info("👈 Alege capitolele și pornește testul adaptiv: întrebările se aleg după răspunsurile tale.")
+        return
 
-    # 3. Buton Generare
     if st.sidebar.button("🚀 Generează Test Nou", type="primary"):
         if not selected_topic_ids:
             st.sidebar.error("Selectează cel puțin un capitol!")
         else:
-            with st.spinner("🤖 Asistentul AI generează întrebările..."):
-                try:
-                    # Generăm întrebările folosind logica ta existentă
-                    questions, answers = builder.generate_test(selected_topic_ids, num_questions)
-
-                    # Salvăm în starea sesiunii (pentru a nu le pierde la refresh)
-                    st.session_state['questions'] = questions
-                    st.session_state['correct_answers'] = answers
-                    st.session_state['user_answers'] = [""] * len(questions)
-                    st.session_state['scores'] = [None] * len(questions)  # None = neevaluat
-                    st.success("Test generat cu succes!")
-                except Exception as e:
-                    st.error(f"Eroare la generare: {e}")
+            # Generarea rulează în fundal; întrebările apar pe măsură ce sunt gata
+            job = GenerationJob(selected_topic_ids, int(num_questions))
+            for i in range(len(st.session_state.get('questions', []))):
+                st.session_state.pop(f"ans_{i}", None)
+            st.session_state['questions'] = []
+            st.session_state['correct_answers'] = []
+            st.session_state['scores'] = []
+            st.session_state['recorded'] = False
+            st.session_state['generation_job'] = job
+            get_executor().submit(job.run)
+
+    generating = sync_generation_job()
 
     # --- ZONA PRINCIPALĂ: Afișare Întrebări ---
     if 'questions' in st.session_state and st.session_state['questions']:
         st.divider()
 
+        # Evaluare în lot: toate răspunsurile completate, într-un singur apel
+        if st.button("✅ Verifică toate răspunsurile", key="grade_all"):
+            questions = st.session_state['questions']
+            answered = [
+                i for i in range(len(questions))
+                if st.session_state.get(f"ans_{i}", "").strip()
+            ]
+            scores = evaluate_batch(
+                [st.session_state['correct_answers'][i] for i in answered],
+                [st.session_state[f"ans_{i}"] for i in answered],
+                [questions[i]['topic'] for i in answered],
+            )
+            for i, score in zip(answered, scores):
+                st.session_state['scores'][i] = score
+
+            if answered:
+                scored = [s for s in st.session_state['scores'] if s is not None]
+                st.info(f"Scor mediu: {sum(scored) / len(scored):.1f}% ({len(answered)}/{len(questions)} răspunsuri evaluate)")
+            else:
+                st.warning("Nu există răspunsuri de evaluat.")
+
         for i, q in enumerate(st.session_state['questions']):
             # Container pentru fiecare întrebare
             with st.container():
@@ -86,11 +274,11 @@ def main():
                             # 1. Încărcăm răspunsul corect
                             correct_ans = st.session_state['correct_answers'][i]
 
-                            # 2. Încărcăm keywords pentru topicul respectiv
-                            keywords = load_keywords_for_topic(q['topic'])
+                            # 2. Keywords pentru topicul respectiv (din cache)
+                            keywords = keywords_map.get(q['topic']) or load_keywords_for_topic(q['topic'])
 
                             # 3. Evaluăm folosind funcția ta îmbunătățită
-                            score = evaluate_answer(correct_ans, user_ans, keywords)
+                            score = evaluate_answer(correct_ans, user_ans, keywords, q['topic'])
 
                             # Salvăm scorul
                             st.session_state['scores'][i] = score
@@ -114,10 +302,36 @@ def main():
 
             st.divider()
 
-    else:
+        # Rezultatele se păstrează și după închiderea sesiunii: testul se
+        # înregistrează o singură dată, la finalizare, cu răspunsurile de
+        # atunci (evaluările de dinainte pot fi repetate oricât)
+        if store is not None:
+            recorded = st.session_state.get('recorded', False)
+            if st.button("🏁 Finalizează testul", key="finish", disabled=generating or recorded):
+                questions = st.session_state['questions']
+                user_answers = [st.session_state.get(f"ans_{i}", "") for i in range(len(questions))]
+                scores = evaluate_batch(
+                    st.session_state['correct_answers'], user_answers, [q['topic'] for q in questions]
+                )
+                st.session_state['scores'] = scores
+                store.record_submission(
+                    student_name.strip() or None, questions, st.session_state['correct_answers'],
+                    user_answers, scores,
+                )
+                st.session_state['recorded'] = True
+                st.rerun()
+            if recorded:
+                st.success("Test finalizat: rezultatul a fost salvat.")
+
+    elif not generating:
         # Mesaj de întâmpinare când nu e generat testul
         st.info("👈 Folosește meniul din stânga pentru a configura și genera un test nou.")
 
+    if generating:
+        # Reîmprospătăm pagina până se termină generarea
+        time.sleep(0.5)
+        st.rerun()
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file